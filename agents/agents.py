@@ -2,14 +2,25 @@
 This file defines the agents for the Task Agent project.
 """
 
+import os
 from google.adk.agents import Agent
 from tools.todoist_tools import (
     get_open_tasks,
+    query_tasks,
     create_task,
+    create_tasks_bulk,
+    apply_changes,
     get_task_details,
+    get_task_description,
+    get_task_comments,
     add_task_comment,
     update_task,
     get_last_activity_ts,
+    get_last_activity_ts_many,
+    analyze_open_tasks,
+    rank_tasks,
+    get_open_tasks_by_project,
+    rank_tasks_across_projects,
     create_project,
     move_task_to_project,
     delete_project,
@@ -21,13 +32,31 @@ from tools.google_calendar_tools import (
     create_event,
     update_event,
     delete_event,
+    apply_event_changes,
 )
+from tools.scheduler import schedule_tasks_into_calendar
+from tools.priority_snapshot import get_priority_snapshot
+from tools.projections import with_projection
+from tools.instrumentation import tag_agent
+from agents.router import fast_route
+
+# Register the async read tools in place of the sync ones so that per-task
+# lookups run concurrently on the ADK event loop.
+if os.getenv("TODOIST_ASYNC_TOOLS", "").lower() in ("1", "true", "yes"):
+    from tools.todoist_async_tools import (
+        get_open_tasks,
+        get_task_details,
+        get_last_activity_ts,
+        get_last_activity_ts_many,
+        analyze_open_tasks,
+        rank_tasks,
+    )
 
 prioritization = Agent(
     name="PrioritizationAgent",
     model="gemini-2.5-flash",
     description="Agent that analyzes tasks and determines user priorities",
-    instruction="""Your goal is to provide the user with their top 3-5 priorities. To do this, you must first get the list of open tasks from the Work project. Use the get_open_tasks tool to retrieve tasks. Once you receive the list of tasks, analyze it based on due dates and priority flags. Formulate a final, user-facing summary of the recommended priorities.
+    instruction="""Your goal is to provide the user with their top 3-5 priorities. To do this, call the get_priority_snapshot tool ONCE with top_k=5. It returns the open tasks of the Work project already ranked by a deterministic score of recency, due date, priority, labels and subtask structure, with a breakdown of each score, from a snapshot that is kept up to date after every change. Do not re-rank the tasks yourself; use the breakdown to explain why each task is on the list. Only call rank_tasks for a project other than Work. Formulate a final, user-facing summary of the recommended priorities. When the user asks about a specific subset of tasks (e.g. overdue, due this week, P1, or with a label), call query_tasks with a Todoist filter expression such as "overdue & p1" instead of fetching every task. Only call get_open_tasks if the user asks about tasks beyond the ranked list that no filter can express. If the user asks about several projects or their whole account, call rank_tasks_across_projects or get_open_tasks_by_project once instead of calling a tool per project.
 
 **Task Management Guidelines:**
 - **Task Descriptions**: Use the task description field to store context, background information, requirements, and any static information that helps understand what the task is about.
@@ -36,14 +65,24 @@ prioritization = Agent(
 **Escalation:**
 If you receive a request that you cannot handle with your available tools or instructions, do not attempt to answer it yourself. Instead, escalate the request back to the CoordinatorAgent so it can be routed to the appropriate agent.
 """,
-    tools=[get_open_tasks, create_task],
+    before_tool_callback=tag_agent,
+    tools=[
+        get_priority_snapshot,
+        rank_tasks,
+        with_projection(get_open_tasks, "compact", tabular=True),
+        with_projection(query_tasks, "compact", tabular=True),
+        rank_tasks_across_projects,
+        with_projection(get_open_tasks_by_project, "compact", tabular=True),
+        get_task_description,
+        create_task,
+    ],
 )
 
 project_manager = Agent(
     name="ProjectManagerAgent",
     model="gemini-2.5-pro",
     description="Agent that breaks down complex goals into actionable tasks",
-    instruction="""Your purpose is to take a complex user goal (e.g., 'Plan my product launch') and break it down into a list of specific, actionable tasks. For each task you devise, use the create_task tool to create it in the Work project, providing a clear title, description, and a reasonable due date. All tasks will be created in the Work project. After creating all tasks, confirm with the user that the project plan has been created in ToDoist.
+    instruction="""Your purpose is to take a complex user goal (e.g., 'Plan my product launch') and break it down into a list of specific, actionable tasks. Devise the whole plan first, giving each task a clear title, description, and a reasonable due date, and nesting steps under their parent task as subtasks. Then create the entire plan with a SINGLE call to the create_tasks_bulk tool, passing the tree of tasks. All tasks will be created in the Work project. Only use create_task to add a single task later. After creating the plan, check the per-task results, retry or report any task that failed, and confirm with the user that the project plan has been created in ToDoist.
 
 **Task Management Guidelines:**
 - **Task Descriptions**: Place all context, requirements, background information, and static details about what the task involves in the task description field. This should include any information someone would need to understand what the task is about.
@@ -52,7 +91,12 @@ project_manager = Agent(
 **Escalation:**
 If you receive a request that you cannot handle with your available tools or instructions, do not attempt to answer it yourself. Instead, escalate the request back to the CoordinatorAgent so it can be routed to the appropriate agent.
 """,
-    tools=[get_open_tasks, create_task],
+    before_tool_callback=tag_agent,
+    tools=[
+        with_projection(get_open_tasks, "minimal", tabular=True),
+        create_tasks_bulk,
+        create_task,
+    ],
 )
 
 smart_prioritization = Agent(
@@ -66,11 +110,12 @@ smart_prioritization = Agent(
 - **Task Comments**: Use comments to record actions taken, progress updates, decisions made during our prioritization session, and any dynamic information that shows the history of work on the task. When you ask questions and get answers, record those interactions as comments.
 
 **Your Process (RIN Framework: Recency, Impact, Next-Action Effort):**
-1. **Analyze Tasks**: Get all open tasks from the Work project using `get_open_tasks`.
-2. **Deep Analysis**: For each task, you MUST perform a deep analysis:
-   - **Check for Subtasks**: IMMEDIATELY call `get_task_details` for every task to check for subtasks. If a task has subtasks, its context is the sum of its children. The 'next action' for a parent task is its first open subtask.
-   - **Determine Recency**: Use the `get_last_activity_ts` tool to find out how long it's been since the task was updated. Note any tasks that have been stale for more than a week.
+1. **Analyze Tasks**: Call `analyze_open_tasks` ONCE to get every open task in the Work project together with its deep analysis. Do not call `get_task_details` or `get_last_activity_ts` for each task; the analysis already contains that information.
+2. **Deep Analysis**: For each task in the analysis:
+   - **Check for Subtasks**: Look at `subtasks` and `next_action`. If a task has subtasks, its context is the sum of its children. The 'next action' for a parent task is its first open subtask.
+   - **Determine Recency**: Use `last_activity_ts`, `days_since_activity` and `is_stale` to see how long it's been since the task was updated. Note any tasks that have been stale for more than a week.
    - **Gather Context**: Analyze the description, labels, and existing comments.
+   - Only call `get_task_details` or `get_last_activity_ts` to refresh a single task after it has changed during our session. To refresh the recency of several tasks, call `get_last_activity_ts_many` once with all of their IDs.
 
 3. **Identify Context Gaps & Interactive Grooming**: For each task, especially those that are stale or unclear, determine what information is missing to assess its priority. Instead of asking for a generic 'impact', ask targeted questions:
    - **To Determine IMPACT, ask questions like:**
@@ -87,7 +132,7 @@ smart_prioritization = Agent(
    - Say: 'The next action of "Plan Q3 offsite" seems large. Can we break that down into smaller steps like "Draft agenda", "Book venue", and "Send invitations"?'
    - Use `create_task` to create these as subtasks.
 
-5. **Smart Prioritization (Using RIN)**: Once you have the context, recommend a prioritized order for the day's work. Your reasoning should be based on a combination of:
+5. **Smart Prioritization (Using RIN)**: Once you have the context, call `rank_tasks` to get the deterministic RIN ranking with per-component score breakdowns, and use it as the starting order instead of ranking the tasks yourself. Adjust it only where the user's answers about impact or effort justify it. Your reasoning should be based on a combination of:
    - **Recency**: Stale tasks that are still relevant should be surfaced to prevent them from being forgotten. A stale, high-impact task is a top priority.
    - **Impact**: Tasks that unblock other people or advance major project goals get higher priority.
    - **Next-Action Effort**: Balance high-impact work with quick wins. Suggest starting the day with a few high-impact, low-effort next actions to build momentum.
@@ -96,6 +141,7 @@ smart_prioritization = Agent(
    - Present your prioritized list with clear justifications for each placement based on the RIN framework.
    - Ask for approval before using `update_task` to set priorities (e.g., P1, P2) or due dates in Todoist.
    - Say exactly what you plan to do. For example: 'Based on our discussion, I propose we mark "Follow up with Legal" as P1 because it's blocking the design team and has been stale for 8 days. The next action is just to send a reminder email, which is low effort. Shall I proceed?'
+   - Once approved, apply ALL approved updates, comments and moves with a SINGLE `apply_changes` call instead of calling `update_task` and `add_task_comment` one at a time. Check the per-item results and tell the user about any change that failed.
    
 **Key Principles:**
 - **Subtasks First**: Always investigate subtasks. A parent task is just a folder.
@@ -105,25 +151,43 @@ smart_prioritization = Agent(
 - **Always Get Approval**: Propose changes clearly and wait for a 'yes' before executing them.
 
 **Available Tools:**
+- analyze_open_tasks: Get every open task with subtasks, comments, last activity and staleness in one call. **Start here.**
+- rank_tasks: Get the top tasks ranked by the deterministic RIN score, with score breakdowns.
 - get_open_tasks: Get all open tasks from the Work project.
-- get_task_details: Get comprehensive details including comments and subtasks. **Use this frequently.**
+- query_tasks: Get only the open tasks matching a Todoist filter, e.g. "overdue | today", "p1 & @waiting" or "!subtask".
+- rank_tasks_across_projects / get_open_tasks_by_project: Rank or list the tasks of several projects, or the whole account, in one call.
+- get_task_details: Get comprehensive details including comments and subtasks for a single task.
+- get_task_description: Get the full description of a task whose description was truncated.
+- get_task_comments: Get every comment of a task, when the comment summary is not enough.
 - get_last_activity_ts: Get the timestamp of the last update/comment to check for staleness.
+- get_last_activity_ts_many: Get the last activity timestamps of many tasks in one call.
 - add_task_comment: Add context and decisions as comments to tasks.
 - update_task: Update task properties (task_id, content, priority, description, due_string).
+- apply_changes: Apply many approved updates, comments and moves in one call.
 - create_task: Create new tasks (especially for breaking down larger ones).
 
-Begin by getting the open tasks and performing a deep analysis on each one.
+Begin by calling `analyze_open_tasks` and reviewing the deep analysis of each task.
 
 **Escalation:**
 If you receive a request that you cannot handle with your available tools or instructions, do not attempt to answer it yourself. Instead, escalate the request back to the CoordinatorAgent so it can be routed to the appropriate agent.
 """,
+    before_tool_callback=tag_agent,
     tools=[
-        get_open_tasks,
-        get_task_details,
+        with_projection(analyze_open_tasks, "compact"),
+        rank_tasks,
+        with_projection(get_open_tasks, "compact", tabular=True),
+        with_projection(query_tasks, "compact", tabular=True),
+        rank_tasks_across_projects,
+        with_projection(get_open_tasks_by_project, "compact", tabular=True),
+        with_projection(get_task_details, "compact"),
+        get_task_description,
+        get_task_comments,
         add_task_comment,
         update_task,
+        apply_changes,
         create_task,
         get_last_activity_ts,
+        get_last_activity_ts_many,
     ],
 )
 
@@ -131,11 +195,13 @@ morning_briefing = Agent(
     name="MorningBriefingAgent",
     model="gemini-2.5-flash",
     description="Provides a summary of the day's priorities.",
-    instruction="""Your goal is to provide the user with a morning briefing of their top 3-5 priorities. You will get the priorities from the PrioritizationAgent and format them into a clear and concise summary.
+    instruction="""Your goal is to provide the user with a morning briefing of their top 3-5 priorities. Call get_priority_snapshot ONCE with top_k=5 and format its tasks and counts (overdue, due today, stale) into a clear and concise summary. Only delegate to the PrioritizationAgent if the user asks for more than the briefing, e.g. about other projects or a filtered subset of tasks.
 
 **Escalation:**
 If you receive a request that you cannot handle with your available tools or instructions, do not attempt to answer it yourself. Instead, escalate the request back to the CoordinatorAgent so it can be routed to the appropriate agent.
 """,
+    before_tool_callback=tag_agent,
+    tools=[get_priority_snapshot],
     sub_agents=[prioritization],
 )
 
@@ -145,9 +211,16 @@ google_calendar = Agent(
     description="Manages Google Calendar events.",
     instruction="""Your goal is to help the user manage their Google Calendar. You can create, update, delete, and list events. You can also create new calendars.
 
+When listing events, pass `time_min` and `time_max` (RFC 3339) for the period the user is asking about. Without them, get_events lists the next 7 days.
+
+When the user wants to plan or time-block their tasks, call schedule_tasks_into_calendar once. It finds the free time in the calendar and places the open tasks by priority, due date and effort; present its plan, and only pass `create_events=True` once the user has approved it. Do not work out free time from get_events yourself.
+
+When creating, updating or deleting more than one event, make a single apply_event_changes call with all of the changes instead of one create_event, update_event or delete_event call per event.
+
 **Escalation:**
 If you receive a request that you cannot handle with your available tools or instructions, do not attempt to answer it yourself. Instead, escalate the request back to the CoordinatorAgent so it can be routed to the appropriate agent.
 """,
+    before_tool_callback=tag_agent,
     tools=[
         get_calendars,
         create_calendar,
@@ -155,6 +228,8 @@ If you receive a request that you cannot handle with your available tools or ins
         create_event,
         update_event,
         delete_event,
+        apply_event_changes,
+        schedule_tasks_into_calendar,
     ],
 )
 
@@ -166,9 +241,10 @@ coordinator = Agent(
 
 **Routing Rules:**
 - If the user asks for a 'morning briefing', 'daily plan', or 'what should I do today?', delegate to the MorningBriefingAgent.
-- If the user asks for their priorities, wants to know what to work on, or mentions 'prioritization', delegate to the PrioritizationAgent
+- If the user asks for their priorities, wants to know what to work on, or mentions 'prioritization', delegate to the MorningBriefingAgent, which hands detailed priority questions to its PrioritizationAgent
 - If the user wants to 'groom the backlog', 'analyze tasks', 'gather context', or mentions 'smart prioritization', delegate to the SmartPrioritizationAgent
 - If the user wants to plan a project, break down a goal, or create multiple tasks, delegate to the ProjectManagerAgent
+- If the user wants to manage calendar events, or to schedule or time-block their tasks in the calendar, delegate to the GoogleCalendarAgent
 
 **Agent Capabilities:**
 - **MorningBriefingAgent**: Provides a concise summary of the day's top priorities.
@@ -178,6 +254,8 @@ coordinator = Agent(
 - **GoogleCalendarAgent**: Manages Google Calendar events.
 
 You should not attempt to answer questions or use tools directly.""",
+    # Routes clear-cut requests without a model call; see agents/router.py
+    before_model_callback=fast_route,
     sub_agents=[
         smart_prioritization,
         project_manager,
@@ -0,0 +1,195 @@
+"""
+Deterministic fast-path routing in front of the CoordinatorAgent.
+
+The coordinator's only job is to pick a sub-agent, and its routing rules are
+keyword rules. `fast_route` is registered as the coordinator's
+before_model_callback. It classifies the user's message locally and, when
+confident, answers in place of the model with a transfer_to_agent call, so
+most requests skip one model round trip. Two classifiers are tried in order:
+
+1. Compiled keyword/regex rules that mirror the coordinator's routing rules.
+   A match is confident when the best agent scores at least 1.0 and leads
+   the runner-up by at least 0.5.
+2. A nearest-neighbour lookup over example requests for each agent, using
+   cosine similarity of their word sets. A match is confident when the
+   nearest example's similarity reaches COORDINATOR_ROUTE_MIN_SIMILARITY.
+
+Anything else, including requests handed back by a sub-agent, goes to the
+coordinator's model as before.
+
+Configuration (environment variables):
+    COORDINATOR_FAST_ROUTE: Enable the fast path (default true).
+    COORDINATOR_ROUTE_MIN_SIMILARITY: Nearest-neighbour similarity needed to
+        route without the model (default 0.5).
+"""
+
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# (pattern, agent, weight). PrioritizationAgent is a sub-agent of the
+# MorningBriefingAgent, so priority questions are routed there.
+RULES = [
+    (r"\bmorning briefing\b|\bbriefing\b|\bdaily plan\b", "MorningBriefingAgent", 2.0),
+    (r"\bwhat should i (do|work on|focus on)\b.*\btoday\b", "MorningBriefingAgent", 2.0),
+    (r"\bpriorit(y|ies|i[sz]e|i[sz]ation)\b|\bwhat (should|do) i work on\b|\btop tasks\b", "MorningBriefingAgent", 1.0),
+    (r"\bgroom\w*\b.*\bbacklog\b|\bbacklog grooming\b", "SmartPrioritizationAgent", 2.0),
+    (r"\banaly[sz]e (my |the |open )?tasks\b|\bgather (more )?context\b", "SmartPrioritizationAgent", 2.0),
+    (r"\bsmart prioriti[sz]ation\b", "SmartPrioritizationAgent", 2.0),
+    (r"\bplan (a|an|my|the|our) (?!(day|today|tomorrow|week)\b)\w+|\bproject plan\b|\bbreak (it|this|that|.+) down\b", "ProjectManagerAgent", 1.5),
+    (r"\bcreate (multiple|several|many|a few) tasks\b|\bbreak down\b", "ProjectManagerAgent", 1.5),
+    (r"\bcalendars?\b|\bmeetings?\b|\bevents?\b|\bappointments?\b", "GoogleCalendarAgent", 1.5),
+    (r"\btime[- ]?block\w*\b|\bschedule\b|\bfree time\b", "GoogleCalendarAgent", 1.5),
+]
+MIN_RULE_SCORE = 1.0
+MIN_RULE_MARGIN = 0.5
+
+# Labelled example requests for the nearest-neighbour fallback
+EXAMPLES = {
+    "MorningBriefingAgent": [
+        "what is on my plate today",
+        "give me a summary of my day",
+        "what are my most important tasks",
+        "which tasks matter most right now",
+    ],
+    "SmartPrioritizationAgent": [
+        "help me clean up my todo list",
+        "review my stale tasks with me",
+        "find tasks that have been forgotten",
+        "go through my backlog and update the tasks",
+    ],
+    "ProjectManagerAgent": [
+        "help me organize a product launch",
+        "turn this goal into tasks",
+        "set up the tasks for a new website project",
+        "what steps do i need to prepare the conference",
+    ],
+    "GoogleCalendarAgent": [
+        "book a call with the team on friday",
+        "am i free tomorrow afternoon",
+        "move my dentist appointment to next week",
+        "block two hours for writing on thursday",
+    ],
+}
+
+STOPWORDS = {
+    "a", "an", "the", "my", "me", "i", "to", "for", "of", "on", "in", "and",
+    "is", "are", "with", "do", "can", "you", "please", "this", "that", "it",
+}
+
+_COMPILED_RULES = [(re.compile(pattern, re.IGNORECASE), agent, weight) for pattern, agent, weight in RULES]
+
+
+def is_enabled() -> bool:
+    """Returns True if requests may be routed without the coordinator's model."""
+    return os.getenv("COORDINATOR_FAST_ROUTE", "true").lower() in ("1", "true", "yes")
+
+
+def get_min_similarity() -> float:
+    """Get the nearest-neighbour similarity needed to route without the model."""
+    return float(os.getenv("COORDINATOR_ROUTE_MIN_SIMILARITY", "0.5"))
+
+
+def _words(text: str) -> set:
+    return {word for word in re.findall(r"[a-z0-9']+", text.lower()) if word not in STOPWORDS}
+
+
+_EXAMPLE_WORDS = [(agent, _words(example)) for agent, examples in EXAMPLES.items() for example in examples]
+
+
+def match_rules(text: str) -> Optional[Tuple[str, float]]:
+    """
+    Scores the message against the keyword rules.
+
+    Returns:
+        Optional[Tuple[str, float]]: The agent and its score if it is
+        confident, otherwise None.
+    """
+    scores: Dict[str, float] = {}
+    for pattern, agent, weight in _COMPILED_RULES:
+        if pattern.search(text):
+            scores[agent] = scores.get(agent, 0.0) + weight
+    if not scores:
+        return None
+    ranked = sorted(scores.items(), key=lambda item: -item[1])
+    agent, score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    if score >= MIN_RULE_SCORE and score - runner_up >= MIN_RULE_MARGIN:
+        return agent, score
+    return None
+
+
+def match_examples(text: str) -> Optional[Tuple[str, float]]:
+    """
+    Finds the example request most similar to the message.
+
+    Returns:
+        Optional[Tuple[str, float]]: The agent of the nearest example and the
+        cosine similarity, if it reaches the configured minimum.
+    """
+    words = _words(text)
+    if not words:
+        return None
+    best_agent, best_similarity = None, 0.0
+    for agent, example_words in _EXAMPLE_WORDS:
+        similarity = len(words & example_words) / math.sqrt(len(words) * len(example_words))
+        if similarity > best_similarity:
+            best_agent, best_similarity = agent, similarity
+    if best_agent and best_similarity >= get_min_similarity():
+        return best_agent, round(best_similarity, 3)
+    return None
+
+
+def route(text: str, agent_names: Optional[List[str]] = None) -> Optional[Tuple[str, float, str]]:
+    """
+    Picks a sub-agent for a user message without a model call.
+
+    Args:
+        text (str): The user's message.
+        agent_names (Optional[List[str]]): The agents that may be chosen; a
+            match outside them is ignored.
+
+    Returns:
+        Optional[Tuple[str, float, str]]: (agent, confidence, "rules" or
+        "examples"), or None if neither classifier is confident.
+    """
+    for method, matcher in (("rules", match_rules), ("examples", match_examples)):
+        match = matcher(text)
+        if match and (agent_names is None or match[0] in agent_names):
+            return match[0], match[1], method
+    return None
+
+
+def _user_text(content: Optional[types.Content]) -> str:
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+def fast_route(callback_context, llm_request) -> Optional[LlmResponse]:
+    """
+    ADK before_model_callback for the CoordinatorAgent. Returns a
+    transfer_to_agent call when the user's message can be routed
+    deterministically, or None to let the model decide.
+    """
+    if not is_enabled() or not llm_request.contents:
+        return None
+    # Only route a fresh user message; a request handed back by a sub-agent
+    # means the fast path already got it wrong, so the model decides.
+    text = _user_text(callback_context.user_content)
+    last = llm_request.contents[-1]
+    if not text or last.role != "user" or _user_text(last) != text:
+        return None
+
+    agent_names = [agent.name for agent in callback_context.get_invocation_context().agent.sub_agents]
+    decision = route(text, agent_names)
+    if decision is None:
+        return None
+    agent_name, confidence, method = decision
+    print(f"Fast-routed to {agent_name} by {method} (confidence {confidence}).")
+    call = types.FunctionCall(name="transfer_to_agent", args={"agent_name": agent_name})
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
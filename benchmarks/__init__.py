@@ -0,0 +1 @@
+# Offline benchmarks against a local ToDoist and Google Calendar stub server
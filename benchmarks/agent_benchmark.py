@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+End-to-end agent benchmark with a scripted model and the local API stub.
+
+Runs the real ADK agent graph from agents/agents.py — instructions, tool
+declarations, projections, transfers and callbacks — but every agent's
+model is replaced by a ScriptedLlm that replays the calls a well-behaved
+model should make for the workflow. Tools run for real against the
+StubServer from benchmarks/stub_server.py.
+
+For each scenario it reports model turns per agent, tool calls, sub-agent
+transfers and the approximate size in tokens of every model request and
+tool result, so prompt and tool changes can be judged by how many round
+trips and how much context they cost. Tokens are estimated as 4 characters
+of the serialized request per token.
+
+Usage:
+    python -m benchmarks.agent_benchmark
+    python -m benchmarks.agent_benchmark --scenario groom_backlog --tasks 500
+    python -m benchmarks.agent_benchmark --save agents.json
+    python -m benchmarks.agent_benchmark --baseline agents.json --tolerance 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from agents.agents import coordinator
+from benchmarks.run_benchmarks import reset_client_state, stub_environment
+from benchmarks.stub_server import StubSettings
+
+CHARS_PER_TOKEN = 4
+FINAL_TEXT = "Done."
+
+# A step is a text reply, a (tool name, args) call, or a callable that
+# builds either from the request the model received.
+Step = Union[str, tuple, Callable[[LlmRequest], Union[str, tuple]]]
+
+
+def estimate_tokens(value: Any) -> int:
+    """Estimates the tokens of a pydantic object or JSON-serializable value."""
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json", exclude_none=True)
+    return len(json.dumps(value, default=str)) // CHARS_PER_TOKEN
+
+
+def last_tool_result(llm_request: LlmRequest, tool_name: str) -> Any:
+    """Returns the latest response of `tool_name` in the request contents, if any."""
+    for content in reversed(llm_request.contents):
+        for part in content.parts or []:
+            response = part.function_response
+            if response and response.name == tool_name:
+                result = response.response or {}
+                return result.get("result", result)
+    return None
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    A model that replays a fixed list of steps, one per model call, and
+    records the estimated size of every request it receives. Once the
+    script runs out it answers with FINAL_TEXT.
+    """
+
+    steps: List[Any] = []
+    request_tokens: List[int] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        prompt_tokens = estimate_tokens(llm_request.contents) + estimate_tokens(llm_request.config)
+        self.request_tokens.append(prompt_tokens)
+
+        turn = len(self.request_tokens) - 1
+        step = self.steps[turn] if turn < len(self.steps) else FINAL_TEXT
+        if callable(step):
+            step = step(llm_request)
+        if isinstance(step, tuple):
+            name, args = step
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+        else:
+            part = types.Part(text=step)
+
+        content = types.Content(role="model", parts=[part])
+        yield LlmResponse(
+            content=content,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=estimate_tokens(content),
+            ),
+        )
+
+
+def _transfer(agent_name: str) -> tuple:
+    return ("transfer_to_agent", {"agent_name": agent_name})
+
+
+def _approve_top_tasks(llm_request: LlmRequest) -> tuple:
+    ranked = last_tool_result(llm_request, "rank_tasks") or []
+    changes = [{"type": "update", "task_id": task["id"], "priority": 4} for task in ranked[:3]]
+    changes.append({"type": "comment", "task_id": ranked[0]["id"], "content": "Top priority this week"})
+    return ("apply_changes", {"changes": changes})
+
+
+def _week_window() -> Dict[str, str]:
+    now = datetime.now(timezone.utc)
+    monday = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    return {"time_min": monday.isoformat(), "time_max": (monday + timedelta(days=7)).isoformat()}
+
+
+def build_scenarios() -> Dict[str, Dict]:
+    """
+    Returns the scripted workflows: the user messages to send, and the
+    steps each agent's model takes across all of them.
+    """
+    plan = [
+        {
+            "content": f"Launch step {step}",
+            "description": "Part of the product launch",
+            "due_string": f"in {step} weeks",
+            "subtasks": [{"content": f"Launch step {step} task {sub}"} for sub in range(3)],
+        }
+        for step in range(1, 6)
+    ]
+    return {
+        "morning_briefing": {
+            "messages": ["morning briefing"],
+            "scripts": {
+                "CoordinatorAgent": [_transfer("MorningBriefingAgent")],
+                "MorningBriefingAgent": [("get_priority_snapshot", {"top_k": 5}), "Your top priorities today are ..."],
+            },
+        },
+        "groom_backlog": {
+            "messages": ["groom my backlog", "yes, apply those changes"],
+            "scripts": {
+                "CoordinatorAgent": [_transfer("SmartPrioritizationAgent")],
+                "SmartPrioritizationAgent": [
+                    ("analyze_open_tasks", {}),
+                    ("rank_tasks", {"top_k": 5}),
+                    "I propose marking the top three tasks as P1. Shall I proceed?",
+                    _approve_top_tasks,
+                    "All changes were applied.",
+                ],
+            },
+        },
+        "plan_project": {
+            "messages": ["plan my product launch"],
+            "scripts": {
+                "CoordinatorAgent": [_transfer("ProjectManagerAgent")],
+                "ProjectManagerAgent": [("create_tasks_bulk", {"tasks": plan}), "The plan has been created."],
+            },
+        },
+        "calendar_week": {
+            "messages": ["what is on my calendar this week?"],
+            "scripts": {
+                "CoordinatorAgent": [_transfer("GoogleCalendarAgent")],
+                "GoogleCalendarAgent": [
+                    ("get_events", dict(calendar_id="primary", **_week_window())),
+                    "Here is your week ...",
+                ],
+            },
+        },
+    }
+
+
+def _iter_agents(agent):
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _iter_agents(sub_agent)
+
+
+async def _run_messages(messages: List[str]) -> List:
+    runner = InMemoryRunner(agent=coordinator, app_name="agent_benchmark")
+    session = await runner.session_service.create_session(app_name="agent_benchmark", user_id="benchmark")
+    events = []
+    for message in messages:
+        new_message = types.Content(role="user", parts=[types.Part(text=message)])
+        async for event in runner.run_async(user_id="benchmark", session_id=session.id, new_message=new_message):
+            events.append(event)
+    return events
+
+
+def run_agent_scenario(name: str, scenario: Dict) -> Dict:
+    """
+    Runs one scripted workflow through the agent graph.
+
+    The scripted models are swapped in for the duration of the run and the
+    original models restored afterwards. The process must already be
+    pointed at a stub server.
+
+    Returns:
+        Dict: llm_turns (total and per agent), tool_calls (total and per
+        tool), transfers, prompt_tokens (total and largest request),
+        tool_result_tokens, tool_errors and wall_ms.
+    """
+    agents = list(_iter_agents(coordinator))
+    original_models = {agent.name: agent.model for agent in agents}
+    models = {}
+    for agent in agents:
+        models[agent.name] = ScriptedLlm(model=agent.name, steps=scenario["scripts"].get(agent.name, []), request_tokens=[])
+        agent.model = models[agent.name]
+    try:
+        start = time.perf_counter()
+        events = asyncio.run(_run_messages(scenario["messages"]))
+        wall_ms = (time.perf_counter() - start) * 1000
+    finally:
+        for agent in agents:
+            agent.model = original_models[agent.name]
+
+    tool_calls: Dict[str, int] = {}
+    transfers = []
+    tool_result_tokens = 0
+    tool_errors = 0
+    for event in events:
+        for call in event.get_function_calls():
+            if call.name != "transfer_to_agent":
+                tool_calls[call.name] = tool_calls.get(call.name, 0) + 1
+        for response in event.get_function_responses():
+            if response.name == "transfer_to_agent":
+                continue
+            tool_result_tokens += estimate_tokens(response.response)
+            result = (response.response or {}).get("result", response.response)
+            tool_errors += isinstance(result, dict) and "error" in result
+        if event.actions and event.actions.transfer_to_agent:
+            transfers.append(event.actions.transfer_to_agent)
+
+    request_tokens = [tokens for model in models.values() for tokens in model.request_tokens]
+    return {
+        "scenario": name,
+        "llm_turns": len(request_tokens),
+        "turns_by_agent": {agent: len(model.request_tokens) for agent, model in models.items() if model.request_tokens},
+        "tool_calls": sum(tool_calls.values()),
+        "calls_by_tool": tool_calls,
+        "transfers": transfers,
+        "prompt_tokens": sum(request_tokens),
+        "max_prompt_tokens": max(request_tokens, default=0),
+        "tool_result_tokens": tool_result_tokens,
+        "tool_errors": tool_errors,
+        "wall_ms": round(wall_ms, 2),
+    }
+
+
+def run_agent_benchmarks(settings: StubSettings, scenarios: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Runs the given scripted workflows (default: all) against a stub server,
+    regenerating its data and dropping client caches before each one.
+    """
+    available = build_scenarios()
+    reports = []
+    with stub_environment(settings) as stub:
+        for name in scenarios or available:
+            stub.reset_data()
+            reset_client_state()
+            reports.append(run_agent_scenario(name, available[name]))
+    return reports
+
+
+def find_regressions(reports: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """
+    Returns one message per scenario that takes more model turns, tool calls
+    or transfers than the baseline, or whose prompt or tool-result tokens
+    grew by more than `tolerance`.
+    """
+    previous = {report["scenario"]: report for report in baseline}
+    regressions = []
+    for report in reports:
+        before = previous.get(report["scenario"])
+        if not before:
+            continue
+        for key in ("llm_turns", "tool_calls"):
+            if report[key] > before[key]:
+                regressions.append(f"{report['scenario']}: {key} {before[key]} -> {report[key]}")
+        if len(report["transfers"]) > len(before["transfers"]):
+            regressions.append(f"{report['scenario']}: transfers {before['transfers']} -> {report['transfers']}")
+        for key in ("prompt_tokens", "tool_result_tokens"):
+            if report[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{report['scenario']}: {key} {before[key]} -> {report[key]}")
+    return regressions
+
+
+def print_reports(reports: List[Dict]):
+    print(f"{'scenario':<20}{'turns':>7}{'tools':>7}{'xfers':>7}{'prompt tok':>12}{'max req tok':>13}{'result tok':>12}{'errors':>8}{'wall ms':>10}")
+    for report in reports:
+        print(
+            f"{report['scenario']:<20}{report['llm_turns']:>7}{report['tool_calls']:>7}{len(report['transfers']):>7}"
+            f"{report['prompt_tokens']:>12}{report['max_prompt_tokens']:>13}{report['tool_result_tokens']:>12}"
+            f"{report['tool_errors']:>8}{report['wall_ms']:>10.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(build_scenarios()), help="Scenario to run (repeatable, default all)")
+    parser.add_argument("--tasks", type=int, default=200, help="Open tasks in the synthetic backlog")
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Write the reports to this JSON file")
+    parser.add_argument("--baseline", help="Fail if a scenario costs more than in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed token growth over the baseline")
+    args = parser.parse_args(argv)
+
+    settings = StubSettings(tasks=args.tasks, projects=args.projects, latency_ms=args.latency_ms, seed=args.seed)
+    reports = run_agent_benchmarks(settings, args.scenario)
+    print_reports(reports)
+
+    if args.save:
+        with open(args.save, "w") as report_file:
+            json.dump(reports, report_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(reports, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Offline tool benchmarks against the local ToDoist and Calendar stub.
+
+Runs each scenario in benchmarks/scenarios.py a number of times against a
+StubServer with a synthetic backlog, and reports p50/p99 latency, requests,
+bytes, server errors, 429s and failed items per scenario. With --baseline,
+the run fails when a scenario got slower or chattier than a saved report.
+
+Usage:
+    python -m benchmarks.run_benchmarks --tasks 10000 --iterations 20
+    python -m benchmarks.run_benchmarks --latency-ms 30 --error-rate 0.01 \\
+        --rate-limit-rate 0.02 --scenario grooming_pass
+    python -m benchmarks.run_benchmarks --save baseline.json
+    python -m benchmarks.run_benchmarks --baseline baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.stub_server import StubServer, StubSettings
+from tools import (
+    calendar_sync,
+    fetch_cache,
+    google_calendar_tools,
+    task_index,
+    todoist_client,
+    todoist_sync,
+    todoist_tools,
+    tool_memo,
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Returns the nearest-rank percentile of `values`."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def reset_client_state():
+    """Drops every client-side cache, so the next scenario run starts cold."""
+    todoist_client.reset_session()
+    todoist_tools.metadata_cache.clear()
+    task_index.invalidate_index()
+    fetch_cache.clear_fetch_cache()
+    tool_memo.clear_memo()
+    google_calendar_tools.reset_calendar_service()
+    if todoist_sync.is_enabled():
+        todoist_sync.reset_replica()
+    if calendar_sync.is_enabled():
+        calendar_sync.reset_calendar("primary")
+
+
+def benchmark_env(stub: StubServer, workdir: str, use_sync: bool, client_rate_limit: bool) -> Dict[str, str]:
+    """Returns the environment that points the tools at `stub`."""
+    env = stub.env()
+    env.update(
+        {
+            "TOOL_TRACE": "off",
+            "TODOIST_USE_SYNC": str(use_sync).lower(),
+            "TODOIST_REPLICA_PATH": os.path.join(workdir, "todoist_replica.db"),
+            "GOOGLE_CALENDAR_USE_SYNC": str(use_sync).lower(),
+            "GOOGLE_CALENDAR_STORE_PATH": os.path.join(workdir, "calendar_store.db"),
+            "TODOIST_SNAPSHOT_PATH": os.path.join(workdir, "priority_snapshot.json"),
+            "TODOIST_SNAPSHOT_BACKGROUND": "false",
+        }
+    )
+    if not client_rate_limit:
+        # Measure the tools, not the client-side quota of 1000 requests / 15 min
+        env.update({"TODOIST_RATE_LIMIT": "1000000000", "TODOIST_RATE_PERIOD": "1", "TODOIST_RATE_BURST": "1000000000"})
+    return env
+
+
+@contextmanager
+def stub_environment(settings: StubSettings, use_sync: bool = False, client_rate_limit: bool = False):
+    """
+    Starts a StubServer and points the process environment at it, restoring
+    the environment and dropping client state on exit.
+
+    Yields:
+        StubServer: The running stub.
+    """
+    saved_env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as workdir, StubServer(settings) as stub:
+        os.environ.update(benchmark_env(stub, workdir, use_sync, client_rate_limit))
+        try:
+            reset_client_state()
+            yield stub
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+            reset_client_state()
+
+
+def run_scenario(stub: StubServer, name: str, iterations: int, warm: bool = False) -> Dict:
+    """
+    Runs one scenario `iterations` times and summarizes latency and traffic.
+
+    Args:
+        stub (StubServer): The running stub the tools are pointed at.
+        name (str): A key of SCENARIOS.
+        iterations (int): Number of timed runs.
+        warm (bool): Keep client caches between runs instead of starting cold.
+
+    The stub data is regenerated before the scenario and, for cold runs,
+    before every run, so writes of earlier runs and scenarios do not change
+    the numbers. Warm runs keep the data of the previous run, since their
+    caches must stay consistent with the server.
+
+    Returns:
+        Dict: p50_ms, p99_ms, mean_ms, per-run requests and bytes, and total
+        server errors, 429s and failed items.
+    """
+    scenario = SCENARIOS[name]
+    stub.reset_data()
+    reset_client_state()
+    stub.reset_stats()
+    latencies = []
+    failed = 0
+    for iteration in range(iterations):
+        if not warm and iteration:
+            stub.reset_data()
+            reset_client_state()
+        start = time.perf_counter()
+        try:
+            failed += scenario()
+        except Exception as e:
+            print(f"{name} failed: {e}")
+            failed += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    routes = stub.get_stats()
+    totals = {key: sum(route[key] for route in routes.values()) for key in ("requests", "bytes_in", "bytes_out", "errors", "rate_limited")}
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "requests_per_run": round(totals["requests"] / iterations, 2),
+        # The stub counts from its own side: its bytes_in were sent by the tools
+        "bytes_sent_per_run": round(totals["bytes_in"] / iterations),
+        "bytes_received_per_run": round(totals["bytes_out"] / iterations),
+        "server_errors": totals["errors"],
+        "rate_limited": totals["rate_limited"],
+        "failed_items": failed,
+        "routes": routes,
+    }
+
+
+def run_benchmarks(
+    settings: StubSettings,
+    scenarios: Optional[List[str]] = None,
+    iterations: int = 10,
+    use_sync: bool = False,
+    warm: bool = False,
+    client_rate_limit: bool = False,
+) -> List[Dict]:
+    """Starts a stub server and runs the given scenarios (default: all) against it."""
+    with stub_environment(settings, use_sync, client_rate_limit) as stub:
+        return [run_scenario(stub, name, iterations, warm) for name in scenarios or SCENARIOS]
+
+
+def find_regressions(reports: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """
+    Compares reports with a saved baseline.
+
+    Returns:
+        List[str]: One message per scenario whose p50 or p99 grew by more than
+        `tolerance`, or that makes more requests per run than the baseline.
+    """
+    previous = {report["scenario"]: report for report in baseline}
+    regressions = []
+    for report in reports:
+        before = previous.get(report["scenario"])
+        if not before:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if report[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{report['scenario']}: {key} {before[key]} -> {report[key]}")
+        if report["requests_per_run"] > before["requests_per_run"]:
+            regressions.append(
+                f"{report['scenario']}: requests_per_run {before['requests_per_run']} -> {report['requests_per_run']}"
+            )
+    return regressions
+
+
+def print_reports(reports: List[Dict]):
+    print(f"{'scenario':<24}{'p50 ms':>10}{'p99 ms':>10}{'req/run':>10}{'KB recv/run':>13}{'5xx':>6}{'429':>6}{'failed':>8}")
+    for report in reports:
+        print(
+            f"{report['scenario']:<24}{report['p50_ms']:>10.1f}{report['p99_ms']:>10.1f}"
+            f"{report['requests_per_run']:>10.1f}{report['bytes_received_per_run'] / 1024:>13.1f}"
+            f"{report['server_errors']:>6}{report['rate_limited']:>6}{report['failed_items']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (repeatable, default all)")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=1000, help="Open tasks in the synthetic backlog (10 to 100000)")
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--comments-per-task", type=float, default=1.0)
+    parser.add_argument("--events-per-day", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds sent with HTTP 429")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--use-sync", action="store_true", help="Read through the ToDoist replica and the calendar store")
+    parser.add_argument("--warm", action="store_true", help="Keep client caches between iterations")
+    parser.add_argument("--client-rate-limit", action="store_true", help="Keep the client-side ToDoist rate limit")
+    parser.add_argument("--save", help="Write the reports to this JSON file")
+    parser.add_argument("--baseline", help="Fail if slower or chattier than the reports in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed latency growth over the baseline")
+    args = parser.parse_args(argv)
+
+    settings = StubSettings(
+        tasks=args.tasks,
+        projects=args.projects,
+        comments_per_task=args.comments_per_task,
+        events_per_day=args.events_per_day,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    reports = run_benchmarks(
+        settings, args.scenario, args.iterations, args.use_sync, args.warm, args.client_rate_limit
+    )
+    print_reports(reports)
+
+    if args.save:
+        with open(args.save, "w") as report_file:
+            json.dump(reports, report_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(reports, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
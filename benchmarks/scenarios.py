@@ -0,0 +1,68 @@
+"""
+Scripted tool workloads for the benchmark runner.
+
+Each scenario runs the tools the agents would call for one workflow and
+returns the number of items that failed, so injected faults show up in the
+report next to the latency.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from tools import google_calendar_tools, rin_scoring, todoist_tools
+
+
+def _failures(result) -> int:
+    """Counts a tool's error dict as one failure and adds its `failed` items."""
+    if isinstance(result, dict):
+        return 1 if "error" in result else result.get("failed", 0)
+    return 0
+
+
+def grooming_pass() -> int:
+    """
+    A full grooming pass over the "Work" project: analyze every open task,
+    rank them, raise the priority of the top five and comment on up to ten
+    stale tasks in one batch.
+    """
+    analysis = todoist_tools.analyze_open_tasks("Work")
+    if not isinstance(analysis, list):
+        return 1
+    ranked = rin_scoring.rank(analysis, top_k=5)
+    stale = [task for task in analysis if task["is_stale"]][:10]
+    changes = [{"type": "update", "task_id": task["id"], "priority": 4} for task in ranked]
+    changes += [
+        {"type": "comment", "task_id": task["id"], "content": "Still relevant?"}
+        for task in stale
+    ]
+    return _failures(todoist_tools.apply_changes(changes))
+
+
+def bulk_plan_creation() -> int:
+    """Creates a ten-step project plan with four subtasks per step."""
+    plan = [
+        {
+            "content": f"Milestone {step}",
+            "priority": 3,
+            "due_string": f"in {step} weeks",
+            "subtasks": [{"content": f"Milestone {step} task {sub}"} for sub in range(4)],
+        }
+        for step in range(1, 11)
+    ]
+    return _failures(todoist_tools.create_tasks_bulk(plan, project_name="Work"))
+
+
+def calendar_week_listing() -> int:
+    """Lists the primary calendar for the current week."""
+    now = datetime.now(timezone.utc)
+    monday = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    events = google_calendar_tools.get_events(
+        "primary", monday.isoformat(), (monday + timedelta(days=7)).isoformat()
+    )
+    return _failures(events)
+
+
+SCENARIOS = {
+    "grooming_pass": grooming_pass,
+    "bulk_plan_creation": bulk_plan_creation,
+    "calendar_week_listing": calendar_week_listing,
+}
@@ -0,0 +1,620 @@
+"""
+A local HTTP stub of the ToDoist and Google Calendar APIs used by the tools.
+
+The stub holds a synthetic backlog in memory and serves it on 127.0.0.1:
+
+    /rest/v2/...          ToDoist REST: projects, labels, tasks, comments
+    /sync/v9/sync         ToDoist Sync: incremental reads and commands
+    /calendar/v3/...      Calendar: events list/insert/patch/delete, freeBusy
+    /batch/calendar/v3    Calendar batch: multipart/mixed of the routes above
+
+Every request can be delayed and can fail with HTTP 503 or be rate limited
+with HTTP 429, at configurable rates, so retry and backoff paths are
+exercised too. The server counts requests and bytes per route. Requests it
+cannot parse are answered with HTTP 400, and unexpected errors with HTTP 500.
+
+Point the tools at it with the environment returned by `StubServer.env()`.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser, Parser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from tools import task_filter
+
+LABELS = ["waiting", "errand", "deep-work", "quick", "blocker", "someday"]
+WORDS = [
+    "plan", "review", "draft", "ship", "fix", "call", "book", "update",
+    "budget", "report", "release", "offsite", "invoice", "roadmap", "notes",
+]
+
+
+class StubSettings:
+    """Backlog size and fault injection settings of a StubServer."""
+
+    def __init__(
+        self,
+        tasks: int = 1000,
+        projects: int = 5,
+        comments_per_task: float = 1.0,
+        events_per_day: int = 4,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.0,
+        seed: int = 42,
+    ):
+        """
+        Args:
+            tasks (int): Number of open tasks in the backlog.
+            projects (int): Number of projects; the first is named "Work".
+            comments_per_task (float): Average comments per task.
+            events_per_day (int): Events per day in every calendar.
+            latency_ms (float): Delay added to every response.
+            jitter_ms (float): Extra random delay, up to this much.
+            error_rate (float): Fraction of requests answered with HTTP 503.
+            rate_limit_rate (float): Fraction of requests answered with HTTP 429.
+            retry_after (float): Retry-After seconds sent with HTTP 429.
+            seed (int): Seed of the generated data and of the injected faults.
+        """
+        self.tasks = tasks
+        self.projects = projects
+        self.comments_per_task = comments_per_task
+        self.events_per_day = events_per_day
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.seed = seed
+
+
+def _iso(value: datetime) -> str:
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class StubData:
+    """
+    The in-memory backlog and calendars. Every change bumps `version`, which
+    doubles as the sync token of both the ToDoist and the Calendar stub.
+    """
+
+    def __init__(self, settings: StubSettings):
+        self.lock = threading.Lock()
+        self.version = 1
+        self.projects: Dict[str, Dict] = {}
+        self.tasks: Dict[str, Dict] = {}
+        self.comments: Dict[str, List[Dict]] = {}
+        self.events: Dict[str, Dict[str, Dict]] = {}
+        # Version at which each object last changed, for incremental syncs
+        self.changed: Dict[tuple, int] = {}
+        self._next_id = 1
+        self._generate(settings, random.Random(settings.seed))
+
+    def new_id(self) -> str:
+        self._next_id += 1
+        return str(self._next_id)
+
+    def touch(self, kind: str, object_id: str):
+        """Records a change to an object. Call with `lock` held."""
+        self.version += 1
+        self.changed[(kind, object_id)] = self.version
+
+    def changed_since(self, kind: str, version: int) -> List[str]:
+        return [
+            object_id
+            for (changed_kind, object_id), changed_at in self.changed.items()
+            if changed_kind == kind and changed_at > version
+        ]
+
+    def _generate(self, settings: StubSettings, rng: random.Random):
+        now = datetime.now(timezone.utc)
+        today = now.date()
+        for index in range(max(settings.projects, 1)):
+            project_id = f"p{index + 1}"
+            name = "Work" if index == 0 else f"Project {index + 1}"
+            self.projects[project_id] = {"id": project_id, "name": name}
+        project_ids = list(self.projects)
+
+        # Last top-level task of each project, the parent of any new subtask
+        last_top_level: Dict[str, str] = {}
+        for index in range(settings.tasks):
+            task_id = self.new_id()
+            project_id = project_ids[index % len(project_ids)]
+            parent_id = None
+            if project_id in last_top_level and rng.random() < 0.2:
+                parent_id = last_top_level[project_id]
+            else:
+                last_top_level[project_id] = task_id
+            due = None
+            if rng.random() < 0.6:
+                due_date = today + timedelta(days=rng.randint(-10, 30))
+                due = {"date": due_date.isoformat(), "string": due_date.isoformat(), "is_recurring": rng.random() < 0.05}
+            created = now - timedelta(days=rng.randint(0, 120), minutes=rng.randint(0, 1440))
+            self.tasks[task_id] = {
+                "id": task_id,
+                "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).capitalize(),
+                "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 40))),
+                "project_id": project_id,
+                "section_id": None,
+                "parent_id": parent_id,
+                "order": index,
+                "priority": rng.choice([1, 1, 1, 2, 2, 3, 4]),
+                "due": due,
+                "labels": rng.sample(LABELS, rng.choice([0, 0, 1, 1, 2])),
+                "created": _iso(created),
+                "is_completed": False,
+                "url": f"https://app.todoist.com/app/task/{task_id}",
+            }
+            comments = []
+            for _ in range(round(rng.expovariate(1 / settings.comments_per_task)) if settings.comments_per_task else 0):
+                posted = created + timedelta(days=rng.randint(0, 60))
+                comments.append(self._comment(task_id, " ".join(rng.choice(WORDS) for _ in range(12)), min(posted, now)))
+            self.comments[task_id] = comments
+
+        start = datetime.combine(today - timedelta(days=30), datetime.min.time(), timezone.utc)
+        primary = self.events.setdefault("primary", {})
+        for day in range(90):
+            for slot in range(settings.events_per_day):
+                event_id = f"e{self.new_id()}"
+                begin = start + timedelta(days=day, hours=9 + (2 * slot) % 9, minutes=rng.choice([0, 30]))
+                primary[event_id] = self._event(event_id, f"Meeting {event_id}", _iso(begin), _iso(begin + timedelta(minutes=rng.choice([30, 60]))))
+
+    def _comment(self, task_id: str, content: str, posted: datetime) -> Dict:
+        posted_at = _iso(posted)
+        return {"id": f"c{self.new_id()}", "task_id": task_id, "content": content, "posted_at": posted_at, "created": posted_at, "attachment": None}
+
+    @staticmethod
+    def _event(event_id: str, summary: str, start: str, end: str) -> Dict:
+        return {"id": event_id, "status": "confirmed", "summary": summary, "start": {"dateTime": start}, "end": {"dateTime": end}}
+
+    # ToDoist REST
+
+    def add_task(self, args: Dict) -> Dict:
+        task_id = self.new_id()
+        due_string = args.get("due_string") or (args.get("due") or {}).get("string")
+        task = {
+            "id": task_id,
+            "content": args.get("content", ""),
+            "description": args.get("description", ""),
+            "project_id": args.get("project_id") or "p1",
+            "section_id": None,
+            "parent_id": args.get("parent_id"),
+            "order": len(self.tasks),
+            "priority": args.get("priority", 1),
+            "due": {"date": due_string, "string": due_string, "is_recurring": False} if due_string else None,
+            "labels": args.get("labels", []),
+            "created": _iso(datetime.now(timezone.utc)),
+            "is_completed": False,
+            "url": f"https://app.todoist.com/app/task/{task_id}",
+        }
+        self.tasks[task_id] = task
+        self.comments[task_id] = []
+        self.touch("item", task_id)
+        return task
+
+    def update_task(self, task_id: str, args: Dict) -> Optional[Dict]:
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        for field in ("content", "description", "priority", "labels", "project_id"):
+            if field in args:
+                task[field] = args[field]
+        due_string = args.get("due_string") or (args.get("due") or {}).get("string")
+        if due_string:
+            task["due"] = {"date": due_string, "string": due_string, "is_recurring": False}
+        self.touch("item", task_id)
+        return task
+
+    def add_comment(self, task_id: str, content: str) -> Optional[Dict]:
+        if task_id not in self.tasks:
+            return None
+        comment = self._comment(task_id, content, datetime.now(timezone.utc))
+        self.comments[task_id].append(comment)
+        self.touch("note", comment["id"])
+        return comment
+
+    # ToDoist Sync
+
+    def _sync_item(self, task: Dict) -> Dict:
+        item = {key: task[key] for key in ("id", "content", "description", "project_id", "section_id", "parent_id", "priority", "due", "labels")}
+        item.update({"child_order": task["order"], "added_at": task["created"], "checked": task["is_completed"]})
+        return item
+
+    def sync_read(self, sync_token: str) -> Dict:
+        if sync_token == "*":
+            projects = list(self.projects.values())
+            items = [self._sync_item(task) for task in self.tasks.values()]
+            notes = [comment for comments in self.comments.values() for comment in comments]
+        else:
+            since = int(sync_token)
+            projects = [self.projects.get(pid, {"id": pid, "is_deleted": True}) for pid in self.changed_since("project", since)]
+            items = [self._sync_item(self.tasks[tid]) for tid in self.changed_since("item", since) if tid in self.tasks]
+            note_ids = set(self.changed_since("note", since))
+            notes = [c for comments in self.comments.values() for c in comments if c["id"] in note_ids]
+        notes = [dict(note, item_id=note["task_id"]) for note in notes]
+        return {
+            "full_sync": sync_token == "*",
+            "sync_token": str(self.version),
+            "projects": projects,
+            "items": items,
+            "notes": notes,
+        }
+
+    def run_commands(self, commands: List[Dict]) -> Dict:
+        sync_status = {}
+        temp_id_mapping = {}
+        for command in commands:
+            args = dict(command.get("args", {}))
+            for key in ("id", "parent_id", "item_id"):
+                if args.get(key) in temp_id_mapping:
+                    args[key] = temp_id_mapping[args[key]]
+            command_type = command.get("type")
+            result = None
+            if command_type == "item_add":
+                result = self.add_task(args)
+                temp_id_mapping[command.get("temp_id")] = result["id"]
+            elif command_type in ("item_update", "item_move"):
+                result = self.update_task(str(args.get("id")), args)
+            elif command_type == "note_add":
+                result = self.add_comment(str(args.get("item_id")), args.get("content", ""))
+            sync_status[command.get("uuid")] = "ok" if result else {"error_code": 22, "error": "Item not found"}
+        return {"sync_status": sync_status, "temp_id_mapping": temp_id_mapping, "sync_token": str(self.version)}
+
+    # Calendar
+
+    def list_events(self, calendar_id: str, params: Dict[str, str]) -> Optional[Dict]:
+        events = self.events.get(calendar_id, {})
+        sync_token = params.get("syncToken")
+        if sync_token:
+            if not sync_token.isdigit():
+                return None
+            changed = set(self.changed_since(f"event:{calendar_id}", int(sync_token)))
+            matching = [event for event_id, event in events.items() if event_id in changed]
+        else:
+            time_min = _parse_time(params["timeMin"]) if params.get("timeMin") else None
+            time_max = _parse_time(params["timeMax"]) if params.get("timeMax") else None
+            matching = [
+                event
+                for event in events.values()
+                if event["status"] != "cancelled"
+                and (time_min is None or _parse_time(event["end"]["dateTime"]) > time_min)
+                and (time_max is None or _parse_time(event["start"]["dateTime"]) < time_max)
+            ]
+            matching.sort(key=lambda event: event["start"]["dateTime"])
+
+        offset = int(params.get("pageToken") or 0)
+        page_size = min(int(params.get("maxResults") or 250), 2500)
+        page = matching[offset : offset + page_size]
+        response = {"kind": "calendar#events", "items": page}
+        if offset + page_size < len(matching):
+            response["nextPageToken"] = str(offset + page_size)
+        else:
+            response["nextSyncToken"] = str(self.version)
+        return response
+
+    def busy(self, calendar_id: str, time_min: str, time_max: str) -> List[Dict]:
+        listed = self.list_events(calendar_id, {"timeMin": time_min, "timeMax": time_max, "maxResults": "2500"})
+        return [{"start": event["start"]["dateTime"], "end": event["end"]["dateTime"]} for event in listed["items"]]
+
+    def put_event(self, calendar_id: str, event_id: Optional[str], body: Dict) -> Optional[Dict]:
+        events = self.events.setdefault(calendar_id, {})
+        if event_id is None:
+            event_id = f"e{self.new_id()}"
+            events[event_id] = self._event(event_id, "", "", "")
+        elif event_id not in events:
+            return None
+        event = events[event_id]
+        event.update(body)
+        event["id"] = event_id
+        self.touch(f"event:{calendar_id}", event_id)
+        return event
+
+    def delete_event(self, calendar_id: str, event_id: str) -> bool:
+        event = self.events.get(calendar_id, {}).get(event_id)
+        if event is None:
+            return False
+        event["status"] = "cancelled"
+        self.touch(f"event:{calendar_id}", event_id)
+        return True
+
+
+_EVENTS_RE = re.compile(r"^/calendar/v3/calendars/([^/]+)/events(?:/([^/]+))?$")
+_TASK_RE = re.compile(r"^/rest/v2/tasks/([^/]+)$")
+_PROJECT_RE = re.compile(r"^/rest/v2/projects/([^/]+)$")
+CALENDAR_BATCH_PATH = "/batch/calendar/v3"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Routes requests to the StubData of the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method: str):
+        stub: "StubServer" = self.server.stub
+        # Read once, so a concurrent reset_data() cannot switch it mid-request
+        data = stub.data
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route = stub.route_name(method, url.path)
+        content_type = self.headers.get("Content-Type", "")
+
+        status, payload, headers = stub.inject_fault()
+        encoded = None
+        if status is None:
+            try:
+                with data.lock:
+                    if url.path == CALENDAR_BATCH_PATH and method == "POST":
+                        content_type, encoded = self._dispatch_batch(data, content_type, body)
+                        status = 200
+                    else:
+                        status, payload = self._dispatch(data, method, url.path, params, body, content_type)
+            except (ValueError, KeyError, TypeError) as e:
+                status, payload = 400, {"error": f"Bad request: {e}"}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        if encoded is None:
+            content_type = "application/json"
+            encoded = b"" if payload is None else json.dumps(payload).encode()
+
+        stub.count(route, status, len(body), len(encoded))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _dispatch_batch(self, data: StubData, content_type: str, body: bytes):
+        """
+        Runs every part of a Calendar batch request through `_dispatch`.
+
+        Returns:
+            tuple: The Content-Type and body of the multipart/mixed response,
+            with one application/http part per request part.
+        """
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        if not message.is_multipart():
+            raise ValueError("batch body is not multipart/mixed")
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in message.get_payload():
+            # Each part holds a whole HTTP request: request line, headers and body
+            request_line, _, rest = part.get_payload().partition("\n")
+            method, target, _ = request_line.strip().split(" ", 2)
+            inner = Parser().parsestr(rest)
+            url = urlsplit(target)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            inner_body = (inner.get_payload() or "").encode()
+            status, payload = self._dispatch(data, method, url.path, params, inner_body, inner.get("Content-Type", ""))
+            encoded = "" if payload is None else json.dumps(payload)
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'].strip()[1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(encoded.encode())}\r\n\r\n"
+                f"{encoded}\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(parts).encode()
+
+    def _dispatch(self, data: StubData, method: str, path: str, params: Dict, body: bytes, content_type: str):
+        if "application/x-www-form-urlencoded" in content_type:
+            form = {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+            payload = {}
+        else:
+            form = {}
+            payload = json.loads(body) if body else {}
+
+        if path == "/sync/v9/sync" and method == "POST":
+            if "commands" in form:
+                return 200, data.run_commands(json.loads(form["commands"]))
+            return 200, data.sync_read(form.get("sync_token", "*"))
+
+        if path == "/rest/v2/projects":
+            if method == "POST":
+                project_id = f"p{data.new_id()}"
+                data.projects[project_id] = {"id": project_id, "name": payload.get("name", "")}
+                data.touch("project", project_id)
+                return 200, data.projects[project_id]
+            return 200, list(data.projects.values())
+        match = _PROJECT_RE.match(path)
+        if match and method == "DELETE":
+            if data.projects.pop(match.group(1), None) is None:
+                return 404, {"error": "Project not found"}
+            data.touch("project", match.group(1))
+            return 204, None
+
+        if path == "/rest/v2/labels":
+            return 200, [{"id": f"l{i}", "name": name} for i, name in enumerate(LABELS)]
+
+        if path == "/rest/v2/tasks":
+            if method == "POST":
+                return 200, data.add_task(payload)
+            tasks = list(data.tasks.values())
+            if params.get("project_id"):
+                tasks = [task for task in tasks if task["project_id"] == params["project_id"]]
+            if params.get("filter"):
+                project_ids = {project["name"].lower(): pid for pid, project in data.projects.items()}
+                project_parents = {pid: project.get("parent_id") for pid, project in data.projects.items()}
+                try:
+                    predicate = task_filter.compile_filter(
+                        params["filter"], project_ids, project_parents=project_parents
+                    )
+                except ValueError as e:
+                    return 400, {"error": str(e)}
+                tasks = [task for task in tasks if predicate(task)]
+            return 200, tasks
+        match = _TASK_RE.match(path)
+        if match:
+            task_id = match.group(1)
+            task = data.update_task(task_id, payload) if method == "POST" else data.tasks.get(task_id)
+            return (200, task) if task else (404, {"error": "Task not found"})
+
+        if path == "/rest/v2/comments":
+            if method == "POST":
+                comment = data.add_comment(str(payload.get("task_id")), payload.get("content", ""))
+                return (200, comment) if comment else (404, {"error": "Task not found"})
+            return 200, data.comments.get(params.get("task_id"), [])
+
+        if path == "/calendar/v3/freeBusy" and method == "POST":
+            calendars = {
+                item["id"]: {"busy": data.busy(item["id"], payload["timeMin"], payload["timeMax"])}
+                for item in payload.get("items", [])
+            }
+            return 200, {"kind": "calendar#freeBusy", "calendars": calendars}
+        match = _EVENTS_RE.match(path)
+        if match:
+            calendar_id, event_id = match.groups()
+            if method == "GET" and event_id is None:
+                listed = data.list_events(calendar_id, params)
+                return (200, listed) if listed else (410, {"error": {"code": 410, "message": "Sync token is no longer valid"}})
+            if method == "DELETE":
+                return (204, None) if data.delete_event(calendar_id, event_id) else (404, {"error": {"code": 404}})
+            if method in ("POST", "PATCH"):
+                event = data.put_event(calendar_id, event_id, payload)
+                return (200, event) if event else (404, {"error": {"code": 404}})
+
+        return 404, {"error": f"No stub for {method} {path}"}
+
+
+class StubServer:
+    """
+    Runs the ToDoist and Calendar stub on a free local port in a daemon thread.
+
+    Usage:
+        with StubServer(StubSettings(tasks=10000)) as stub:
+            os.environ.update(stub.env())
+            ...
+    """
+
+    def __init__(self, settings: Optional[StubSettings] = None):
+        self.settings = settings or StubSettings()
+        self.data = StubData(self.settings)
+        self._faults = random.Random(self.settings.seed)
+        self._faults_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def env(self) -> Dict[str, str]:
+        """Returns the environment variables that point the tools at the stub."""
+        return {
+            "TODOIST_API_TOKEN": "stub-token",
+            "TODOIST_API_BASE_URL": f"{self.url}/rest/v2",
+            "TODOIST_SYNC_API_URL": f"{self.url}/sync/v9/sync",
+            "GOOGLE_CALENDAR_API_ROOT": f"{self.url}/",
+        }
+
+    @staticmethod
+    def route_name(method: str, path: str) -> str:
+        """Collapses IDs out of a path, e.g. "GET /rest/v2/tasks/{id}"."""
+        path = _TASK_RE.sub("/rest/v2/tasks/{id}", path)
+        path = _PROJECT_RE.sub("/rest/v2/projects/{id}", path)
+        path = _EVENTS_RE.sub(lambda m: "/calendar/v3/calendars/{cid}/events" + ("/{id}" if m.group(2) else ""), path)
+        return f"{method} {path}"
+
+    def inject_fault(self):
+        """Sleeps for the configured latency and picks an injected failure, if any."""
+        settings = self.settings
+        with self._faults_lock:
+            roll = self._faults.random()
+            jitter = self._faults.uniform(0, settings.jitter_ms)
+        delay_ms = settings.latency_ms + jitter
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        if roll < settings.rate_limit_rate:
+            return 429, {"error": "Too many requests"}, {"Retry-After": str(settings.retry_after)}
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            return 503, {"error": "Service unavailable"}, {}
+        return None, None, {}
+
+    def count(self, route: str, status: int, bytes_in: int, bytes_out: int):
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                route, {"requests": 0, "bytes_in": 0, "bytes_out": 0, "errors": 0, "rate_limited": 0}
+            )
+            stats["requests"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["rate_limited"] += status == 429
+            stats["errors"] += status >= 500
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Returns request, byte, error and 429 counts per route."""
+        with self._stats_lock:
+            return {route: dict(stats) for route, stats in self._stats.items()}
+
+    def reset_data(self):
+        """
+        Regenerates the backlog and calendars from the seed and restarts the
+        sequence of injected faults, so the next run sees the same server as
+        the first one.
+        """
+        self.data = StubData(self.settings)
+        with self._faults_lock:
+            self._faults = random.Random(self.settings.seed)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
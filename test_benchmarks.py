@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the offline benchmark stub server and runner.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from agents.agents import coordinator
+from benchmarks import agent_benchmark, run_benchmarks
+from benchmarks.stub_server import StubServer, StubSettings
+from tools import google_calendar_tools, todoist_tools
+
+
+class TestStubServer(unittest.TestCase):
+    """Unit tests for the stub ToDoist and Calendar APIs."""
+
+    def setUp(self):
+        self.stub = StubServer(StubSettings(tasks=60, projects=3))
+        self.stub.start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        snapshot_path = os.path.join(self.tmpdir.name, "priority_snapshot.json")
+        self.env = patch.dict(
+            os.environ,
+            dict(self.stub.env(), TODOIST_USE_SYNC="false", TOOL_TRACE="off", TODOIST_SNAPSHOT_PATH=snapshot_path),
+        )
+        self.env.start()
+        run_benchmarks.reset_client_state()
+
+    def tearDown(self):
+        self.env.stop()
+        self.stub.stop()
+        self.tmpdir.cleanup()
+        run_benchmarks.reset_client_state()
+
+    def test_rest_and_sync_serve_the_same_backlog(self):
+        """Test that the REST listing and a full sync agree."""
+        work_tasks = todoist_tools.get_open_tasks("Work")
+        payload = self.stub.data.sync_read("*")
+
+        self.assertEqual(len(work_tasks), 20)
+        self.assertEqual(len(payload["items"]), 60)
+        self.assertEqual(self.stub.get_stats()["GET /rest/v2/tasks"]["requests"], 1)
+
+    def test_writes_show_up_in_incremental_sync(self):
+        """Test that batched commands are applied and synced incrementally."""
+        token = self.stub.data.sync_read("*")["sync_token"]
+
+        result = todoist_tools.create_tasks_bulk(
+            [{"content": "Plan", "subtasks": [{"content": "Step"}]}], project_name="Work"
+        )
+        changes = self.stub.data.sync_read(token)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(sorted(item["content"] for item in changes["items"]), ["Plan", "Step"])
+
+    def test_filters_are_evaluated(self):
+        """Test that the filter parameter is honoured."""
+        tasks = todoist_tools.query_tasks("p1")
+
+        self.assertTrue(tasks)
+        self.assertTrue(all(task["priority"] == 4 for task in tasks))
+
+    def test_calendar_batch(self):
+        """Test that every part of a Calendar batch request is answered."""
+        event_id = next(iter(self.stub.data.events["primary"]))
+        start = {"dateTime": "2030-01-07T09:00:00+00:00"}
+        end = {"dateTime": "2030-01-07T10:00:00+00:00"}
+
+        result = google_calendar_tools.apply_event_changes(
+            "primary",
+            [
+                {"type": "create", "summary": "Focus", "start": start, "end": end},
+                {"type": "update", "event_id": event_id, "summary": "Moved"},
+                {"type": "delete", "event_id": "missing"},
+            ],
+        )
+
+        self.assertEqual((result["applied"], result["failed"]), (2, 1))
+        self.assertEqual(self.stub.data.events["primary"][result["results"][0]["event_id"]]["summary"], "Focus")
+        self.assertEqual(self.stub.data.events["primary"][event_id]["summary"], "Moved")
+        self.assertEqual(self.stub.get_stats()["POST /batch/calendar/v3"]["requests"], 1)
+
+    def test_bad_requests_get_a_reply(self):
+        """Test that an unparsable body is answered with HTTP 400."""
+        response = todoist_tools.requests.post(f"{self.stub.url}/rest/v2/tasks", data="{", timeout=5)
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestRunBenchmarks(unittest.TestCase):
+    """Unit tests for the scenario runner and its reports."""
+
+    def test_scenarios_report_latency_and_traffic(self):
+        """Test that every scenario runs cleanly and the environment is restored."""
+        before = dict(os.environ)
+
+        reports = run_benchmarks.run_benchmarks(StubSettings(tasks=100), iterations=2)
+
+        self.assertEqual([r["scenario"] for r in reports], list(run_benchmarks.SCENARIOS))
+        for report in reports:
+            self.assertLessEqual(report["p50_ms"], report["p99_ms"])
+            self.assertGreater(report["requests_per_run"], 0)
+            self.assertEqual(report["failed_items"], 0)
+        self.assertEqual(dict(os.environ), before)
+
+    def test_injected_errors_are_reported(self):
+        """Test that server errors surface as failed items."""
+        reports = run_benchmarks.run_benchmarks(
+            StubSettings(tasks=10, error_rate=1.0), ["calendar_week_listing"], iterations=2
+        )
+
+        self.assertEqual(reports[0]["server_errors"], 2)
+        self.assertEqual(reports[0]["failed_items"], 2)
+
+    def test_runs_do_not_depend_on_earlier_writes(self):
+        """Test that every cold run and scenario starts from the same data."""
+        settings = StubSettings(tasks=100)
+        alone = run_benchmarks.run_benchmarks(settings, ["grooming_pass"], iterations=1)
+        after_writes = run_benchmarks.run_benchmarks(settings, ["bulk_plan_creation", "grooming_pass"], iterations=3)
+
+        self.assertEqual(after_writes[1]["requests_per_run"], alone[0]["requests_per_run"])
+        self.assertEqual(after_writes[1]["bytes_received_per_run"], alone[0]["bytes_received_per_run"])
+
+    def test_find_regressions(self):
+        """Test that slower or chattier scenarios are flagged."""
+        baseline = [{"scenario": "grooming_pass", "p50_ms": 100, "p99_ms": 200, "requests_per_run": 3}]
+        report = dict(baseline[0], p50_ms=110, p99_ms=300)
+
+        self.assertEqual(run_benchmarks.find_regressions([report], baseline, 0.2), ["grooming_pass: p99_ms 200 -> 300"])
+        self.assertEqual(len(run_benchmarks.find_regressions([dict(report, requests_per_run=4)], baseline, 1.0)), 1)
+        self.assertEqual(run_benchmarks.percentile([5, 1, 3, 2, 4], 50), 3)
+
+
+class TestAgentBenchmark(unittest.TestCase):
+    """Unit tests for the scripted end-to-end agent benchmark."""
+
+    def test_workflows_are_measured(self):
+        """Test that turns, tool calls, transfers and tokens are counted."""
+        reports = agent_benchmark.run_agent_benchmarks(
+            StubSettings(tasks=50), ["morning_briefing", "groom_backlog"]
+        )
+        briefing, grooming = reports
+
+        self.assertEqual(briefing["transfers"], ["MorningBriefingAgent"])
+        self.assertEqual(briefing["calls_by_tool"], {"get_priority_snapshot": 1})
+        self.assertEqual(briefing["llm_turns"], 2)
+        self.assertEqual(grooming["calls_by_tool"], {"analyze_open_tasks": 1, "rank_tasks": 1, "apply_changes": 1})
+        self.assertEqual(grooming["turns_by_agent"], {"SmartPrioritizationAgent": 5})
+        self.assertEqual(grooming["tool_errors"], 0)
+        self.assertGreater(grooming["prompt_tokens"], grooming["max_prompt_tokens"])
+        self.assertGreater(grooming["tool_result_tokens"], 0)
+        self.assertEqual(coordinator.model, "gemini-2.5-flash")
+
+    def test_find_regressions(self):
+        """Test that extra round trips and token growth are flagged."""
+        baseline = [{"scenario": "plan_project", "llm_turns": 3, "tool_calls": 1, "transfers": ["ProjectManagerAgent"], "prompt_tokens": 1000, "tool_result_tokens": 100}]
+        report = dict(baseline[0], llm_turns=4, prompt_tokens=1050)
+
+        self.assertEqual(
+            agent_benchmark.find_regressions([report], baseline, 0.1), ["plan_project: llm_turns 3 -> 4"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the batched Sync API write tools.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from tools import todoist_tools
+
+
+class FakeSyncAPI:
+    """Applies Sync API command batches and records each request."""
+
+    def __init__(self, failing_contents=()):
+        self.batches = []
+        self.failing_contents = set(failing_contents)
+        self.next_id = 100
+
+    def sync(self, data):
+        commands = json.loads(data["commands"])
+        self.batches.append(commands)
+        sync_status, temp_id_mapping = {}, {}
+        for command in commands:
+            if command["args"].get("content") in self.failing_contents:
+                sync_status[command["uuid"]] = {"error_code": 20, "error": "Invalid argument"}
+                continue
+            sync_status[command["uuid"]] = "ok"
+            if "temp_id" in command:
+                self.next_id += 1
+                temp_id_mapping[command["temp_id"]] = str(self.next_id)
+
+        response = MagicMock()
+        response.json.return_value = {"sync_status": sync_status, "temp_id_mapping": temp_id_mapping}
+        return response
+
+
+class TestCreateTasksBulk(unittest.TestCase):
+    """Unit tests for creating task trees in command batches."""
+
+    def setUp(self):
+        patch.object(todoist_tools, "get_project_by_name", return_value={"id": "p1"}).start()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patch.dict(os.environ, {"TODOIST_SNAPSHOT_PATH": os.path.join(tmpdir.name, "priority_snapshot.json")}).start()
+        self.addCleanup(patch.stopall)
+
+    def test_tree_is_created_in_one_request(self):
+        """Test that a task tree costs one request and links subtasks."""
+        api = FakeSyncAPI()
+        with patch.object(todoist_tools.todoist_client, "sync", side_effect=api.sync):
+            result = todoist_tools.create_tasks_bulk(
+                [
+                    {"content": "Plan launch", "due_string": "friday", "subtasks": [
+                        {"content": "Draft announcement"},
+                        {"content": "Book venue", "priority": 4},
+                    ]},
+                    {"content": "Retro"},
+                ]
+            )
+
+        self.assertEqual(len(api.batches), 1)
+        self.assertEqual(result["created"], 4)
+        parent, draft, venue, retro = result["tasks"]
+        self.assertEqual(draft["parent_id"], parent["id"])
+        self.assertEqual(venue["parent_id"], parent["id"])
+        self.assertIsNone(retro["parent_id"])
+
+        commands = api.batches[0]
+        self.assertEqual(commands[0]["args"]["project_id"], "p1")
+        self.assertEqual(commands[0]["args"]["due"], {"string": "friday"})
+        self.assertEqual(commands[1]["args"]["parent_id"], commands[0]["temp_id"])
+
+    def test_large_plans_are_chunked_and_parents_resolved(self):
+        """Test that children in later batches point at real parent IDs."""
+        api = FakeSyncAPI()
+        subtasks = [{"content": f"Step {i}"} for i in range(150)]
+        with patch.object(todoist_tools.todoist_client, "sync", side_effect=api.sync):
+            result = todoist_tools.create_tasks_bulk([{"content": "Big plan", "subtasks": subtasks}])
+
+        self.assertEqual([len(b) for b in api.batches], [100, 51])
+        parent_id = result["tasks"][0]["id"]
+        self.assertEqual(api.batches[1][0]["args"]["parent_id"], parent_id)
+        self.assertEqual(result["created"], 151)
+
+    def test_children_of_failed_parent_are_skipped(self):
+        """Test that partial failures are reported per task."""
+        api = FakeSyncAPI(failing_contents={"Broken"})
+        subtasks = [{"content": f"Step {i}"} for i in range(98)]
+        with patch.object(todoist_tools.todoist_client, "sync", side_effect=api.sync):
+            result = todoist_tools.create_tasks_bulk(
+                [{"content": "Filler", "subtasks": subtasks}, {"content": "Broken", "subtasks": [{"content": "Orphan"}]}]
+            )
+
+        statuses = {t["content"]: t["status"] for t in result["tasks"]}
+        self.assertEqual(statuses["Broken"], "error")
+        self.assertEqual(statuses["Orphan"], "skipped")
+        self.assertEqual(result["failed"], 2)
+
+
+class TestApplyChanges(unittest.TestCase):
+    """Unit tests for batched updates, comments and moves."""
+
+    def setUp(self):
+        patch.object(todoist_tools, "get_project_by_name", return_value={"id": "p2"}).start()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patch.dict(os.environ, {"TODOIST_SNAPSHOT_PATH": os.path.join(tmpdir.name, "priority_snapshot.json")}).start()
+        self.addCleanup(patch.stopall)
+
+    def test_mixed_changes_in_one_request(self):
+        """Test that updates, comments and moves share one batch."""
+        api = FakeSyncAPI()
+        with patch.object(todoist_tools.todoist_client, "sync", side_effect=api.sync):
+            result = todoist_tools.apply_changes(
+                [
+                    {"type": "update", "task_id": "1", "priority": 4, "due_string": "today"},
+                    {"type": "comment", "task_id": "1", "content": "Blocking design team"},
+                    {"type": "move", "task_id": "2", "project_name": "Someday"},
+                ]
+            )
+
+        self.assertEqual(len(api.batches), 1)
+        self.assertEqual(result["applied"], 3)
+        types = [c["type"] for c in api.batches[0]]
+        self.assertEqual(types, ["item_update", "note_add", "item_move"])
+        self.assertEqual(api.batches[0][0]["args"], {"id": "1", "priority": 4, "due": {"string": "today"}})
+        self.assertEqual(api.batches[0][2]["args"], {"id": "2", "project_id": "p2"})
+
+    def test_changes_are_chunked_to_api_limit(self):
+        """Test that large change sets are split into 100-command batches."""
+        api = FakeSyncAPI()
+        changes = [{"type": "comment", "task_id": str(i), "content": "Reviewed"} for i in range(250)]
+        with patch.object(todoist_tools.todoist_client, "sync", side_effect=api.sync):
+            result = todoist_tools.apply_changes(changes)
+
+        self.assertEqual([len(b) for b in api.batches], [100, 100, 50])
+        self.assertEqual(result["applied"], 250)
+
+    def test_partial_failures_are_explicit(self):
+        """Test that invalid and rejected changes are reported per item."""
+        api = FakeSyncAPI(failing_contents={"Rejected"})
+        with patch.object(todoist_tools.todoist_client, "sync", side_effect=api.sync):
+            result = todoist_tools.apply_changes(
+                [
+                    {"type": "update", "task_id": "1", "content": "Rejected"},
+                    {"type": "update", "task_id": "2"},
+                    {"type": "archive", "task_id": "3"},
+                    {"type": "update", "task_id": "4", "content": "Fine"},
+                ]
+            )
+
+        statuses = [r["status"] for r in result["results"]]
+        self.assertEqual(statuses, ["error", "error", "error", "ok"])
+        self.assertEqual(result["results"][0]["error"], "Invalid argument")
+        self.assertEqual(result["results"][1]["error"], "No updates provided")
+        self.assertEqual(len(api.batches[0]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
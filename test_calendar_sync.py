@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the incremental Google Calendar event store.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from tools import calendar_sync, google_calendar_tools
+
+
+def _event(event_id, start, end, summary="Meeting", status="confirmed"):
+    return {
+        "id": event_id,
+        "summary": summary,
+        "status": status,
+        "start": {"dateTime": start},
+        "end": {"dateTime": end},
+    }
+
+
+FULL_SYNC = [
+    {
+        "items": [_event("e1", "2030-01-07T09:00:00Z", "2030-01-07T10:00:00Z")],
+        "nextPageToken": "page2",
+    },
+    {
+        "items": [
+            _event("e2", "2030-01-08T09:00:00+02:00", "2030-01-08T10:00:00+02:00"),
+            _event("e3", "2030-01-20T09:00:00Z", "2030-01-20T10:00:00Z"),
+        ],
+        "nextSyncToken": "s1",
+    },
+]
+
+DELTA_SYNC = [
+    {
+        "items": [
+            _event("e1", "2030-01-07T11:00:00Z", "2030-01-07T12:00:00Z", "Moved"),
+            {"id": "e2", "status": "cancelled"},
+        ],
+        "nextSyncToken": "s2",
+    }
+]
+
+
+class TestCalendarSync(unittest.TestCase):
+    """Unit tests for full and incremental calendar syncs."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.env = patch.dict(
+            os.environ,
+            {
+                "GOOGLE_CALENDAR_USE_SYNC": "true",
+                "GOOGLE_CALENDAR_STORE_PATH": os.path.join(self.tmpdir, "calendar.db"),
+                "GOOGLE_CALENDAR_SYNC_PAST_DAYS": "3650",
+                "GOOGLE_CALENDAR_SYNC_FUTURE_DAYS": "3650",
+            },
+        )
+        self.env.start()
+        calendar_sync.mark_stale()
+
+        self.service = MagicMock()
+        self.list = self.service.events.return_value.list
+        self.list.return_value.execute.side_effect = FULL_SYNC + DELTA_SYNC
+        patch(
+            "tools.google_calendar_tools.get_calendar_service",
+            return_value=self.service,
+        ).start()
+        self.addCleanup(patch.stopall)
+
+    def tearDown(self):
+        calendar_sync.mark_stale()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def _week(self):
+        events = google_calendar_tools.get_events(
+            "primary", "2030-01-06T00:00:00Z", "2030-01-13T00:00:00Z"
+        )
+        return [event["id"] for event in events]
+
+    def test_reads_are_served_from_store(self):
+        """Test that repeated queries over a week sync once."""
+        self.assertEqual(self._week(), ["e1", "e2"])
+        self.assertEqual(self._week(), ["e1", "e2"])
+
+        self.assertEqual(self.list.call_count, 2)
+        self.assertNotIn("syncToken", self.list.call_args.kwargs)
+        self.assertIn("timeMax", self.list.call_args.kwargs)
+        self.assertEqual(calendar_sync.get_sync_token("primary"), "s1")
+
+    def test_incremental_sync_after_write(self):
+        """Test that a write makes the next read pull only the changes."""
+        self._week()
+        self.service.events.return_value.delete.return_value.execute.return_value = ""
+        google_calendar_tools.delete_event("primary", "e2")
+
+        events = google_calendar_tools.get_events(
+            "primary", "2030-01-06T00:00:00Z", "2030-01-13T00:00:00Z"
+        )
+
+        self.assertEqual(self.list.call_args.kwargs["syncToken"], "s1")
+        self.assertEqual([(e["id"], e["summary"]) for e in events], [("e1", "Moved")])
+        self.assertEqual(calendar_sync.get_sync_token("primary"), "s2")
+
+    def test_expired_token_triggers_full_resync(self):
+        """Test that 410 Gone drops the calendar and syncs it from scratch."""
+        self._week()
+        gone = HttpError(httplib2.Response({"status": 410}), b"Sync token is no longer valid")
+        self.list.return_value.execute.side_effect = [
+            gone,
+            {"items": [_event("e9", "2030-01-09T09:00:00Z", "2030-01-09T10:00:00Z")], "nextSyncToken": "s9"},
+        ]
+
+        result = calendar_sync.sync(self.service, "primary")
+
+        self.assertTrue(result["full_sync"])
+        self.assertEqual(self._week(), ["e9"])
+        self.assertEqual(calendar_sync.get_sync_token("primary"), "s9")
+
+    def test_all_day_events_use_the_calendar_time_zone(self):
+        """Test that an all-day event starts at midnight in the calendar's zone."""
+        self.list.return_value.execute.side_effect = [
+            {
+                "items": [
+                    {
+                        "id": "holiday",
+                        "status": "confirmed",
+                        "start": {"date": "2030-01-08"},
+                        "end": {"date": "2030-01-09"},
+                    }
+                ],
+                "nextSyncToken": "s1",
+                "timeZone": "America/Los_Angeles",
+            }
+        ]
+
+        # 2030-01-08 in Los Angeles is 08:00 to 08:00 UTC the next day
+        before = google_calendar_tools.get_events(
+            "primary", "2030-01-07T00:00:00Z", "2030-01-08T06:00:00Z"
+        )
+        during = google_calendar_tools.get_events(
+            "primary", "2030-01-08T06:00:00-08:00", "2030-01-08T07:00:00-08:00"
+        )
+
+        self.assertEqual(before, [])
+        self.assertEqual([event["id"] for event in during], ["holiday"])
+
+    def test_reads_outside_the_synced_window_use_the_api(self):
+        """Test that a window past the full sync's end is listed from the API."""
+        self.list.return_value.execute.side_effect = None
+        self.list.return_value.execute.return_value = {"items": []}
+
+        with patch.dict(os.environ, {"GOOGLE_CALENDAR_SYNC_FUTURE_DAYS": "30"}):
+            google_calendar_tools.get_events(
+                "primary", "2030-01-06T00:00:00Z", "2030-01-13T00:00:00Z"
+            )
+
+        self.assertEqual(self.list.call_args.kwargs["timeMin"], "2030-01-06T00:00:00+00:00")
+        self.assertIsNone(calendar_sync.get_sync_token("primary"))
+
+
+if __name__ == "__main__":
+    unittest.main()
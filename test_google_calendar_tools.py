@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the cached Google Calendar service.
+"""
+
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from tools import google_calendar_tools
+
+
+class TestCalendarService(unittest.TestCase):
+    """Unit tests for service caching and credential refresh."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        with open("token.json", "w") as token:
+            token.write('{"token": "old"}')
+
+        self.creds = MagicMock(valid=True, expired=False, refresh_token="r")
+        self.creds.to_json.return_value = '{"token": "old"}'
+        self.load = patch(
+            "tools.google_calendar_tools.Credentials.from_authorized_user_file",
+            return_value=self.creds,
+        ).start()
+        self.build = patch("tools.google_calendar_tools.build").start()
+        self.addCleanup(patch.stopall)
+        google_calendar_tools.reset_calendar_service()
+
+    def tearDown(self):
+        google_calendar_tools.reset_calendar_service()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_service_is_built_once(self):
+        """Test that repeated calls reuse one service built offline."""
+        first = google_calendar_tools.get_calendar_service()
+        second = google_calendar_tools.get_calendar_service()
+
+        self.assertIs(first, second)
+        self.build.assert_called_once()
+        self.assertTrue(self.build.call_args.kwargs["static_discovery"])
+        self.load.assert_called_once()
+
+    def test_each_thread_gets_its_own_service(self):
+        """Test that threads do not share a service and its HTTP transport."""
+        self.build.side_effect = lambda *args, **kwargs: MagicMock()
+        services = []
+
+        def call_twice():
+            first = google_calendar_tools.get_calendar_service()
+            self.assertIs(google_calendar_tools.get_calendar_service(), first)
+            services.append(first)
+
+        threads = [threading.Thread(target=call_twice) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(services), 2)
+        self.assertIsNot(services[0], services[1])
+        self.load.assert_called_once()
+
+    def test_reset_rebuilds_every_thread_service(self):
+        """Test that a reset is seen by services cached in other threads."""
+        first = google_calendar_tools.get_calendar_service()
+        thread = threading.Thread(target=google_calendar_tools.reset_calendar_service)
+        thread.start()
+        thread.join()
+        self.build.return_value = MagicMock()
+
+        self.assertIsNot(google_calendar_tools.get_calendar_service(), first)
+
+    def test_unchanged_token_is_not_rewritten(self):
+        """Test that token.json is left alone while the token is valid."""
+        with patch("builtins.open", wraps=open) as mock_open:
+            google_calendar_tools.get_calendar_service()
+            google_calendar_tools.get_calendar_service()
+
+        modes = [call.args[1] for call in mock_open.call_args_list if len(call.args) > 1]
+        self.assertNotIn("w", modes)
+
+    def test_refreshes_only_when_expiring(self):
+        """Test that credentials are refreshed and saved once they expire."""
+        google_calendar_tools.get_calendar_service()
+        self.creds.refresh.assert_not_called()
+
+        self.creds.valid = False
+        self.creds.to_json.return_value = '{"token": "new"}'
+
+        def refresh(request):
+            self.creds.valid = True
+
+        self.creds.refresh.side_effect = refresh
+        google_calendar_tools.get_calendar_service()
+        google_calendar_tools.get_calendar_service()
+
+        self.creds.refresh.assert_called_once()
+        with open("token.json") as token:
+            self.assertEqual(token.read(), '{"token": "new"}')
+
+
+class TestGetEvents(unittest.TestCase):
+    """Unit tests for windowed, paginated event listing."""
+
+    def setUp(self):
+        self.service = MagicMock()
+        self.pages = [
+            {"items": [{"id": "e1"}, {"id": "e2"}], "nextPageToken": "t2"},
+            {"items": [{"id": "e3"}]},
+        ]
+        self.service.events.return_value.list.return_value.execute.side_effect = (
+            self.pages
+        )
+        patch(
+            "tools.google_calendar_tools.get_calendar_service",
+            return_value=self.service,
+        ).start()
+        self.addCleanup(patch.stopall)
+        self.list = self.service.events.return_value.list
+
+    def test_follows_page_tokens(self):
+        """Test that every page is fetched with the field mask and ordering."""
+        events = google_calendar_tools.get_events(
+            "primary", "2025-01-06T00:00:00Z", "2025-01-13T00:00:00Z"
+        )
+
+        self.assertEqual([e["id"] for e in events], ["e1", "e2", "e3"])
+        first, second = self.list.call_args_list
+        self.assertIsNone(first.kwargs["pageToken"])
+        self.assertEqual(second.kwargs["pageToken"], "t2")
+        self.assertTrue(first.kwargs["singleEvents"])
+        self.assertEqual(first.kwargs["orderBy"], "startTime")
+        self.assertEqual(
+            first.kwargs["fields"],
+            f"nextPageToken,items({google_calendar_tools.EVENT_FIELDS})",
+        )
+
+    def test_pages_are_fetched_lazily(self):
+        """Test that the generator stops requesting once the caller stops."""
+        events = google_calendar_tools.iter_events("primary")
+        next(events)
+        next(events)
+
+        self.assertEqual(self.list.call_count, 1)
+
+    def test_default_window(self):
+        """Test that the window defaults to a week from its start."""
+        google_calendar_tools.get_events("primary", "2025-01-06", max_results=2)
+
+        kwargs = self.list.call_args.kwargs
+        self.assertEqual(kwargs["timeMin"], "2025-01-06T00:00:00+00:00")
+        self.assertEqual(kwargs["timeMax"], "2025-01-13T00:00:00+00:00")
+        self.assertEqual(kwargs["maxResults"], 2)
+        self.assertEqual(self.list.call_count, 1)
+
+
+class FakeBatch:
+    """Stands in for a BatchHttpRequest, answering each call in order."""
+
+    def __init__(self, callback, executed, failing_ids):
+        self.callback = callback
+        self.executed = executed
+        self.failing_ids = failing_ids
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.executed.append(len(self.requests))
+        for request_id, request in self.requests:
+            if request.get("eventId") in self.failing_ids:
+                self.callback(request_id, None, Exception("Not Found"))
+            else:
+                self.callback(request_id, {"id": request.get("eventId", "new")}, None)
+
+
+class TestApplyEventChanges(unittest.TestCase):
+    """Unit tests for batched event creates, updates and deletes."""
+
+    def setUp(self):
+        self.executed = []
+        self.service = MagicMock()
+        events = self.service.events.return_value
+        events.insert.side_effect = lambda **kwargs: dict(kwargs, op="insert")
+        events.patch.side_effect = lambda **kwargs: dict(kwargs, op="patch")
+        events.delete.side_effect = lambda **kwargs: dict(kwargs, op="delete")
+        self.service.new_batch_http_request.side_effect = lambda callback: FakeBatch(
+            callback, self.executed, {"missing"}
+        )
+        patch(
+            "tools.google_calendar_tools.get_calendar_service",
+            return_value=self.service,
+        ).start()
+        self.addCleanup(patch.stopall)
+
+    def test_batches_respect_limit(self):
+        """Test that changes are sent in batches of at most MAX_BATCH_SIZE."""
+        start = {"dateTime": "2025-01-06T09:00:00Z"}
+        end = {"dateTime": "2025-01-06T10:00:00Z"}
+        changes = [{"type": "create", "summary": "Focus", "start": start, "end": end}] * 60
+
+        result = google_calendar_tools.apply_event_changes("primary", changes)
+
+        self.assertEqual(self.executed, [50, 10])
+        self.assertEqual(result["applied"], 60)
+
+    def test_per_item_results(self):
+        """Test that each change gets its own result, in input order."""
+        result = google_calendar_tools.apply_event_changes(
+            "primary",
+            [
+                {"type": "update", "event_id": "e1", "summary": "Renamed"},
+                {"type": "delete", "event_id": "missing"},
+                {"type": "update", "event_id": "e2"},
+                {"type": "delete", "event_id": "e3"},
+            ],
+        )
+
+        statuses = [r["status"] for r in result["results"]]
+        self.assertEqual(statuses, ["ok", "error", "error", "ok"])
+        self.assertEqual(result["results"][2]["error"], "No updates provided")
+        self.assertEqual(self.executed, [3])
+        self.assertEqual((result["applied"], result["failed"]), (2, 2))
+
+    def test_dropped_connection_fails_only_its_chunk(self):
+        """Test that a transport error marks the unanswered changes of a batch as failed."""
+        start = {"dateTime": "2025-01-06T09:00:00Z"}
+        end = {"dateTime": "2025-01-06T10:00:00Z"}
+        changes = [{"type": "create", "summary": "Focus", "start": start, "end": end}] * 60
+        batches = []
+
+        def new_batch(callback):
+            batch = FakeBatch(callback, self.executed, set())
+            if batches:
+                batch.execute = MagicMock(side_effect=http.client.RemoteDisconnected("closed"))
+            batches.append(batch)
+            return batch
+
+        self.service.new_batch_http_request.side_effect = new_batch
+
+        result = google_calendar_tools.apply_event_changes("primary", changes)
+
+        self.assertEqual((result["applied"], result["failed"]), (50, 10))
+        self.assertEqual(result["results"][59], {"index": 59, "type": "create", "event_id": None, "status": "error", "error": "closed"})
+
+
+if __name__ == "__main__":
+    unittest.main()
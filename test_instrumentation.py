@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Unit tests for tool-call tracing, against a local stub ToDoist server.
+"""
+
+import contextvars
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from tools import fetch_cache, instrumentation, task_index, todoist_client, todoist_tools, tool_memo
+
+TASKS = [
+    {"id": "1", "project_id": "p1", "content": "Plan offsite"},
+    {"id": "2", "project_id": "p1", "content": "Book venue", "parent_id": "1"},
+]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Serves a project, its tasks and empty comment lists."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/projects":
+            payload = [{"id": "p1", "name": "Work"}]
+        elif self.path.startswith("/tasks"):
+            payload = TASKS
+        else:
+            payload = []
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Unit tests for spans, counters and agent tags."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.trace_path = os.path.join(self.tmpdir, "trace.jsonl")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.env = patch.dict(
+            os.environ,
+            {
+                "TODOIST_API_TOKEN": "test-token",
+                "TODOIST_API_BASE_URL": f"http://127.0.0.1:{self.server.server_port}",
+                "TOOL_TRACE": "jsonl",
+                "TOOL_TRACE_PATH": self.trace_path,
+                # Count the requests behind every call, not memoized results
+                "TODOIST_MEMO": "false",
+            },
+        )
+        self.env.start()
+        todoist_client.reset_session()
+        todoist_tools.metadata_cache.clear()
+        task_index.invalidate_index()
+        fetch_cache.clear_fetch_cache()
+        tool_memo.clear_memo()
+        instrumentation.reset_stats()
+
+    def tearDown(self):
+        todoist_client.reset_session()
+        self.env.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def _spans(self):
+        with open(self.trace_path) as trace:
+            return [json.loads(line) for line in trace]
+
+    def _call_as(self, agent_name, func, *args):
+        def run():
+            instrumentation.tag_agent(None, {}, SimpleNamespace(agent_name=agent_name))
+            return func(*args)
+
+        return contextvars.copy_context().run(run)
+
+    def test_counters_roll_up_into_tool_span(self):
+        """Test that HTTP requests from worker threads are counted once."""
+        self._call_as("SmartPrioritizationAgent", todoist_tools.analyze_open_tasks, "Work")
+
+        spans = {span["tool"]: span for span in self._spans()}
+        top = spans["analyze_open_tasks"]
+        # /projects, one task listing and one comment request per task
+        self.assertEqual(top["http_requests"], 4)
+        self.assertGreater(top["bytes_in"], 0)
+        self.assertEqual(top["cache_misses"], 3)
+        self.assertEqual(top["agent"], "SmartPrioritizationAgent")
+        self.assertIsNone(top["parent_id"])
+        self.assertEqual(spans["get_project_by_name"]["parent_id"], top["span_id"])
+        self.assertEqual(spans["get_project_by_name"]["http_requests"], 1)
+
+    def test_stats_by_agent(self):
+        """Test that totals are kept per agent and tool."""
+        self._call_as("PrioritizationAgent", todoist_tools.get_open_tasks, "Work")
+        self._call_as("PrioritizationAgent", todoist_tools.get_open_tasks, "Work")
+
+        totals = instrumentation.get_stats_by_agent()["PrioritizationAgent"]["get_open_tasks"]
+        self.assertEqual(totals["calls"], 2)
+        self.assertEqual(totals["http_requests"], 3)
+        self.assertEqual(totals["cache_hits"], 1)
+
+    def test_disabled_by_default(self):
+        """Test that nothing is traced unless TOOL_TRACE is set."""
+        with patch.dict(os.environ, {"TOOL_TRACE": "off"}):
+            todoist_tools.get_open_tasks("Work")
+
+        self.assertFalse(os.path.exists(self.trace_path))
+
+    def test_errors_are_flagged(self):
+        """Test that a tool returning an error dict is marked as failed."""
+        with patch.object(todoist_client, "get", side_effect=todoist_tools.requests.ConnectionError("down")):
+            todoist_tools.get_task_comments("1")
+
+        self.assertTrue(self._spans()[0]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
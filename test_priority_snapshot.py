@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the precomputed priority snapshot.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+from tools import priority_snapshot, todoist_sync, todoist_tools
+
+TODAY = date.today()
+ANALYSIS = [
+    {"id": "1", "content": "Ship release", "priority": 4, "due": {"date": (TODAY - timedelta(days=2)).isoformat()}, "labels": [], "is_stale": True, "days_since_activity": 9, "created": "2025-01-01T00:00:00+00:00", "last_activity_ts": "2025-01-01T00:00:00+00:00"},
+    {"id": "2", "content": "Write notes", "priority": 1, "due": {"date": TODAY.isoformat()}, "labels": [], "is_stale": False, "days_since_activity": 1, "created": "2025-01-01T00:00:00+00:00", "last_activity_ts": "2025-01-01T00:00:00+00:00"},
+    {"id": "3", "content": "Tidy desk", "priority": 1, "due": None, "labels": [], "is_stale": False, "days_since_activity": 1, "created": "2025-01-01T00:00:00+00:00", "last_activity_ts": "2025-01-01T00:00:00+00:00"},
+]
+
+
+class TestPrioritySnapshot(unittest.TestCase):
+    """Unit tests for computing, reading and invalidating the snapshot."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.env = patch.dict(
+            os.environ,
+            {
+                "TODOIST_SNAPSHOT_PATH": os.path.join(self.tmpdir, "snapshot.json"),
+                "TODOIST_SNAPSHOT_BACKGROUND": "false",
+                "TODOIST_SNAPSHOT_DEBOUNCE": "0",
+            },
+        )
+        self.env.start()
+        self.analyze = patch.object(todoist_tools, "analyze_open_tasks", return_value=ANALYSIS)
+        self.mock_analyze = self.analyze.start()
+
+    def tearDown(self):
+        priority_snapshot.stop_background_refresh()
+        self.analyze.stop()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_snapshot_is_computed_once(self):
+        """Test that reads are served from the stored snapshot."""
+        first = priority_snapshot.get_priority_snapshot(top_k=2)
+        second = priority_snapshot.get_priority_snapshot(top_k=2)
+
+        self.mock_analyze.assert_called_once_with("Work")
+        self.assertEqual(first, second)
+        self.assertEqual([task["id"] for task in first["tasks"]], ["1", "2"])
+        self.assertEqual(first["counts"], {"open": 3, "overdue": 1, "due_today": 1, "stale": 1})
+        self.assertFalse(first["stale"])
+
+    @patch("tools.todoist_tools.todoist_client.post")
+    def test_writes_invalidate_the_snapshot(self, mock_post):
+        """Test that a ToDoist write bumps the version on the next read."""
+        mock_post.return_value = MagicMock(status_code=200, **{"json.return_value": {"id": "1"}})
+        version = priority_snapshot.get_priority_snapshot()["version"]
+
+        todoist_tools.update_task("1", priority=2)
+
+        self.assertFalse(priority_snapshot.is_fresh(priority_snapshot.load_snapshot()))
+        self.assertEqual(priority_snapshot.get_priority_snapshot()["version"], version + 1)
+        self.assertEqual(self.mock_analyze.call_count, 2)
+
+    def test_invalidation_by_another_process(self):
+        """Test that a write recorded next to the snapshot file makes it stale."""
+        priority_snapshot.get_priority_snapshot()
+        snapshot = priority_snapshot.load_snapshot()
+        # Another process records its write; this one's in-memory time is older
+        with open(priority_snapshot.get_invalidation_path(), "w") as invalidation_file:
+            invalidation_file.write(str(snapshot["computed_at_ts"] + 1))
+
+        self.assertFalse(priority_snapshot.is_fresh(snapshot, now=snapshot["computed_at_ts"] + 2))
+
+    @patch("tools.todoist_sync.todoist_client.sync")
+    def test_synced_changes_invalidate_the_snapshot(self, mock_sync):
+        """Test that a replica sync receiving task changes makes it stale."""
+        with patch.dict(os.environ, {"TODOIST_REPLICA_PATH": os.path.join(self.tmpdir, "replica.db")}):
+            mock_sync.return_value = MagicMock(**{"json.return_value": {"full_sync": True, "sync_token": "1"}})
+            todoist_sync.sync()
+            priority_snapshot.get_priority_snapshot()
+
+            mock_sync.return_value.json.return_value = {"full_sync": False, "sync_token": "2", "projects": [{"id": "p9", "name": "New"}]}
+            todoist_sync.sync()
+            self.assertTrue(priority_snapshot.is_fresh(priority_snapshot.load_snapshot()))
+
+            mock_sync.return_value.json.return_value = {"full_sync": False, "sync_token": "3", "items": [{"id": "1", "content": "Ship release", "project_id": "p1"}]}
+            todoist_sync.sync()
+            self.assertFalse(priority_snapshot.is_fresh(priority_snapshot.load_snapshot()))
+
+    @patch("tools.todoist_tools.todoist_client.post")
+    @patch("tools.todoist_sync.todoist_client.sync")
+    def test_one_recompute_per_write_with_the_replica(self, mock_sync, mock_post):
+        """Test that syncing back our own write does not make the new snapshot stale."""
+        env = {
+            "TODOIST_USE_SYNC": "true",
+            "TODOIST_SYNC_MIN_INTERVAL": "3600",
+            "TODOIST_REPLICA_PATH": os.path.join(self.tmpdir, "replica.db"),
+        }
+        mock_post.return_value = MagicMock(status_code=200, **{"json.return_value": {"id": "1"}})
+        mock_sync.return_value = MagicMock(**{"json.return_value": {"full_sync": True, "sync_token": "1"}})
+
+        def analyze(project_name):
+            # The replica read path syncs first, as the memoized tools do
+            todoist_sync.ensure_synced()
+            return ANALYSIS
+
+        self.mock_analyze.side_effect = analyze
+        with patch.dict(os.environ, env):
+            todoist_sync.mark_stale()
+            priority_snapshot.get_priority_snapshot()
+            todoist_tools.update_task("1", priority=2)
+            mock_sync.return_value.json.return_value = {"full_sync": False, "sync_token": "2", "items": [{"id": "1", "project_id": "p1"}]}
+
+            first = priority_snapshot.get_priority_snapshot()
+            second = priority_snapshot.get_priority_snapshot()
+
+        self.assertEqual((first["version"], second["version"]), (2, 2))
+        self.assertEqual(self.mock_analyze.call_count, 2)
+
+    def test_snapshot_expires_at_the_end_of_the_day(self):
+        """Test that yesterday's snapshot is not fresh."""
+        priority_snapshot.get_priority_snapshot()
+        snapshot = priority_snapshot.load_snapshot()
+
+        self.assertTrue(priority_snapshot.is_fresh(snapshot))
+        self.assertFalse(priority_snapshot.is_fresh(snapshot, now=time.time() + 86400))
+
+    def test_failed_refresh_returns_the_old_snapshot(self):
+        """Test that an API failure falls back to the stored snapshot."""
+        priority_snapshot.get_priority_snapshot()
+        priority_snapshot.invalidate()
+        self.mock_analyze.return_value = {"error": "API request failed"}
+
+        result = priority_snapshot.get_priority_snapshot()
+
+        self.assertTrue(result["stale"])
+        self.assertEqual(result["version"], 1)
+
+    def test_background_refresh_after_a_write(self):
+        """Test that the background thread recomputes after an invalidation."""
+        with patch.dict(os.environ, {"TODOIST_SNAPSHOT_BACKGROUND": "true"}):
+            priority_snapshot.get_priority_snapshot()
+            priority_snapshot.invalidate()
+
+            deadline = time.time() + 5
+            while priority_snapshot.load_snapshot()["version"] < 2 and time.time() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(priority_snapshot.load_snapshot()["version"], 2)
+        self.assertEqual(self.mock_analyze.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
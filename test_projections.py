@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit tests for compact, projected tool results.
+"""
+
+import asyncio
+import json
+import unittest
+
+from tools import projections
+from tools.todoist_tools import build_task_details, format_task
+
+RAW_TASK = {
+    "id": "1",
+    "content": "Plan offsite",
+    "project_id": "p1",
+    "priority": 4,
+    "description": "x" * 500,
+    "due": {"date": "2025-01-10", "string": "Jan 10", "is_recurring": False},
+    "url": "https://app.todoist.com/app/task/1",
+    "created": "2025-01-01T00:00:00Z",
+    "labels": [],
+}
+COMMENTS = [
+    {"id": "c1", "content": "Budget approved", "created": "2025-01-02T00:00:00Z", "attachment": None},
+    {"id": "c2", "content": "Venue shortlisted", "created": "2025-01-04T00:00:00Z", "attachment": None},
+]
+
+
+class TestProjections(unittest.TestCase):
+    """Unit tests for field projections and encodings."""
+
+    def test_compact_task_details(self):
+        """Test that details are reduced to compact fields and summaries."""
+        details = build_task_details(RAW_TASK, COMMENTS, [{"id": "2", "content": "Book venue", "priority": 1}])
+
+        projected = projections.project_result(details, "compact")
+
+        self.assertEqual(projected["due"], "2025-01-10")
+        self.assertTrue(projected["description_truncated"])
+        self.assertEqual(len(projected["description"]), projections.DESCRIPTION_LIMIT + 1)
+        self.assertEqual(projected["comment_count"], 2)
+        self.assertEqual(projected["latest_comment"]["content"], "Venue shortlisted")
+        self.assertEqual(projected["subtasks"], [{"id": "2", "content": "Book venue"}])
+        self.assertNotIn("url", projected)
+        self.assertNotIn("labels", projected)
+        self.assertLess(len(json.dumps(projected)), len(json.dumps(details)) / 2)
+
+    def test_zero_values_are_kept(self):
+        """Test that 0 is projected while empty values are dropped."""
+        record = dict(RAW_TASK, days_since_activity=0, is_stale=False)
+
+        projected = projections.project_task(record, projections.PROJECTIONS["compact"])
+
+        self.assertEqual(projected["days_since_activity"], 0)
+        self.assertNotIn("is_stale", projected)
+        self.assertNotIn("labels", projected)
+
+    def test_tabular_task_list(self):
+        """Test that task lists become one header and one row per task."""
+        tasks = [format_task(RAW_TASK), format_task(dict(RAW_TASK, id="2", due=None))]
+
+        table = projections.project_result(tasks, "minimal", tabular=True)
+
+        self.assertEqual(table["columns"], ["id", "content", "priority", "due"])
+        self.assertEqual(table["rows"][1], ["2", "Plan offsite", 4, None])
+
+    def test_errors_pass_through(self):
+        """Test that error dicts are not projected."""
+        error = {"error": "API request failed"}
+
+        self.assertIs(projections.project_result(error, "compact"), error)
+
+    def test_with_projection_wraps_sync_and_async_tools(self):
+        """Test that wrapped tools keep their name and project their results."""
+
+        def get_open_tasks(project_name=None):
+            """Fetches tasks."""
+            return [format_task(RAW_TASK)]
+
+        async def get_task_details(task_id):
+            """Fetches details."""
+            return build_task_details(RAW_TASK, COMMENTS, [])
+
+        sync_tool = projections.with_projection(get_open_tasks, "minimal")
+        async_tool = projections.with_projection(get_task_details, "compact")
+
+        self.assertEqual(sync_tool.__name__, "get_open_tasks")
+        self.assertEqual(sync_tool()[0], {"id": "1", "content": "Plan offsite", "priority": 4, "due": "2025-01-10"})
+        self.assertEqual(asyncio.run(async_tool("1"))["comment_count"], 2)
+        self.assertIn("get_task_description", async_tool.__doc__)
+
+    def test_unknown_projection(self):
+        """Test that a typo in a projection name fails at registration."""
+        with self.assertRaises(ValueError):
+            projections.with_projection(format_task, "tiny")
+
+
+if __name__ == "__main__":
+    unittest.main()
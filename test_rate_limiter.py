@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for client-side rate limiting and retries of ToDoist requests.
+"""
+
+import json
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from tools import rate_limiter, todoist_client
+
+
+class _ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers each request with the next (status, headers) in `script`."""
+
+    protocol_version = "HTTP/1.1"
+    script = []
+    request_ids = []
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        type(self).request_ids.append(self.headers.get("X-Request-Id"))
+        status, headers = type(self).script.pop(0) if type(self).script else (200, {})
+        body = json.dumps({"status": status}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Unit tests for the token bucket."""
+
+    def test_burst_then_spaced_out(self):
+        """Test that callers beyond the burst wait in arrival order."""
+        with patch("tools.rate_limiter.time.monotonic", return_value=100):
+            bucket = rate_limiter.TokenBucket(rate=10, capacity=2)
+            waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1)
+        self.assertAlmostEqual(waits[3], 0.2)
+
+    def test_pause_delays_every_caller(self):
+        """Test that a pause applies even when tokens are available."""
+        with patch("tools.rate_limiter.time.monotonic", return_value=100):
+            bucket = rate_limiter.TokenBucket(rate=10, capacity=5)
+            bucket.pause(3)
+            self.assertAlmostEqual(bucket.reserve(), 3)
+
+    def test_parse_retry_after(self):
+        """Test that Retry-After is read as seconds or an HTTP date."""
+        self.assertEqual(rate_limiter.parse_retry_after("7"), 7)
+        self.assertEqual(
+            rate_limiter.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0
+        )
+        self.assertIsNone(rate_limiter.parse_retry_after("soon"))
+        self.assertIsNone(rate_limiter.parse_retry_after(None))
+
+
+class TestClientRetries(unittest.TestCase):
+    """Unit tests for which responses the client retries."""
+
+    def setUp(self):
+        _ScriptedHandler.script = []
+        _ScriptedHandler.request_ids = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ScriptedHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.env = patch.dict(
+            os.environ,
+            {"TODOIST_API_TOKEN": "test-token", "TODOIST_API_BASE_URL": base_url},
+        )
+        self.env.start()
+        todoist_client.reset_session()
+        self.sleep = patch("tools.todoist_client.time.sleep").start()
+        self.addCleanup(patch.stopall)
+
+    def tearDown(self):
+        todoist_client.reset_session()
+        self.env.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_server_error_is_retried(self):
+        """Test that a 503 is retried with backoff until it succeeds."""
+        _ScriptedHandler.script = [(503, {}), (503, {})]
+
+        response = todoist_client.get("/tasks")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertEqual(todoist_client.get_connection_stats()["retries"], 2)
+
+    def test_client_error_is_not_retried(self):
+        """Test that a 404 is returned at once instead of being retried."""
+        _ScriptedHandler.script = [(404, {})]
+
+        response = todoist_client.get("/tasks/missing")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(_ScriptedHandler.request_ids), 1)
+        self.assertEqual(todoist_client.get_connection_stats()["retries"], 0)
+
+    def test_rate_limited_pauses_bucket(self):
+        """Test that a 429 pauses the shared bucket for Retry-After seconds."""
+        _ScriptedHandler.script = [(429, {"Retry-After": "2"})]
+
+        with patch.object(todoist_client._bucket, "pause") as pause, patch.object(
+            todoist_client._bucket, "acquire"
+        ), patch("builtins.print") as log:
+            response = todoist_client.get("/tasks")
+
+        self.assertEqual(response.status_code, 200)
+        pause.assert_called_once_with(2)
+        log.assert_called_once_with("Request failed: HTTP 429. Retrying in 2.0 seconds...")
+        self.assertEqual(todoist_client.get_connection_stats()["rate_limited"], 1)
+
+    def test_retries_are_bounded(self):
+        """Test that the last retryable response is returned to the caller."""
+        _ScriptedHandler.script = [(502, {})] * 10
+
+        with patch.dict(os.environ, {"TODOIST_MAX_RETRIES": "2"}):
+            response = todoist_client.get("/tasks")
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(len(_ScriptedHandler.request_ids), 3)
+
+    def test_write_retries_reuse_request_id(self):
+        """Test that a retried write keeps its X-Request-Id."""
+        _ScriptedHandler.script = [(500, {})]
+
+        todoist_client.post("/tasks", json={"content": "Task"})
+
+        first, second = _ScriptedHandler.request_ids
+        self.assertIsNotNone(first)
+        self.assertEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
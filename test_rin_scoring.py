@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for deterministic RIN scoring and the rank_tasks tool.
+"""
+
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from tools import rin_scoring, todoist_tools
+
+NOW = datetime(2025, 1, 6, 12, tzinfo=timezone.utc)
+
+
+def _task(task_id, **fields):
+    task = {"id": task_id, "content": f"Task {task_id}", "priority": 1, "labels": []}
+    task.update(fields)
+    return task
+
+
+class TestScoreTasks(unittest.TestCase):
+    """Unit tests for the individual RIN components."""
+
+    def test_components(self):
+        """Test that each component is normalised and weighted."""
+        tasks = [
+            _task("1", priority=4, due={"date": "2025-01-05"}, days_since_activity=28),
+            _task("2", due={"date": "2025-01-13"}, days_since_activity=0),
+        ]
+
+        first, second = rin_scoring.score_tasks(tasks, NOW, label_weights={})
+
+        self.assertEqual(
+            first["breakdown"],
+            {"recency": 0.2, "urgency": 0.3, "priority": 0.3, "labels": 0.0, "structure": 0.05},
+        )
+        self.assertEqual(first["score"], 0.85)
+        self.assertEqual(second["breakdown"]["urgency"], 0.15)
+        self.assertEqual(second["breakdown"]["recency"], 0.0)
+
+    def test_structure_prefers_next_actions(self):
+        """Test that a parent's first subtask outranks the parent itself."""
+        child = _task("2", parent_id="1")
+        tasks = [_task("1", subtasks=[child, _task("3")]), child, _task("3", parent_id="1")]
+
+        self.assertEqual(rin_scoring.structure_scores(tasks), [0.0, 1.0, 0.5])
+
+    def test_weights_from_environment(self):
+        """Test that weights and label weights can be configured."""
+        with patch.dict(
+            os.environ,
+            {"TODOIST_RIN_WEIGHTS": "labels=1", "TODOIST_LABEL_WEIGHTS": "Blocker=2,someday=-1"},
+        ):
+            scored = rin_scoring.score_tasks(
+                [_task("1", labels=["blocker"]), _task("2", labels=["someday"])], NOW
+            )
+
+        self.assertEqual(scored[0]["breakdown"]["labels"], 1.0)
+        self.assertEqual(scored[1]["breakdown"]["labels"], -1.0)
+
+
+class TestRankTasks(unittest.TestCase):
+    """Unit tests for ranking and the rank_tasks tool."""
+
+    def test_rank_is_sorted_and_deterministic(self):
+        """Test that ties are broken by task ID and only top_k is returned."""
+        tasks = [_task("b"), _task("a"), _task("c", priority=4)]
+
+        ranked = rin_scoring.rank(tasks, top_k=2, now=NOW)
+
+        self.assertEqual([task["id"] for task in ranked], ["c", "a"])
+        self.assertNotIn("comments", ranked[0])
+        self.assertIn("breakdown", ranked[0])
+
+    @patch("tools.todoist_tools.analyze_open_tasks")
+    def test_rank_tasks_tool(self, mock_analyze):
+        """Test that the tool ranks the analysis of the requested project."""
+        mock_analyze.return_value = [
+            _task("1", comments=[{"content": "x"}]),
+            _task("2", priority=3),
+        ]
+
+        ranked = todoist_tools.rank_tasks("Home", top_k=1)
+
+        mock_analyze.assert_called_once_with("Home")
+        self.assertEqual([task["id"] for task in ranked], ["2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
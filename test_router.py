@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CoordinatorAgent's fast-path router.
+"""
+
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from google.genai import types
+
+from agents import router
+
+SUB_AGENTS = ["SmartPrioritizationAgent", "ProjectManagerAgent", "MorningBriefingAgent", "GoogleCalendarAgent"]
+
+
+def _context(text):
+    agent = SimpleNamespace(sub_agents=[SimpleNamespace(name=name) for name in SUB_AGENTS])
+    return SimpleNamespace(
+        user_content=types.Content(role="user", parts=[types.Part(text=text)]),
+        get_invocation_context=lambda: SimpleNamespace(agent=agent),
+    )
+
+
+def _request(*contents):
+    return SimpleNamespace(contents=list(contents))
+
+
+class TestRoute(unittest.TestCase):
+    """Unit tests for the rule and nearest-neighbour classifiers."""
+
+    def test_routing_rules(self):
+        """Test the coordinator's routing rules as examples."""
+        cases = {
+            "morning briefing": "MorningBriefingAgent",
+            "What should I do today?": "MorningBriefingAgent",
+            "prioritize my tasks": "MorningBriefingAgent",
+            "help me with prioritization": "MorningBriefingAgent",
+            "groom my backlog": "SmartPrioritizationAgent",
+            "let's do some smart prioritization": "SmartPrioritizationAgent",
+            "plan my product launch": "ProjectManagerAgent",
+            "schedule a meeting with John tomorrow at 2pm": "GoogleCalendarAgent",
+            "time-block my tasks this week": "GoogleCalendarAgent",
+        }
+        for text, agent in cases.items():
+            self.assertEqual(router.route(text, SUB_AGENTS)[:3:2], (agent, "rules"), text)
+
+    def test_nearest_example(self):
+        """Test that paraphrases without keywords match the nearest example."""
+        self.assertEqual(router.route("am I free tomorrow afternoon?")[::2], ("GoogleCalendarAgent", "examples"))
+        self.assertEqual(router.route("help me clean up my todo list")[::2], ("SmartPrioritizationAgent", "examples"))
+
+    def test_low_confidence_is_left_to_the_model(self):
+        """Test that unclear or conflicting requests are not routed."""
+        self.assertIsNone(router.route("tell me a joke"))
+        self.assertIsNone(router.route("create a task to buy milk"))
+        # Equal-weight rules for two agents leave no margin
+        self.assertIsNone(router.match_rules("plan the offsite meetings"))
+        # A day or week plan is not a project plan
+        self.assertIsNone(router.match_rules("plan my day"))
+        self.assertIsNone(router.match_rules("plan my week"))
+        self.assertEqual(router.match_rules("plan my week around my meetings")[0], "GoogleCalendarAgent")
+
+
+class TestFastRoute(unittest.TestCase):
+    """Unit tests for the before_model_callback."""
+
+    def test_transfers_without_the_model(self):
+        """Test that a confident match answers with a transfer call."""
+        context = _context("groom my backlog")
+
+        response = router.fast_route(context, _request(context.user_content))
+
+        call = response.content.parts[0].function_call
+        self.assertEqual((call.name, call.args), ("transfer_to_agent", {"agent_name": "SmartPrioritizationAgent"}))
+
+    def test_handed_back_requests_go_to_the_model(self):
+        """Test that a request returned by a sub-agent is not routed again."""
+        context = _context("groom my backlog")
+        handed_back = types.Content(role="user", parts=[types.Part(text="For context: [SmartPrioritizationAgent] said ...")])
+
+        self.assertIsNone(router.fast_route(context, _request(context.user_content, handed_back)))
+
+    def test_unknown_agents_and_disabled(self):
+        """Test that only sub-agents are chosen and the fast path can be turned off."""
+        context = _context("groom my backlog")
+
+        self.assertIsNone(router.route("groom my backlog", ["GoogleCalendarAgent"]))
+        with patch.dict(os.environ, {"COORDINATOR_FAST_ROUTE": "false"}):
+            self.assertIsNone(router.fast_route(context, _request(context.user_content)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Unit tests for packing ToDoist tasks into free calendar time.
+"""
+
+import time as time_module
+import unittest
+from datetime import datetime, time, timezone
+from unittest.mock import patch
+
+from tools import scheduler
+
+UTC = timezone.utc
+
+
+def _at(hour, minute=0, day=6):
+    return datetime(2025, 1, day, hour, minute, tzinfo=UTC)
+
+
+class TestFreeSlots(unittest.TestCase):
+    """Unit tests for the interval maths."""
+
+    def test_busy_time_is_subtracted(self):
+        """Test that overlapping busy periods leave the right gaps."""
+        working = scheduler.working_hours(_at(9), _at(17, day=7), time(9), time(17))
+        busy = [(_at(10), _at(11)), (_at(10, 30), _at(12)), (_at(16, 50), _at(18))]
+
+        slots = scheduler.free_slots(busy, working)
+
+        self.assertEqual(
+            slots,
+            [(_at(9), _at(10)), (_at(12), _at(16, 50)), (_at(9, day=7), _at(17, day=7))],
+        )
+
+    def test_short_gaps_are_dropped(self):
+        """Test that gaps shorter than the minimum are not offered."""
+        working = [(_at(9), _at(10))]
+        busy = [(_at(9, 10), _at(9, 55))]
+
+        self.assertEqual(scheduler.free_slots(busy, working), [])
+
+
+class TestPlaceTasks(unittest.TestCase):
+    """Unit tests for greedy task placement."""
+
+    def test_priority_then_due_then_effort(self):
+        """Test that the most important task gets the earliest slot."""
+        tasks = [
+            {"id": "low", "priority": 1},
+            {"id": "due-later", "priority": 4, "due": {"date": "2025-01-10"}},
+            {"id": "due-soon", "priority": 4, "due": {"date": "2025-01-07"}},
+            {"id": "long", "priority": 2, "duration": {"amount": 90, "unit": "minute"}},
+        ]
+        slots = [(_at(9), _at(10)), (_at(13), _at(15))]
+
+        scheduled, unscheduled = scheduler.place_tasks(tasks, slots, 480, UTC)
+
+        placed = {p["task_id"]: p["start"] for p in scheduled}
+        self.assertEqual(placed["due-soon"], _at(9).isoformat())
+        self.assertEqual(placed["due-later"], _at(9, 30).isoformat())
+        self.assertEqual(placed["long"], _at(13).isoformat())
+        self.assertEqual(placed["low"], _at(14, 30).isoformat())
+        self.assertEqual(unscheduled, [])
+
+    def test_tasks_that_do_not_fit(self):
+        """Test that tasks without a big enough slot are reported."""
+        tasks = [{"id": "1", "duration": {"amount": 1, "unit": "day"}}]
+
+        scheduled, unscheduled = scheduler.place_tasks(tasks, [(_at(9), _at(12))], 480, UTC)
+
+        self.assertEqual(scheduled, [])
+        self.assertEqual(unscheduled[0]["minutes"], 480)
+
+    def test_hundreds_of_tasks_run_fast(self):
+        """Test that placing 300 tasks around 100 meetings takes milliseconds."""
+        tasks = [{"id": str(i), "priority": i % 4 + 1} for i in range(300)]
+        working = scheduler.working_hours(_at(0, day=1), _at(0, day=28), time(9), time(17))
+        busy = [(_at(h, 0, d), _at(h, 30, d)) for d in range(1, 26) for h in range(9, 17, 2)]
+        started = time_module.perf_counter()
+
+        slots = scheduler.free_slots(busy, working)
+        scheduled, _ = scheduler.place_tasks(tasks, slots, 480, UTC)
+
+        self.assertLess(time_module.perf_counter() - started, 0.5)
+        self.assertEqual(len(scheduled), 300)
+
+
+class TestScheduleTasksIntoCalendar(unittest.TestCase):
+    """Unit tests for the schedule_tasks_into_calendar tool."""
+
+    def setUp(self):
+        patch(
+            "tools.scheduler.todoist_tools.get_project_by_name",
+            return_value={"id": "p1", "name": "Work"},
+        ).start()
+        patch(
+            "tools.scheduler.todoist_tools.list_project_tasks",
+            return_value=[
+                {"id": "1", "content": "Launch", "priority": 4},
+                {"id": "2", "content": "Draft copy", "parent_id": "1", "priority": 3},
+            ],
+        ).start()
+        self.busy = patch(
+            "tools.scheduler.google_calendar_tools.get_busy_intervals",
+            return_value=[("2025-01-06T09:00:00Z", "2025-01-06T12:00:00Z")],
+        ).start()
+        self.apply = patch(
+            "tools.scheduler.google_calendar_tools.apply_event_changes",
+            return_value={"applied": 1, "failed": 0, "results": []},
+        ).start()
+        self.addCleanup(patch.stopall)
+
+    def test_schedules_leaf_tasks_around_busy_time(self):
+        """Test that parents are skipped and busy time is avoided."""
+        result = scheduler.schedule_tasks_into_calendar(start_date="2025-01-06", days=1)
+
+        self.assertEqual([p["task_id"] for p in result["scheduled"]], ["2"])
+        self.assertEqual(result["scheduled"][0]["start"], "2025-01-06T12:00:00+00:00")
+        self.assertEqual(result["free_minutes"], 300)
+        self.busy.assert_called_once()
+        self.apply.assert_not_called()
+
+    def test_create_events(self):
+        """Test that approved plans are written as one batch of events."""
+        result = scheduler.schedule_tasks_into_calendar(
+            start_date="2025-01-06", days=1, create_events=True
+        )
+
+        changes = self.apply.call_args.args[1]
+        self.assertEqual(changes[0]["summary"], "Draft copy")
+        self.assertEqual(result["events"]["applied"], 1)
+
+    def test_invalid_arguments_return_errors(self):
+        """Test that bad model input is reported instead of raised."""
+        bad_arguments = [
+            {"timezone_name": "Mars/Olympus"},
+            {"workday_start": "9am"},
+            {"workday_start": "17:00", "workday_end": "09:00"},
+            {"start_date": "next monday"},
+            {"days": 0},
+        ]
+        for arguments in bad_arguments:
+            result = scheduler.schedule_tasks_into_calendar(**arguments)
+            self.assertIn("error", result, arguments)
+        self.busy.assert_not_called()
+
+    def test_calendar_errors_return_errors(self):
+        """Test that a failed free/busy lookup is reported as an error dict."""
+        self.busy.side_effect = ValueError("Free/busy lookup failed for primary: notFound")
+
+        result = scheduler.schedule_tasks_into_calendar(start_date="2025-01-06", days=1)
+
+        self.assertIn("notFound", result["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Todoist filter expressions and the query_tasks tool.
+"""
+
+import unittest
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+from tools import task_filter, todoist_tools
+
+TODAY = date(2025, 1, 6)
+TASKS = [
+    {"id": "1", "project_id": "p1", "content": "Ship release", "priority": 4, "due": {"date": "2025-01-03"}, "labels": ["waiting"]},
+    {"id": "2", "project_id": "p1", "content": "Write notes", "priority": 1, "due": {"date": "2025-01-06"}, "labels": []},
+    {"id": "3", "project_id": "p1", "content": "Review release notes", "priority": 3, "parent_id": "2", "due": None, "labels": []},
+    {"id": "4", "project_id": "p2", "content": "Groceries", "priority": 4, "due": {"date": "2025-01-10", "is_recurring": True}, "labels": ["Errand"]},
+]
+PROJECTS = {"work": "p1", "home": "p2", "r&d": "p3", "garden": "p4"}
+PARENTS = {"p1": None, "p2": None, "p3": "p1", "p4": "p2"}
+
+
+def _matching(query, tasks=TASKS, now=None):
+    predicate = task_filter.compile_filter(query, PROJECTS, TODAY, PARENTS, now)
+    return [task["id"] for task in tasks if predicate(task)]
+
+
+class TestCompileFilter(unittest.TestCase):
+    """Unit tests for the supported filter terms and operators."""
+
+    def test_terms(self):
+        """Test each kind of term on its own."""
+        self.assertEqual(_matching("p1"), ["1", "4"])
+        self.assertEqual(_matching("overdue"), ["1"])
+        self.assertEqual(_matching("today"), ["2"])
+        self.assertEqual(_matching("no date"), ["3"])
+        self.assertEqual(_matching("7 days"), ["2", "4"])
+        self.assertEqual(_matching("4 days"), ["2"])
+        self.assertEqual(_matching("due before: 2025-01-06"), ["1"])
+        self.assertEqual(_matching("due after: today"), ["4"])
+        self.assertEqual(_matching("recurring"), ["4"])
+        self.assertEqual(_matching("@errand"), ["4"])
+        self.assertEqual(_matching("no labels"), ["2", "3"])
+        self.assertEqual(_matching("#Home"), ["4"])
+        self.assertEqual(_matching("subtask"), ["3"])
+        self.assertEqual(_matching("search: release"), ["1", "3"])
+
+    def test_due_times_and_sub_projects(self):
+        """Test due times earlier today, ## sub-projects and escaped names."""
+        tasks = [
+            {"id": "5", "project_id": "p3", "due": {"date": "2025-01-06", "datetime": "2025-01-06T09:00:00"}},
+            {"id": "6", "project_id": "p4", "due": {"date": "2025-01-06", "datetime": "2025-01-06T15:00:00"}},
+        ]
+        now = datetime(2025, 1, 6, 12, 0)
+
+        self.assertEqual(_matching("overdue", tasks, now), ["5"])
+        self.assertEqual(_matching("today", tasks, now), ["5", "6"])
+        self.assertEqual(_matching("##Work", TASKS + tasks), ["1", "2", "3", "5"])
+        self.assertEqual(_matching("#Work", TASKS + tasks), ["1", "2", "3"])
+        self.assertEqual(_matching(f"#{task_filter.escape('R&D')} | #Garden", tasks), ["5", "6"])
+        with self.assertRaises(ValueError):
+            task_filter.compile_filter("##Work", PROJECTS, TODAY)
+
+    def test_operators(self):
+        """Test and, or, not and grouping."""
+        self.assertEqual(_matching("(today | overdue) & p1"), ["1"])
+        self.assertEqual(_matching("#Work & !subtask"), ["1", "2"])
+        self.assertEqual(_matching("p1 & !@waiting"), ["4"])
+
+    def test_unsupported_and_malformed(self):
+        """Test that anything outside the subset is rejected."""
+        # The REST API rejects comma-separated filters too
+        for query in ("assigned to: me", "(p1 | p2", "p1 &", "due before: next friday", "#Nope", "today, recurring"):
+            with self.assertRaises(ValueError, msg=query):
+                task_filter.compile_filter(query, PROJECTS, TODAY)
+
+
+class TestFilterIndex(unittest.TestCase):
+    """Unit tests for evaluating filters over the indexed replica tasks."""
+
+    def test_select_matches_compile_filter(self):
+        """Test that narrowing by the index does not change the result."""
+        index = task_filter.FilterIndex(TASKS)
+        queries = [
+            "p1", "overdue", "today", "no date", "7 days", "due before: 2025-01-06", "due after: today",
+            "recurring", "@errand", "#Home", "subtask", "(today | overdue) & p1", "#Work & !subtask",
+            "p1 & !@waiting", "search: release | p4", "##Work & p2",
+        ]
+        for query in queries:
+            selected = task_filter.select(query, index, PROJECTS, TODAY, PARENTS)
+            self.assertEqual([task["id"] for task in selected], _matching(query), query)
+
+    def test_due_ranges_are_looked_up(self):
+        """Test that due ranges come from the sorted due dates."""
+        index = task_filter.FilterIndex(TASKS)
+
+        self.assertEqual(index.due_between(date(2025, 1, 4), date(2025, 1, 10)), {"2", "4"})
+        self.assertEqual(index.due_between(date.min, TODAY), {"1", "2"})
+        self.assertEqual(index.due_between(TODAY, date.max), {"2", "4"})
+
+
+class TestQueryTasks(unittest.TestCase):
+    """Unit tests for the query_tasks tool."""
+
+    @patch("tools.todoist_tools._use_replica", return_value=False)
+    @patch("tools.todoist_tools.todoist_client.get")
+    def test_filter_is_pushed_to_api(self, mock_get, _):
+        """Test that the filter is sent to the API, scoped to the project."""
+        mock_get.return_value = MagicMock(status_code=200, **{"json.return_value": TASKS[:1]})
+
+        tasks = todoist_tools.query_tasks("overdue & p1", project_name="Work")
+
+        mock_get.assert_called_once_with("/tasks", params={"filter": "#Work & (overdue & p1)"})
+        self.assertEqual([task["id"] for task in tasks], ["1"])
+
+        todoist_tools.query_tasks("p1", project_name="R&D (new)")
+        mock_get.assert_called_with("/tasks", params={"filter": "#R\\&D \\(new\\) & (p1)"})
+
+    @patch("tools.todoist_tools._use_replica", return_value=True)
+    @patch("tools.todoist_tools.todoist_sync.get_projects", return_value=[{"id": "p1", "name": "Work"}])
+    @patch("tools.todoist_tools.todoist_sync.get_filter_index", return_value=task_filter.FilterIndex(TASKS))
+    @patch("tools.todoist_tools.todoist_client.get")
+    def test_replica_is_queried_locally(self, mock_get, *_):
+        """Test that supported filters are evaluated without a request."""
+        tasks = todoist_tools.query_tasks("p1 | p2", project_name="Work")
+
+        mock_get.assert_not_called()
+        self.assertEqual([task["id"] for task in tasks], ["1", "3"])
+
+    @patch("tools.todoist_tools._use_replica", return_value=True)
+    @patch("tools.todoist_tools.todoist_sync.get_projects", return_value=[])
+    @patch("tools.todoist_tools.todoist_sync.get_filter_index", return_value=task_filter.FilterIndex([]))
+    @patch("tools.todoist_tools.todoist_client.get")
+    def test_unsupported_filter_falls_back_to_api(self, mock_get, *_):
+        """Test that filters outside the local subset still work."""
+        mock_get.return_value = MagicMock(status_code=200, **{"json.return_value": []})
+
+        todoist_tools.query_tasks("assigned to: me")
+
+        mock_get.assert_called_once_with("/tasks", params={"filter": "assigned to: me"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the async ToDoist tools.
+"""
+
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from tools import fetch_cache, task_index, todoist_client, tool_memo
+from tools import todoist_async_tools
+
+
+class TestTodoistAsyncTools(unittest.TestCase):
+    """Unit tests for concurrency and result shapes of the async tools."""
+
+    def setUp(self):
+        self.in_flight = 0
+        self.parent = {"id": "1", "project_id": "p1", "content": "Parent", "created": "2024-01-01"}
+        self.max_in_flight = 0
+        self.env = patch.dict(os.environ, {"TODOIST_API_TOKEN": "test-token"})
+        self.env.start()
+        task_index.invalidate_index()
+        fetch_cache.clear_fetch_cache()
+        tool_memo.clear_memo()
+
+    def tearDown(self):
+        self.env.stop()
+
+    async def _handler(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        path = request.url.path
+        if path.endswith("/comments"):
+            return httpx.Response(200, json=[{"id": "c1", "created": "2024-01-02"}])
+        if path.endswith("/tasks/1"):
+            return httpx.Response(200, json=self.parent)
+        return httpx.Response(
+            200, json=[self.parent, {"id": "2", "parent_id": "1"}, {"id": "3"}]
+        )
+
+    async def _run(self, coro_factory, concurrency):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self._handler))
+        todoist_client._async_clients[asyncio.get_running_loop()] = (
+            client,
+            asyncio.Semaphore(concurrency),
+        )
+        try:
+            return await coro_factory()
+        finally:
+            await todoist_client.close_async_client()
+
+    def test_concurrency_is_bounded_by_semaphore(self):
+        """Test that fan-out never exceeds the configured concurrency."""
+
+        async def fan_out():
+            return await asyncio.gather(
+                *(todoist_async_tools.get_task_comments(str(i)) for i in range(10))
+            )
+
+        results = asyncio.run(self._run(fan_out, concurrency=3))
+        self.assertEqual(len(results), 10)
+        self.assertLessEqual(self.max_in_flight, 3)
+        self.assertGreater(self.max_in_flight, 1)
+
+    def test_get_task_details_combines_results(self):
+        """Test that task details include comments and filtered subtasks."""
+        details = asyncio.run(
+            self._run(lambda: todoist_async_tools.get_task_details("1"), concurrency=3)
+        )
+        self.assertEqual(details["content"], "Parent")
+        self.assertEqual(details["comment_count"], 1)
+        self.assertEqual([t["id"] for t in details["subtasks"]], ["2"])
+
+    def test_get_last_activity_ts_uses_latest_comment(self):
+        """Test that the latest comment wins over task creation."""
+        ts = asyncio.run(
+            self._run(lambda: todoist_async_tools.get_last_activity_ts("1"), concurrency=3)
+        )
+        self.assertEqual(ts, "2024-01-02")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pooled ToDoist HTTP client.
+"""
+
+import json
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from tools import todoist_client
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Minimal keep-alive handler that always returns an empty JSON list."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps([]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTodoistClient(unittest.TestCase):
+    """Unit tests for connection pooling and reuse counters."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.env = patch.dict(
+            os.environ,
+            {"TODOIST_API_TOKEN": "test-token", "TODOIST_API_BASE_URL": base_url},
+        )
+        self.env.start()
+        todoist_client.reset_session()
+
+    def tearDown(self):
+        todoist_client.reset_session()
+        self.env.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_sequential_requests_reuse_one_connection(self):
+        """Test that sequential calls share a single keep-alive connection."""
+        for _ in range(5):
+            response = todoist_client.get("/tasks")
+            self.assertEqual(response.status_code, 200)
+
+        stats = todoist_client.get_connection_stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 4)
+
+    def test_requests_send_auth_header_and_timeout(self):
+        """Test that every request carries the token and a timeout."""
+        with patch.object(todoist_client.get_session(), "request") as mock_request:
+            todoist_client.get("/projects")
+
+        _, kwargs = mock_request.call_args
+        self.assertEqual(kwargs["headers"]["Authorization"], "Bearer test-token")
+        self.assertEqual(kwargs["timeout"], todoist_client.get_timeout())
+
+
+if __name__ == "__main__":
+    unittest.main()
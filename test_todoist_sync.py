@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the incremental Sync API replica, against a local stub server
+that replays recorded sync responses.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs
+
+from tools import fetch_cache, task_index, todoist_client, todoist_sync, todoist_tools, tool_memo
+from tools import todoist_async_tools
+
+FULL_SYNC = {
+    "sync_token": "t1",
+    "full_sync": True,
+    "projects": [{"id": "p1", "name": "Work"}, {"id": "p2", "name": "Home"}],
+    "items": [
+        {"id": "1", "project_id": "p1", "content": "Plan offsite", "child_order": 1, "added_at": "2024-01-01T00:00:00Z"},
+        {"id": "2", "project_id": "p1", "parent_id": "1", "content": "Book venue", "child_order": 1},
+        {"id": "3", "project_id": "p1", "content": "Old task", "child_order": 2},
+        {"id": "4", "project_id": "p2", "content": "Groceries", "child_order": 1},
+    ],
+    "notes": [{"id": "n1", "item_id": "1", "content": "Budget approved", "posted_at": "2024-01-03T00:00:00Z"}],
+}
+
+DELTA_SYNC = {
+    "sync_token": "t2",
+    "full_sync": False,
+    "projects": [],
+    "items": [
+        {"id": "1", "project_id": "p1", "content": "Plan Q3 offsite", "child_order": 1},
+        {"id": "2", "project_id": "p1", "parent_id": "1", "content": "Book venue", "checked": True},
+        {"id": "3", "is_deleted": True},
+    ],
+    "notes": [{"id": "n2", "item_id": "1", "content": "Venue shortlisted", "posted_at": "2024-01-05T00:00:00Z"}],
+}
+
+
+class _SyncReplayHandler(BaseHTTPRequestHandler):
+    """Replays scripted sync responses and records every request's form."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        self.server.received.append((self.path, form))
+        if self.server.release is not None:
+            self.server.release.wait(timeout=5)
+        self._reply(200, self.server.responses.pop(0))
+
+    def do_GET(self):
+        self.server.received.append((self.path, None))
+        self._reply(404, {"error": "REST endpoints are not stubbed"})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTodoistSync(unittest.TestCase):
+    """Unit tests for the SQLite replica and its use by the read tools."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SyncReplayHandler)
+        self.server.responses = [FULL_SYNC, DELTA_SYNC]
+        self.server.received = []
+        self.server.release = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.tmpdir = tempfile.mkdtemp()
+        base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.env = patch.dict(
+            os.environ,
+            {
+                "TODOIST_API_TOKEN": "test-token",
+                "TODOIST_API_BASE_URL": f"{base_url}/rest/v2",
+                "TODOIST_SYNC_API_URL": f"{base_url}/sync/v9/sync",
+                "TODOIST_REPLICA_PATH": os.path.join(self.tmpdir, "replica.db"),
+                "TODOIST_SNAPSHOT_PATH": os.path.join(self.tmpdir, "priority_snapshot.json"),
+                "TODOIST_USE_SYNC": "true",
+                "TODOIST_SYNC_MIN_INTERVAL": "3600",
+            },
+        )
+        self.env.start()
+        todoist_client.reset_session()
+        todoist_sync.mark_stale()
+        task_index.invalidate_index()
+        fetch_cache.clear_fetch_cache()
+        tool_memo.clear_memo()
+        todoist_tools.metadata_cache.clear()
+
+    def tearDown(self):
+        todoist_tools.metadata_cache.clear()
+        todoist_client.reset_session()
+        self.env.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_incremental_sync_sends_token_and_applies_deltas(self):
+        """Test that the second sync is incremental and merges changes."""
+        self.assertTrue(todoist_sync.sync()["full_sync"])
+        stats = todoist_sync.sync()
+
+        self.assertFalse(stats["full_sync"])
+        tokens = [form["sync_token"] for _, form in self.server.received]
+        self.assertEqual(tokens, ["*", "t1"])
+
+        tasks = {t["id"]: t for t in todoist_sync.get_project_tasks("p1")}
+        self.assertEqual(list(tasks), ["1"])
+        self.assertEqual(tasks["1"]["content"], "Plan Q3 offsite")
+        self.assertEqual(len(todoist_sync.get_task_comments("1")), 2)
+
+    def test_reads_do_not_wait_for_a_sync_request(self):
+        """Test that the replica can be read while a sync is in flight."""
+        todoist_sync.sync()
+        self.server.release = threading.Event()
+        syncing = threading.Thread(target=todoist_sync.sync)
+        syncing.start()
+        while len(self.server.received) < 2:
+            syncing.join(timeout=0.01)
+
+        # The second sync is waiting for its response; reads still see the full sync
+        task = todoist_sync.get_task("3")
+        self.server.release.set()
+        syncing.join()
+
+        self.assertEqual(task["content"], "Old task")
+        self.assertIsNone(todoist_sync.get_task("3"))
+
+    def test_filter_index_follows_the_sync_token(self):
+        """Test that the query index is reused until a sync changes the token."""
+        todoist_sync.sync()
+        index = todoist_sync.get_filter_index()
+        self.assertIs(todoist_sync.get_filter_index(), index)
+
+        todoist_sync.sync()
+        index = todoist_sync.get_filter_index()
+
+        self.assertEqual(sorted(index.tasks), ["1", "4"])
+
+    def test_read_tools_are_served_from_replica(self):
+        """Test that the read tools need one sync and no REST requests."""
+        tasks = todoist_tools.get_open_tasks("work")
+        details = todoist_tools.get_task_details("1")
+        last_activity = todoist_tools.get_last_activity_ts("1")
+
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(details["subtask_count"], 1)
+        self.assertEqual(details["comment_count"], 1)
+        self.assertEqual(last_activity, "2024-01-03T00:00:00Z")
+        self.assertEqual([path for path, _ in self.server.received], ["/sync/v9/sync"])
+
+    def test_stale_replica_pulls_deltas_before_read(self):
+        """Test that a read after mark_stale (as done by writes) pulls deltas."""
+        todoist_tools.get_open_tasks("Work")
+        todoist_sync.mark_stale()
+        tasks = todoist_tools.get_open_tasks("Work")
+
+        self.assertEqual([t["content"] for t in tasks], ["Plan Q3 offsite"])
+        self.assertEqual(len(self.server.received), 2)
+
+    def test_async_tools_read_the_replica(self):
+        """Test that the async read tools sync and read the replica too."""
+
+        async def read():
+            tasks = await todoist_async_tools.get_open_tasks("Work")
+            details = await todoist_async_tools.get_task_details("1")
+            todoist_sync.mark_stale()
+            return tasks, details, await todoist_async_tools.get_open_tasks("Work")
+
+        tasks, details, after_delta = asyncio.run(read())
+
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(details["comment_count"], 1)
+        # The delta sync bumps the memoized listing's scopes
+        self.assertEqual([t["content"] for t in after_delta], ["Plan Q3 offsite"])
+        self.assertEqual([path for path, _ in self.server.received], ["/sync/v9/sync"] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
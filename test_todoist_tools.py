@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the ToDoist tools, using a fake API in place of the network.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from tools import fetch_cache, task_index, todoist_tools, tool_memo
+
+
+def _days_ago(days: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+
+class FakeTodoistAPI:
+    """Serves canned ToDoist REST responses and records requested paths."""
+
+    def __init__(self, tasks, comments, projects=None):
+        self.tasks = tasks
+        self.comments = comments
+        self.projects = projects or [{"id": "p1", "name": "Work"}]
+        self.paths = []
+
+    def get(self, path, **kwargs):
+        self.paths.append(path)
+        if path == "/projects":
+            body = self.projects
+        elif path == "/tasks":
+            body = self.tasks
+        elif path.startswith("/tasks?project_id="):
+            project_id = path.split("=", 1)[1]
+            body = [t for t in self.tasks if t["project_id"] == project_id]
+        elif path.startswith("/comments?task_id="):
+            body = self.comments.get(path.split("=", 1)[1], [])
+        elif path.startswith("/tasks/"):
+            task_id = path.split("/")[2]
+            body = next(t for t in self.tasks if t["id"] == task_id)
+        else:
+            raise AssertionError(f"Unexpected path {path}")
+
+        response = MagicMock()
+        response.json.return_value = body
+        return response
+
+    def post(self, path, **kwargs):
+        self.paths.append(path)
+        response = MagicMock()
+        response.json.return_value = {"id": "new", **kwargs.get("json", {})}
+        return response
+
+
+class FakeAPITestCase(unittest.TestCase):
+    """Base test case that routes the ToDoist client to a FakeTodoistAPI."""
+
+    def setUp(self):
+        task_index.invalidate_index()
+        fetch_cache.clear_fetch_cache()
+        tool_memo.clear_memo()
+        self.api = FakeTodoistAPI(
+            tasks=[
+                {"id": "1", "project_id": "p1", "content": "Plan offsite", "created": _days_ago(30)},
+                {"id": "2", "project_id": "p1", "content": "Book venue", "parent_id": "1", "order": 2, "created": _days_ago(30)},
+                {"id": "3", "project_id": "p1", "content": "Draft agenda", "parent_id": "1", "order": 1, "created": _days_ago(30)},
+                {"id": "4", "project_id": "p1", "content": "Reply to Legal", "created": _days_ago(20)},
+            ],
+            comments={"4": [{"id": "c1", "created": _days_ago(1)}]},
+        )
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patchers = [
+            patch.dict(os.environ, {"TODOIST_SNAPSHOT_PATH": os.path.join(tmpdir.name, "priority_snapshot.json")}),
+            patch.object(todoist_tools, "get_project_by_name", return_value={"id": "p1"}),
+            patch.object(todoist_tools, "get_work_project_id", return_value="p1"),
+            patch.object(todoist_tools.todoist_client, "get", side_effect=self.api.get),
+            patch.object(todoist_tools.todoist_client, "post", side_effect=self.api.post),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestAnalyzeOpenTasks(FakeAPITestCase):
+    """Unit tests for the batched deep-analysis tool."""
+
+    def test_single_task_listing_and_one_comment_request_per_task(self):
+        """Test that tasks are listed once and never re-fetched individually."""
+        todoist_tools.analyze_open_tasks("Work")
+
+        task_listings = [p for p in self.api.paths if p.startswith("/tasks")]
+        comment_requests = [p for p in self.api.paths if p.startswith("/comments")]
+        self.assertEqual(task_listings, ["/tasks?project_id=p1"])
+        self.assertEqual(len(comment_requests), 4)
+
+    def test_subtasks_recency_and_staleness(self):
+        """Test that subtasks, next action and staleness are joined locally."""
+        analysis = {a["id"]: a for a in todoist_tools.analyze_open_tasks("Work")}
+
+        self.assertEqual(analysis["1"]["subtask_count"], 2)
+        self.assertEqual(analysis["1"]["next_action"], "Draft agenda")
+        self.assertTrue(analysis["1"]["is_stale"])
+        self.assertEqual(analysis["4"]["comment_count"], 1)
+        self.assertEqual(analysis["4"]["days_since_activity"], 1)
+        self.assertFalse(analysis["4"]["is_stale"])
+
+
+class TestTaskIndex(FakeAPITestCase):
+    """Unit tests for answering subtask lookups from the task index."""
+
+    def test_subtasks_and_details_answered_from_index(self):
+        """Test that lookups after get_open_tasks need no task requests."""
+        todoist_tools.get_open_tasks("Work")
+        self.api.paths.clear()
+
+        subtasks = todoist_tools.get_task_subtasks("1")
+        details = todoist_tools.get_task_details("1")
+
+        self.assertEqual([t["id"] for t in subtasks], ["3", "2"])
+        self.assertEqual(details["subtask_count"], 2)
+        self.assertEqual([p for p in self.api.paths if p.startswith("/tasks")], [])
+
+    def test_unindexed_task_lists_its_project_once(self):
+        """Test that a cold lookup indexes the task's project."""
+        todoist_tools.get_task_subtasks("1")
+        todoist_tools.get_task_subtasks("4")
+
+        self.assertEqual(self.api.paths, ["/tasks/1", "/tasks?project_id=p1"])
+
+    def test_expired_index_is_rebuilt(self):
+        """Test that a listing older than the max age is fetched again."""
+        todoist_tools.get_open_tasks("Work")
+        self.api.paths.clear()
+
+        later = time.monotonic() + 120
+        with patch.dict(os.environ, {"TODOIST_TASK_INDEX_TTL": "60"}), patch("time.monotonic", return_value=later):
+            self.assertIsNone(task_index.get_indexed_subtasks("1"))
+            subtasks = todoist_tools.get_task_subtasks("1")
+
+        self.assertEqual([t["id"] for t in subtasks], ["3", "2"])
+        self.assertIn("/tasks?project_id=p1", self.api.paths)
+
+    def test_writes_invalidate_index(self):
+        """Test that task writes drop the index."""
+        todoist_tools.get_open_tasks("Work")
+        todoist_tools.create_task("Send invitations", parent_id="1")
+
+        self.assertIsNone(task_index.get_indexed_subtasks("1"))
+
+
+class TestFetchCache(FakeAPITestCase):
+    """Unit tests for the session fetch cache and recency lookups."""
+
+    def test_last_activity_after_details_needs_no_requests(self):
+        """Test that get_last_activity_ts reuses what get_task_details fetched."""
+        details = todoist_tools.get_task_details("4")
+        self.api.paths.clear()
+
+        ts = todoist_tools.get_last_activity_ts("4")
+
+        self.assertEqual(self.api.paths, [])
+        self.assertEqual(ts, details["comments"][0]["created"])
+
+    def test_last_activity_many_one_comment_request_per_task(self):
+        """Test that the bulk lookup issues one comment request per task."""
+        todoist_tools.get_open_tasks("Work")
+        self.api.paths.clear()
+
+        result = todoist_tools.get_last_activity_ts_many(["1", "4", "4"])
+
+        self.assertEqual(set(result), {"1", "4"})
+        self.assertEqual(sorted(self.api.paths), ["/comments?task_id=1", "/comments?task_id=4"])
+
+    def test_new_comment_updates_cached_comments(self):
+        """Test that add_task_comment keeps the cached comments current."""
+        todoist_tools.get_task_comments("4")
+        todoist_tools.add_task_comment("4", "Sent reminder")
+
+        self.assertEqual(len(todoist_tools.get_task_comments("4")), 2)
+
+
+class TestMultiProject(FakeAPITestCase):
+    """Unit tests for fetching and ranking several projects at once."""
+
+    def setUp(self):
+        super().setUp()
+        todoist_tools.metadata_cache.clear()
+        self.api.projects = [
+            {"id": "p1", "name": "Work"},
+            {"id": "p2", "name": "Home"},
+            {"id": "p3", "name": "Someday"},
+        ]
+        self.api.tasks.append(
+            {"id": "5", "project_id": "p2", "content": "Fix sink", "priority": 4, "created": _days_ago(2)}
+        )
+
+    def test_all_projects_in_two_requests(self):
+        """Test that the whole account is fetched with two requests."""
+        grouped = todoist_tools.get_open_tasks_by_project()
+
+        self.assertEqual(self.api.paths, ["/projects", "/tasks"])
+        self.assertEqual(len(grouped["Work"]), 4)
+        self.assertEqual([t["id"] for t in grouped["Home"]], ["5"])
+        self.assertEqual(grouped["Someday"], [])
+
+    def test_per_project_views_are_indexed(self):
+        """Test that later per-project lookups need no further requests."""
+        todoist_tools.get_open_tasks_by_project(["work", "Home"])
+        self.api.paths.clear()
+
+        self.assertEqual(len(todoist_tools.get_task_subtasks("1")), 2)
+        self.assertEqual(self.api.paths, [])
+
+    def test_unknown_project(self):
+        """Test that a missing project is reported instead of ignored."""
+        result = todoist_tools.get_open_tasks_by_project(["Work", "Garden"])
+
+        self.assertIn("Garden", result["error"])
+
+    def test_cross_project_ranking(self):
+        """Test that tasks of all projects are ranked together."""
+        ranked = todoist_tools.rank_tasks_across_projects(top_k=2)
+
+        self.assertEqual(ranked[0]["id"], "5")
+        self.assertEqual(ranked[0]["project"], "Home")
+        self.assertEqual(len(ranked), 2)
+        self.assertEqual([p for p in self.api.paths if p.startswith("/tasks")], ["/tasks"])
+
+
+class TestToolMemo(FakeAPITestCase):
+    """Unit tests for memoized read tools and their invalidation by writes."""
+
+    def setUp(self):
+        super().setUp()
+        env = patch.dict(os.environ, {"TODOIST_MEMO": "true"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_off_by_default_without_the_replica(self):
+        """Test that reads are not memoized when nothing sees outside changes."""
+        with patch.dict(os.environ, {"TODOIST_USE_SYNC": "false"}):
+            del os.environ["TODOIST_MEMO"]
+            todoist_tools.get_task_comments("4")
+            fetch_cache.clear_fetch_cache()
+            todoist_tools.get_task_comments("4")
+
+        self.assertEqual(self.api.paths, ["/comments?task_id=4"] * 2)
+
+    def test_callers_get_their_own_copy(self):
+        """Test that changing a memoized result does not change later reads."""
+        todoist_tools.get_open_tasks("Work").clear()
+
+        self.assertEqual(len(todoist_tools.get_open_tasks("Work")), 4)
+
+    def test_repeated_reads_are_free(self):
+        """Test that repeating a read with equivalent arguments needs no requests."""
+        todoist_tools.get_open_tasks()
+        todoist_tools.get_task_details("1")
+        self.api.paths.clear()
+
+        todoist_tools.get_open_tasks(project_name=None)
+        todoist_tools.get_task_details(task_id="1")
+
+        self.assertEqual(self.api.paths, [])
+
+    def test_comment_invalidates_only_its_task(self):
+        """Test that add_task_comment recomputes reads of that task only."""
+        todoist_tools.get_open_tasks("Work")
+        todoist_tools.get_task_details("1")
+        todoist_tools.get_task_details("4")
+        fetch_cache.clear_fetch_cache()
+        todoist_tools.add_task_comment("4", "Sent reminder")
+        self.api.paths.clear()
+
+        todoist_tools.get_open_tasks("Work")
+        todoist_tools.get_task_details("1")
+        todoist_tools.get_task_details("4")
+
+        self.assertEqual(self.api.paths, ["/comments?task_id=4"])
+
+    def test_task_writes_invalidate_listings(self):
+        """Test that task writes recompute listings and details."""
+        writes = [
+            lambda: todoist_tools.create_task("Send invitations", parent_id="1"),
+            lambda: todoist_tools.update_task("1", priority=4),
+            lambda: todoist_tools.move_task_to_project("1", "p2"),
+        ]
+        for write in writes:
+            todoist_tools.get_open_tasks("Work")
+            write()
+            self.api.paths.clear()
+
+            todoist_tools.get_open_tasks("Work")
+
+            self.assertEqual(self.api.paths, ["/tasks?project_id=p1"])
+
+    def test_errors_are_not_memoized(self):
+        """Test that a failed read is retried on the next call."""
+        with patch.object(todoist_tools.todoist_client, "get", side_effect=todoist_tools.requests.ConnectionError("down")):
+            self.assertIn("error", todoist_tools.get_task_comments("4"))
+
+        self.assertEqual(len(todoist_tools.get_task_comments("4")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for memoized tool results and their versioned keys.
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tools import todoist_sync, tool_memo
+
+
+class TestToolMemo(unittest.TestCase):
+    """Unit tests for the memoized decorator, scopes and disk tier."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"TODOIST_MEMO": "true", "TODOIST_MEMO_DISK_PATH": ""})
+        self.env.start()
+        tool_memo.clear_memo()
+        self.calls = []
+
+        @tool_memo.memoized("tasks", "task:{task_id}")
+        def get_task(task_id, verbose=False):
+            self.calls.append(task_id)
+            return {"id": task_id, "calls": len(self.calls)}
+
+        self.get_task = get_task
+
+    def tearDown(self):
+        tool_memo.clear_memo()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_bumping_a_scope_changes_the_key(self):
+        """Test that only results reading a bumped scope are recomputed."""
+        self.get_task("1")
+        self.get_task("2", verbose=False)
+        tool_memo.bump_task("1")
+
+        self.get_task("1")
+        self.get_task("2")
+        self.assertEqual(self.calls, ["1", "2", "1"])
+
+        tool_memo.bump("tasks")
+        self.get_task("2")
+        self.assertEqual(self.calls, ["1", "2", "1", "2"])
+
+    def test_disabled(self):
+        """Test that every call runs the tool when memoization is off."""
+        with patch.dict(os.environ, {"TODOIST_MEMO": "false"}):
+            self.get_task("1")
+            self.get_task("1")
+
+        self.assertEqual(self.calls, ["1", "1"])
+
+    def test_ttl_is_read_at_runtime(self):
+        """Test that TODOIST_MEMO_TTL applies without a restart."""
+        self.get_task("1")
+        with patch.dict(os.environ, {"TODOIST_MEMO_TTL": "-1"}):
+            self.get_task("1")
+
+        self.assertEqual(self.calls, ["1", "1"])
+
+    def test_async_tools_share_entries(self):
+        """Test that an async tool with the same name reuses a sync result."""
+
+        @tool_memo.memoized("tasks", "task:{task_id}")
+        async def get_task(task_id, verbose=False):
+            raise AssertionError("should have been memoized")
+
+        result = self.get_task("1")
+
+        self.assertEqual(asyncio.run(get_task("1")), result)
+
+    def test_disk_tier_survives_a_restart(self):
+        """Test that results and versions are read back from the SQLite file."""
+        with patch.dict(os.environ, {"TODOIST_MEMO_DISK_PATH": os.path.join(self.tmpdir, "memo.db")}):
+            self.get_task("1")
+            self.get_task("2")
+            tool_memo.bump_task("2")
+            # A new process starts with an empty in-memory tier and versions
+            tool_memo.memo_cache.clear()
+            tool_memo._versions.clear()
+
+            self.get_task("1")
+            self.get_task("2")
+
+        self.assertEqual(self.calls, ["1", "2", "2"])
+
+    def test_sync_changes_bump_scopes(self):
+        """Test that an incremental sync bumps the scopes it changed."""
+        payload = {
+            "full_sync": False,
+            "items": [{"id": "7"}],
+            "notes": [{"id": "n1", "item_id": "8"}],
+        }
+
+        self.assertEqual(
+            todoist_sync._changed_scopes(payload), ["comments", "task:7", "task:8", "tasks"]
+        )
+        self.assertEqual(todoist_sync._changed_scopes({"full_sync": True}), ["*"])
+        self.assertEqual(todoist_sync._changed_scopes({"full_sync": False}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the TTL metadata cache and the project lookups built on it.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from tools import todoist_tools
+from tools.ttl_cache import TTLCache, ttl_cached
+
+
+class TestTTLCache(unittest.TestCase):
+    """Unit tests for expiry, LRU eviction and error handling."""
+
+    def test_entries_expire_after_ttl(self):
+        """Test that an entry is a miss once its TTL has passed."""
+        cache = TTLCache(maxsize=4, ttl=10)
+        with patch("tools.ttl_cache.time.monotonic", return_value=100):
+            cache.set("a", 1)
+        with patch("tools.ttl_cache.time.monotonic", return_value=105):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("tools.ttl_cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache stays bounded by maxsize."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    def test_errors_and_none_are_not_cached(self):
+        """Test that failed lookups are retried on the next call."""
+        func = MagicMock(side_effect=[{"error": "boom"}, None, {"id": "1"}])
+        func.__name__ = "lookup"
+        cached = ttl_cached(TTLCache())(func)
+
+        self.assertEqual(cached("x"), {"error": "boom"})
+        self.assertIsNone(cached("x"))
+        self.assertEqual(cached("x"), {"id": "1"})
+        self.assertEqual(cached("x"), {"id": "1"})
+        self.assertEqual(func.call_count, 3)
+
+
+class TestProjectLookups(unittest.TestCase):
+    """Unit tests for cached project lookups and their invalidation."""
+
+    def setUp(self):
+        todoist_tools.metadata_cache.clear()
+        self.get = patch.object(todoist_tools.todoist_client, "get").start()
+        self.post = patch.object(todoist_tools.todoist_client, "post").start()
+        patch.object(todoist_tools.todoist_sync, "is_enabled", return_value=False).start()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patch.dict(os.environ, {"TODOIST_SNAPSHOT_PATH": os.path.join(tmpdir.name, "priority_snapshot.json")}).start()
+        self.addCleanup(patch.stopall)
+        self.addCleanup(todoist_tools.metadata_cache.clear)
+        self.get.return_value.json.return_value = [
+            {"id": "p1", "name": "Work"},
+            {"id": "p2", "name": "Home"},
+        ]
+
+    def test_alternating_names_share_one_request(self):
+        """Test that different project names do not thrash the cache."""
+        for name in ["Work", "Home", "Work", "home"]:
+            self.assertIsNotNone(todoist_tools.get_project_by_name(name))
+        self.assertEqual(todoist_tools.get_work_project_id(), "p1")
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_create_project_invalidates_cache(self):
+        """Test that a new project is visible right after create_project."""
+        todoist_tools.get_project_by_name("Work")
+        self.post.return_value.json.return_value = {"id": "p3", "name": "Launch"}
+        todoist_tools.create_project("Launch")
+        self.get.return_value.json.return_value.append({"id": "p3", "name": "Launch"})
+
+        self.assertEqual(todoist_tools.get_project_by_name("Launch")["id"], "p3")
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_failed_lookup_is_not_cached(self):
+        """Test that an API failure is retried on the next lookup."""
+        projects = self.get.return_value.json.return_value
+        self.get.side_effect = [
+            requests.ConnectionError("down"),
+            MagicMock(**{"json.return_value": projects}),
+        ]
+
+        self.assertIn("error", todoist_tools.get_project_by_name("Work"))
+        self.assertEqual(todoist_tools.get_project_by_name("Work")["id"], "p1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,320 @@
+"""
+Incremental sync of Google Calendar events into a local SQLite store.
+
+The first sync of a calendar lists its events and keeps the returned
+`nextSyncToken`. Every later sync sends that token and only receives the
+events that changed since, so get_events can answer repeated queries over
+the same week from the store. When the API answers 410 Gone because the
+token expired, the calendar is dropped from the store and fully resynced.
+
+A full sync expands recurring events, so it only covers a bounded window
+around the time it ran; get_events falls back to the API outside of it.
+All-day events are stored from midnight in the calendar's time zone.
+
+Configuration (environment variables):
+    GOOGLE_CALENDAR_USE_SYNC: Serve get_events from the store (true/false,
+        default false).
+    GOOGLE_CALENDAR_STORE_PATH: SQLite file of the store (default calendar_store.db).
+    GOOGLE_CALENDAR_SYNC_MIN_INTERVAL: Seconds between incremental syncs of
+        a calendar (default 10).
+    GOOGLE_CALENDAR_SYNC_PAST_DAYS: How far back a full sync starts (default 30).
+    GOOGLE_CALENDAR_SYNC_FUTURE_DAYS: How far ahead a full sync ends (default 365).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from googleapiclient.errors import HttpError
+
+# The event fields kept in the store, matching google_calendar_tools.EVENT_FIELDS,
+# plus the calendar's time zone for all-day events
+SYNC_FIELDS = (
+    "nextPageToken,nextSyncToken,timeZone,items(id,summary,start,end,status,location)"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (calendar_id TEXT PRIMARY KEY, sync_token TEXT);
+CREATE TABLE IF NOT EXISTS sync_windows (
+    calendar_id TEXT PRIMARY KEY,
+    synced_from TEXT,
+    synced_until TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT,
+    id TEXT,
+    start_ts TEXT,
+    end_ts TEXT,
+    data TEXT,
+    PRIMARY KEY (calendar_id, id)
+);
+CREATE INDEX IF NOT EXISTS events_window ON events (calendar_id, start_ts);
+"""
+
+_lock = threading.RLock()
+# calendar_id -> monotonic time of its last sync in this process
+_last_sync_at: Dict[str, float] = {}
+
+
+def is_enabled() -> bool:
+    """Returns True if get_events should be served from the local store."""
+    return os.getenv("GOOGLE_CALENDAR_USE_SYNC", "").lower() in ("1", "true", "yes")
+
+
+def get_store_path() -> str:
+    """Get the path of the SQLite event store."""
+    return os.getenv("GOOGLE_CALENDAR_STORE_PATH", "calendar_store.db")
+
+
+def get_min_sync_interval() -> float:
+    """Get the minimum number of seconds between two syncs of a calendar."""
+    return float(os.getenv("GOOGLE_CALENDAR_SYNC_MIN_INTERVAL", "10"))
+
+
+def get_past_days() -> int:
+    """Get how many days of past events a full sync downloads."""
+    return int(os.getenv("GOOGLE_CALENDAR_SYNC_PAST_DAYS", "30"))
+
+
+def get_future_days() -> int:
+    """Get how many days of future events a full sync downloads."""
+    return int(os.getenv("GOOGLE_CALENDAR_SYNC_FUTURE_DAYS", "365"))
+
+
+@contextmanager
+def _connect():
+    """Opens the store, commits on success and always closes it."""
+    conn = sqlite3.connect(get_store_path())
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _get_zone(time_zone: Optional[str]):
+    """Returns the tzinfo of an IANA time zone name, or UTC if it is unknown."""
+    try:
+        return ZoneInfo(time_zone) if time_zone else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def to_utc(value: Dict, time_zone: Optional[str] = None) -> str:
+    """
+    Converts an event start or end ({"dateTime": ...} or {"date": ...}) into
+    a UTC ISO 8601 string that sorts and compares chronologically. All-day
+    dates are taken as midnight in the event's or else the calendar's time
+    zone, so they fall on the right day in window queries.
+
+    Args:
+        value (Dict): The start or end of an event.
+        time_zone (Optional[str]): The calendar's time zone, e.g. "Europe/Berlin".
+            Defaults to UTC.
+    """
+    raw = value.get("dateTime") or value.get("date") or ""
+    if not raw:
+        return ""
+    parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=_get_zone(value.get("timeZone") or time_zone))
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _apply(
+    conn: sqlite3.Connection,
+    calendar_id: str,
+    events: List[Dict],
+    time_zone: Optional[str] = None,
+):
+    """Stores changed events and removes cancelled ones."""
+    for event in events:
+        if event.get("status") == "cancelled":
+            conn.execute(
+                "DELETE FROM events WHERE calendar_id = ? AND id = ?",
+                (calendar_id, event["id"]),
+            )
+        else:
+            conn.execute(
+                "INSERT OR REPLACE INTO events (calendar_id, id, start_ts, end_ts, data)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    calendar_id,
+                    event["id"],
+                    to_utc(event.get("start", {}), time_zone),
+                    to_utc(event.get("end", {}), time_zone),
+                    json.dumps(event),
+                ),
+            )
+
+
+def get_sync_token(calendar_id: str) -> Optional[str]:
+    """Returns the stored sync token of a calendar, or None if never synced."""
+    with _lock, _connect() as conn:
+        row = conn.execute(
+            "SELECT sync_token FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def reset_calendar(calendar_id: str):
+    """Deletes the stored events and sync token of a calendar."""
+    with _lock, _connect() as conn:
+        conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+        conn.execute("DELETE FROM sync_state WHERE calendar_id = ?", (calendar_id,))
+        conn.execute("DELETE FROM sync_windows WHERE calendar_id = ?", (calendar_id,))
+        _last_sync_at.pop(calendar_id, None)
+
+
+def full_sync_window() -> Tuple[datetime, datetime]:
+    """Returns the window of events that a full sync started now downloads."""
+    now = datetime.now(timezone.utc)
+    return now - timedelta(days=get_past_days()), now + timedelta(days=get_future_days())
+
+
+def get_window(calendar_id: str) -> Optional[Tuple[datetime, datetime]]:
+    """Returns the window of events held for a calendar, or None if never synced."""
+    with _lock, _connect() as conn:
+        row = conn.execute(
+            "SELECT synced_from, synced_until FROM sync_windows WHERE calendar_id = ?",
+            (calendar_id,),
+        ).fetchone()
+    if not row:
+        return None
+    return datetime.fromisoformat(row[0]), datetime.fromisoformat(row[1])
+
+
+def covers(calendar_id: str, start: datetime, end: datetime) -> bool:
+    """
+    Returns True if the store holds every event of a calendar between
+    `start` and `end`, or would once its first full sync has run.
+    """
+    synced_from, synced_until = get_window(calendar_id) or full_sync_window()
+    return synced_from <= start and end <= synced_until
+
+
+def _list_changes(service, calendar_id: str, sync_token: Optional[str], window=None):
+    """
+    Lists every page of changes since `sync_token`, or if None every event
+    in `window`. Incremental syncs keep the window of the full sync they
+    continue, which is why recurring events are only expanded within it.
+
+    Returns:
+        The events, the next sync token and the calendar's time zone.
+    """
+    params = {"calendarId": calendar_id, "singleEvents": True, "fields": SYNC_FIELDS}
+    if sync_token:
+        params["syncToken"] = sync_token
+    else:
+        params["timeMin"] = window[0].isoformat()
+        params["timeMax"] = window[1].isoformat()
+
+    events = []
+    page_token = None
+    while True:
+        response = service.events().list(pageToken=page_token, **params).execute()
+        events.extend(response.get("items", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return events, response.get("nextSyncToken"), response.get("timeZone")
+
+
+def sync(service, calendar_id: str) -> Dict:
+    """
+    Pulls the events of a calendar that changed since its last sync into
+    the store, falling back to a full sync if the sync token has expired.
+
+    Args:
+        service: A Google Calendar API service object.
+        calendar_id (str): The ID of the calendar.
+
+    Returns:
+        Dict: Whether this was a `full_sync` and how many `events` changed.
+    """
+    with _lock:
+        sync_token = get_sync_token(calendar_id)
+        window = full_sync_window()
+        try:
+            events, next_sync_token, time_zone = _list_changes(
+                service, calendar_id, sync_token, window
+            )
+        except HttpError as e:
+            if e.resp.status != 410:
+                raise
+            print(f"Sync token of calendar {calendar_id} expired, resyncing.")
+            reset_calendar(calendar_id)
+            sync_token = None
+            events, next_sync_token, time_zone = _list_changes(
+                service, calendar_id, None, window
+            )
+
+        with _connect() as conn:
+            if sync_token is None:
+                conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_windows (calendar_id, synced_from, synced_until)"
+                    " VALUES (?, ?, ?)",
+                    (calendar_id, window[0].isoformat(), window[1].isoformat()),
+                )
+            _apply(conn, calendar_id, events, time_zone)
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (calendar_id, sync_token) VALUES (?, ?)",
+                (calendar_id, next_sync_token),
+            )
+        _last_sync_at[calendar_id] = time.monotonic()
+
+    return {"full_sync": sync_token is None, "events": len(events)}
+
+
+def ensure_synced(service, calendar_id: str):
+    """
+    Syncs a calendar if it was never synced in this process, was marked
+    stale, or was last synced more than GOOGLE_CALENDAR_SYNC_MIN_INTERVAL
+    seconds ago.
+    """
+    with _lock:
+        last_sync_at = _last_sync_at.get(calendar_id)
+        if last_sync_at is None or time.monotonic() - last_sync_at >= get_min_sync_interval():
+            sync(service, calendar_id)
+
+
+def mark_stale(calendar_id: Optional[str] = None):
+    """Forces the next read of a calendar, or of every calendar, to sync first."""
+    with _lock:
+        if calendar_id is None:
+            _last_sync_at.clear()
+        else:
+            _last_sync_at.pop(calendar_id, None)
+
+
+def get_events(
+    calendar_id: str, time_min: str, time_max: str, limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Returns the stored events of a calendar that overlap a time window,
+    ordered by start time.
+
+    Args:
+        calendar_id (str): The ID of the calendar.
+        time_min (str): UTC ISO 8601 start of the window.
+        time_max (str): UTC ISO 8601 end of the window.
+        limit (Optional[int]): The maximum number of events to return.
+    """
+    query = (
+        "SELECT data FROM events WHERE calendar_id = ? AND end_ts > ? AND start_ts < ?"
+        " ORDER BY start_ts"
+    )
+    params = [calendar_id, time_min, time_max]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    with _lock, _connect() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [json.loads(row[0]) for row in rows]
@@ -0,0 +1,86 @@
+"""
+Session-scoped cache of fetched ToDoist task bodies and comments.
+
+Tools like get_task_details and get_last_activity_ts both need a task and
+its comments. During one agent session they share this cache, so each task
+body and comment list is fetched at most once. Entries expire after
+TODOIST_FETCH_CACHE_TTL seconds (default 300), which bounds a session, and
+the write tools update or drop the entries they affect.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from tools import instrumentation
+
+# task_id -> (fetched_at, value)
+_task_bodies: Dict[str, Tuple[float, Dict]] = {}
+_comments: Dict[str, Tuple[float, List[Dict]]] = {}
+_lock = threading.Lock()
+
+
+def get_ttl() -> float:
+    """Get the lifetime of a cache entry in seconds."""
+    return float(os.getenv("TODOIST_FETCH_CACHE_TTL", "300"))
+
+
+def _get_fresh(store: Dict, task_id: str):
+    entry = store.get(str(task_id))
+    if entry is not None and time.monotonic() - entry[0] > get_ttl():
+        store.pop(str(task_id), None)
+        entry = None
+    instrumentation.record_cache(hit=entry is not None)
+    return entry[1] if entry is not None else None
+
+
+def get_task_body(task_id: str) -> Optional[Dict]:
+    """Returns the cached raw task, or None if it is missing or expired."""
+    with _lock:
+        return _get_fresh(_task_bodies, task_id)
+
+
+def set_task_body(task_id: str, task: Dict):
+    """Caches a raw task fetched from the API."""
+    with _lock:
+        _task_bodies[str(task_id)] = (time.monotonic(), task)
+
+
+def get_comments(task_id: str) -> Optional[List[Dict]]:
+    """Returns the cached comments of a task, or None if missing or expired."""
+    with _lock:
+        return _get_fresh(_comments, task_id)
+
+
+def set_comments(task_id: str, comments: List[Dict]):
+    """Caches the full comment list of a task."""
+    with _lock:
+        _comments[str(task_id)] = (time.monotonic(), comments)
+
+
+def add_comment(task_id: str, comment: Dict):
+    """Appends a newly created comment to a cached comment list, if cached."""
+    with _lock:
+        comments = _get_fresh(_comments, task_id)
+        if comments is not None:
+            _comments[str(task_id)] = (time.monotonic(), comments + [comment])
+
+
+def invalidate_comments(task_id: str):
+    """Drops the cached comments of a task after new ones were added."""
+    with _lock:
+        _comments.pop(str(task_id), None)
+
+
+def invalidate_task(task_id: str):
+    """Drops the cached body of a task after it has been changed."""
+    with _lock:
+        _task_bodies.pop(str(task_id), None)
+
+
+def clear_fetch_cache():
+    """Drops every cached task body and comment list."""
+    with _lock:
+        _task_bodies.clear()
+        _comments.clear()
@@ -4,43 +4,166 @@ Google Calendar API tools for event management.
 To use these tools, you need to have a `credentials.json` file in the root of the project.
 This file is obtained from the Google Cloud Console.
 For more information, see: https://developers.google.com/workspace/guides/create-credentials
+
+Set GOOGLE_CALENDAR_API_ROOT to send every request to another server, such
+as the local stub in benchmarks/stub_server.py, without OAuth.
 """
 
+import http.client
+import json
 import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+import httplib2
+from google.auth.credentials import AnonymousCredentials
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from tools import calendar_sync, instrumentation
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
+# The event fields the GoogleCalendarAgent reads; everything else is left out
+# of list responses.
+EVENT_FIELDS = "id,summary,start,end,status,location"
+# Largest page the Calendar API returns for events().list
+MAX_PAGE_SIZE = 2500
+# Most calls the Calendar API accepts in one batch HTTP request
+MAX_BATCH_SIZE = 50
+# Failures of a whole batch request: API errors, and transport errors such as
+# a dropped connection or a socket timeout
+BATCH_ERRORS = (HttpError, httplib2.HttpLib2Error, http.client.HTTPException, OSError)
 
-def get_calendar_service():
-    """
-    Returns a Google Calendar API service object.
-    """
-    creds = None
+# The credentials are loaded once per process and shared, while each thread
+# builds its own service object, because the httplib2 transport underneath
+# is not thread-safe. `_generation` is bumped on reset so that every thread
+# rebuilds its service. `_saved_token` is the token.json content last read
+# or written, so the file is only rewritten when the token actually changes.
+_local = threading.local()
+_generation = 0
+_creds = None
+_saved_token = None
+_service_lock = threading.Lock()
+
+
+class _TracedHttpRequest(HttpRequest):
+    """An HttpRequest that reports its request and response sizes to the tool trace."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        postproc = self.postproc
+
+        def traced_postproc(resp, content):
+            instrumentation.record(bytes_in=len(content or b""))
+            return postproc(resp, content)
+
+        self.postproc = traced_postproc
+
+    def execute(self, http=None, num_retries=0):
+        instrumentation.record_http(bytes_out=len(self.body or b""))
+        return super().execute(http=http, num_retries=num_retries)
+
+
+def _load_credentials():
+    """Loads stored credentials, running the OAuth flow if there are none."""
+    global _saved_token
     # The file token.json stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
     # time.
     if os.path.exists("token.json"):
+        with open("token.json") as token:
+            _saved_token = token.read()
         creds = Credentials.from_authorized_user_file("token.json", SCOPES)
+        if creds.valid or (creds.expired and creds.refresh_token):
+            return creds
     # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-        # Save the credentials for the next run
+    flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
+    return flow.run_local_server(port=0)
+
+
+def _save_credentials(creds):
+    """Saves the credentials for the next run, if they changed."""
+    global _saved_token
+    token_json = creds.to_json()
+    if token_json != _saved_token:
         with open("token.json", "w") as token:
-            token.write(creds.to_json())
+            token.write(token_json)
+        _saved_token = token_json
+
+
+def get_api_root() -> Optional[str]:
+    """Get the root URL that replaces https://www.googleapis.com/, if any."""
+    return os.getenv("GOOGLE_CALENDAR_API_ROOT")
+
 
-    service = build("calendar", "v3", credentials=creds)
+def _build_service_for_root(api_root: str):
+    """Builds an unauthenticated service whose requests, batches included, go to `api_root`."""
+    document = json.loads(get_static_doc("calendar", "v3"))
+    document["rootUrl"] = api_root.rstrip("/") + "/"
+    return build_from_document(
+        document, credentials=AnonymousCredentials(), requestBuilder=_TracedHttpRequest
+    )
+
+
+def get_calendar_service():
+    """
+    Returns the Google Calendar API service object of the calling thread.
+
+    Each thread builds its service once from the discovery document bundled
+    with google-api-python-client, so no discovery request is made, and
+    reuses it afterwards. Credentials are shared by all threads and are
+    refreshed only when they are expired or about to expire, under a lock
+    so concurrent callers trigger a single refresh.
+    """
+    global _creds
+    with _service_lock:
+        generation = _generation
+        api_root = get_api_root()
+        if not api_root:
+            if _creds is None:
+                _creds = _load_credentials()
+            if not _creds.valid:
+                _creds.refresh(Request())
+            _save_credentials(_creds)
+        creds = _creds
+
+    cached = getattr(_local, "service", None)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    if api_root:
+        service = _build_service_for_root(api_root)
+    else:
+        service = build(
+            "calendar",
+            "v3",
+            credentials=creds,
+            static_discovery=True,
+            cache_discovery=False,
+            requestBuilder=_TracedHttpRequest,
+        )
+    _local.service = (generation, service)
     return service
 
 
+def reset_calendar_service():
+    """Drops the cached services and credentials, e.g. after token.json changed."""
+    global _generation, _creds, _saved_token
+    with _service_lock:
+        _generation += 1
+        _creds = None
+        _saved_token = None
+
+
 def get_calendars():
     """
     Returns a list of all calendars.
@@ -60,13 +183,133 @@ def create_calendar(summary):
     return created_calendar
 
 
-def get_events(calendar_id):
+def get_default_window_days() -> int:
+    """Get how many days ahead get_events lists when no time_max is given."""
+    return int(os.getenv("GOOGLE_CALENDAR_WINDOW_DAYS", "7"))
+
+
+def _parse_rfc3339(value: str) -> datetime:
+    """Parses a date or datetime string, assuming UTC when no offset is given."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def iter_events(
+    calendar_id: str,
+    time_min: Optional[str] = None,
+    time_max: Optional[str] = None,
+    fields: str = EVENT_FIELDS,
+    page_size: int = 250,
+) -> Iterator[Dict]:
+    """
+    Yields the events of a calendar in a time window, ordered by start time.
+
+    Recurring events are expanded into their instances. Pages are requested
+    lazily, following nextPageToken only when the caller consumes past the
+    end of the current page, and only `fields` of each event are returned.
+
+    Args:
+        calendar_id (str): The ID of the calendar.
+        time_min (Optional[str]): RFC 3339 lower bound on event end times.
+        time_max (Optional[str]): RFC 3339 upper bound on event start times.
+        fields (str): Comma-separated event fields to request.
+        page_size (int): Events per request, at most 2500.
+
+    Yields:
+        Dict: One event at a time.
     """
-    Returns a list of all events in a calendar.
+    service = get_calendar_service()
+    params = {
+        "calendarId": calendar_id,
+        "singleEvents": True,
+        "orderBy": "startTime",
+        "maxResults": min(page_size, MAX_PAGE_SIZE),
+        "fields": f"nextPageToken,items({fields})",
+    }
+    if time_min:
+        params["timeMin"] = time_min
+    if time_max:
+        params["timeMax"] = time_max
+
+    page_token = None
+    while True:
+        response = service.events().list(pageToken=page_token, **params).execute()
+        yield from response.get("items", [])
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def get_events(
+    calendar_id: str,
+    time_min: Optional[str] = None,
+    time_max: Optional[str] = None,
+    max_results: int = 250,
+) -> List[Dict]:
+    """
+    Returns the events of a calendar in a time window, ordered by start time.
+
+    Args:
+        calendar_id (str): The ID of the calendar, e.g. "primary".
+        time_min (Optional[str]): RFC 3339 start of the window. Defaults to now.
+        time_max (Optional[str]): RFC 3339 end of the window. Defaults to
+            GOOGLE_CALENDAR_WINDOW_DAYS (7) days after the start.
+        max_results (int): The maximum number of events to return.
+
+    Returns:
+        List[Dict]: Events with their id, summary, start, end, status and
+        location.
+    """
+    start = _parse_rfc3339(time_min) if time_min else datetime.now(timezone.utc)
+    if time_max:
+        end = _parse_rfc3339(time_max)
+    else:
+        end = start + timedelta(days=get_default_window_days())
+
+    # The store only holds the window of the calendar's last full sync, and a
+    # resync on an expired token moves that window, so check it again after
+    if calendar_sync.is_enabled() and calendar_sync.covers(calendar_id, start, end):
+        calendar_sync.ensure_synced(get_calendar_service(), calendar_id)
+        if calendar_sync.covers(calendar_id, start, end):
+            return calendar_sync.get_events(
+                calendar_id,
+                start.astimezone(timezone.utc).isoformat(),
+                end.astimezone(timezone.utc).isoformat(),
+                limit=max_results,
+            )
+
+    time_min, time_max = start.isoformat(), end.isoformat()
+    events = iter_events(
+        calendar_id, time_min, time_max, page_size=min(max_results, MAX_PAGE_SIZE)
+    )
+    return list(islice(events, max_results))
+
+
+def get_busy_intervals(calendar_id: str, time_min: str, time_max: str) -> List[tuple]:
+    """
+    Returns the busy periods of a calendar in a time window with one
+    freebusy query, instead of listing and reading every event.
+
+    Args:
+        calendar_id (str): The ID of the calendar.
+        time_min (str): RFC 3339 start of the window.
+        time_max (str): RFC 3339 end of the window.
+
+    Returns:
+        List[tuple]: (start, end) RFC 3339 strings of each busy period.
     """
     service = get_calendar_service()
-    events_result = service.events().list(calendarId=calendar_id).execute()
-    return events_result["items"]
+    response = (
+        service.freebusy()
+        .query(body={"timeMin": time_min, "timeMax": time_max, "items": [{"id": calendar_id}]})
+        .execute()
+    )
+    calendar = response.get("calendars", {}).get(calendar_id, {})
+    if calendar.get("errors"):
+        raise ValueError(f"Free/busy lookup failed for {calendar_id}: {calendar['errors']}")
+    return [(period["start"], period["end"]) for period in calendar.get("busy", [])]
 
 
 def create_event(calendar_id, summary, start, end):
@@ -76,6 +319,7 @@ def create_event(calendar_id, summary, start, end):
     service = get_calendar_service()
     event = {"summary": summary, "start": start, "end": end}
     created_event = service.events().insert(calendarId=calendar_id, body=event).execute()
+    calendar_sync.mark_stale(calendar_id)
     return created_event
 
 
@@ -90,6 +334,7 @@ def update_event(calendar_id, event_id, summary, start, end):
         .update(calendarId=calendar_id, eventId=event_id, body=event)
         .execute()
     )
+    calendar_sync.mark_stale(calendar_id)
     return updated_event
 
 
@@ -99,4 +344,115 @@ def delete_event(calendar_id, event_id):
     """
     service = get_calendar_service()
     service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+    calendar_sync.mark_stale(calendar_id)
     return True
+
+
+def _change_to_request(service, calendar_id: str, change: Dict):
+    """
+    Converts one apply_event_changes entry into an unsent API request.
+
+    Raises:
+        ValueError: If the change is missing required fields or has an unknown type.
+    """
+    change_type = change.get("type")
+    event_id = change.get("event_id")
+    body = {
+        field: change[field]
+        for field in ("summary", "start", "end", "description", "location")
+        if change.get(field) is not None
+    }
+
+    if change_type == "create":
+        if not body.get("start") or not body.get("end"):
+            raise ValueError("start and end are required to create an event")
+        return service.events().insert(calendarId=calendar_id, body=body)
+    if not event_id:
+        raise ValueError("event_id is required")
+    if change_type == "update":
+        if not body:
+            raise ValueError("No updates provided")
+        return service.events().patch(calendarId=calendar_id, eventId=event_id, body=body)
+    if change_type == "delete":
+        return service.events().delete(calendarId=calendar_id, eventId=event_id)
+    raise ValueError(f"Unknown change type '{change_type}'")
+
+
+def apply_event_changes(calendar_id: str, changes: List[Dict]) -> Dict:
+    """
+    Creates, updates and deletes many events of a calendar with batch HTTP
+    requests of up to 50 calls each, instead of one create_event,
+    update_event or delete_event call per event.
+
+    Args:
+        calendar_id (str): The ID of the calendar, e.g. "primary".
+        changes (List[Dict]): The changes to apply. Each change is a dict with
+            a "type":
+            - "create": "summary", "start", "end" and optional "description"
+              and "location". start/end are dicts like {"dateTime": ...}.
+            - "update": "event_id" and the fields to change.
+            - "delete": "event_id".
+
+    Returns:
+        Dict: "applied" and "failed" counts and one result per change, in
+        input order, with its index, type, event_id, status ("ok" or
+        "error") and error message if it failed.
+    """
+    service = get_calendar_service()
+    results = [None] * len(changes)
+    pending = []
+    for index, change in enumerate(changes):
+        result = {"index": index, "type": change.get("type"), "event_id": change.get("event_id")}
+        results[index] = result
+        try:
+            pending.append((result, _change_to_request(service, calendar_id, change)))
+        except ValueError as e:
+            result.update({"status": "error", "error": str(e)})
+
+    def on_response(request_id, response, exception):
+        result = results[int(request_id)]
+        if exception is not None:
+            result.update({"status": "error", "error": str(exception)})
+            return
+        result["status"] = "ok"
+        if response and response.get("id"):
+            result["event_id"] = response["id"]
+
+    for start in range(0, len(pending), MAX_BATCH_SIZE):
+        chunk = pending[start : start + MAX_BATCH_SIZE]
+        batch = service.new_batch_http_request(callback=on_response)
+        for result, request in chunk:
+            batch.add(request, request_id=str(result["index"]))
+        try:
+            instrumentation.record_http()
+            batch.execute()
+        except BATCH_ERRORS as e:
+            for result, _ in chunk:
+                if "status" not in result:
+                    result.update({"status": "error", "error": str(e)})
+
+    if pending:
+        calendar_sync.mark_stale(calendar_id)
+
+    applied_count = sum(1 for result in results if result["status"] == "ok")
+    return {
+        "applied": applied_count,
+        "failed": len(results) - applied_count,
+        "results": results,
+    }
+
+
+# Trace every tool call when TOOL_TRACE is set (see tools/instrumentation.py)
+instrumentation.instrument_module(
+    sys.modules[__name__],
+    [
+        "get_calendars",
+        "create_calendar",
+        "get_events",
+        "get_busy_intervals",
+        "create_event",
+        "update_event",
+        "delete_event",
+        "apply_event_changes",
+    ],
+)
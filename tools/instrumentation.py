@@ -0,0 +1,267 @@
+"""
+Per-call tracing of the ToDoist and Google Calendar tools.
+
+`instrument_module` wraps the tool functions of a module. When tracing is
+enabled, every call gets a span that records:
+- wall time;
+- the HTTP requests it made, with bytes sent and received;
+- retries and HTTP 429 responses;
+- cache hits and misses;
+- the ADK agent that called it.
+
+The HTTP client, the caches and the calendar request builder report into
+the span of the call that is running. Nested tool calls get child spans,
+and their counters roll up into the parent. The calling agent is recorded
+by the `tag_agent` before-tool callback registered on every agent.
+
+Spans are appended to a JSONL trace file or exported as OpenTelemetry
+spans, and totals per agent are kept in memory (`get_stats_by_agent`).
+
+Configuration (environment variables):
+    TOOL_TRACE: "off" (default), "jsonl" or "otel".
+    TOOL_TRACE_PATH: JSONL trace file (default tool_trace.jsonl).
+"""
+
+import contextvars
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from functools import wraps
+from typing import Dict, List, Optional
+
+COUNTERS = (
+    "http_requests",
+    "bytes_out",
+    "bytes_in",
+    "retries",
+    "rate_limited",
+    "cache_hits",
+    "cache_misses",
+)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "tool_span", default=None
+)
+_current_agent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "tool_agent", default=None
+)
+_write_lock = threading.Lock()
+_totals_lock = threading.Lock()
+# agent -> tool -> summed counters
+_totals: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+
+def get_mode() -> str:
+    """Get the trace export mode: "off", "jsonl" or "otel"."""
+    return os.getenv("TOOL_TRACE", "off").lower()
+
+
+def is_enabled() -> bool:
+    """Returns True if tool calls should be traced."""
+    return get_mode() in ("jsonl", "otel")
+
+
+def get_trace_path() -> str:
+    """Get the path of the JSONL trace file."""
+    return os.getenv("TOOL_TRACE_PATH", "tool_trace.jsonl")
+
+
+class Span:
+    """The counters of one traced tool call."""
+
+    def __init__(self, tool: str, agent: Optional[str], parent: Optional["Span"]):
+        self.tool = tool
+        self.agent = agent
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:16]
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.counters[name] += value
+
+
+def record(**counts):
+    """Adds counts (e.g. http_requests=1, bytes_in=512) to the running span."""
+    span = _current_span.get()
+    if span is not None:
+        span.add(**counts)
+
+
+def record_http(bytes_out: int = 0, bytes_in: int = 0):
+    """Records one HTTP request made by the running tool call."""
+    record(http_requests=1, bytes_out=bytes_out, bytes_in=bytes_in)
+
+
+def record_cache(hit: bool):
+    """Records a cache lookup made by the running tool call."""
+    record(**{"cache_hits" if hit else "cache_misses": 1})
+
+
+def bind(func):
+    """
+    Binds a function to the running span and agent, for work handed to a
+    thread pool. Worker threads do not inherit context variables, so
+    without this their HTTP requests would not be counted.
+    """
+    span = _current_span.get()
+    agent = _current_agent.get()
+    if span is None:
+        return func
+
+    @wraps(func)
+    def bound(*args, **kwargs):
+        span_token = _current_span.set(span)
+        agent_token = _current_agent.set(agent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_span.reset(span_token)
+            _current_agent.reset(agent_token)
+
+    return bound
+
+
+def tag_agent(tool, args, tool_context):
+    """
+    ADK before_tool_callback that records which agent is calling a tool.
+    Returns None so the tool call proceeds unchanged.
+    """
+    _current_agent.set(getattr(tool_context, "agent_name", None))
+    return None
+
+
+def _export_jsonl(entry: Dict):
+    with _write_lock, open(get_trace_path(), "a") as trace:
+        trace.write(json.dumps(entry) + "\n")
+
+
+def _export_otel(entry: Dict, start_ns: int, end_ns: int):
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print("opentelemetry is not installed, writing the tool trace as JSONL instead.")
+        _export_jsonl(entry)
+        return
+    tracer = trace.get_tracer("todoist_adk.tools")
+    span = tracer.start_span(f"tool {entry['tool']}", start_time=start_ns)
+    for name, value in entry.items():
+        if value is not None and name not in ("ts", "tool"):
+            span.set_attribute(f"tool.{name}", value)
+    span.end(end_time=end_ns)
+
+
+def _finish(span: Span, start_ns: int, error: bool):
+    end_ns = time.time_ns()
+    wall_ms = (end_ns - start_ns) / 1e6
+    if span.parent is not None:
+        span.parent.add(**span.counters)
+
+    entry = {
+        "ts": start_ns / 1e9,
+        "tool": span.tool,
+        "agent": span.agent,
+        "span_id": span.span_id,
+        "parent_id": span.parent.span_id if span.parent else None,
+        "wall_ms": round(wall_ms, 3),
+        "error": error,
+        **span.counters,
+    }
+    if span.parent is None:
+        with _totals_lock:
+            tool_totals = _totals.setdefault(span.agent or "unknown", {}).setdefault(
+                span.tool, dict.fromkeys(("calls", "wall_ms") + COUNTERS, 0)
+            )
+            tool_totals["calls"] += 1
+            tool_totals["wall_ms"] += wall_ms
+            for name, value in span.counters.items():
+                tool_totals[name] += value
+
+    if get_mode() == "otel":
+        _export_otel(entry, start_ns, end_ns)
+    else:
+        _export_jsonl(entry)
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, dict) and "error" in result
+
+
+def traced(func):
+    """A decorator that traces each call of a sync or async tool."""
+
+    def start():
+        parent = _current_span.get()
+        span = Span(func.__name__, _current_agent.get(), parent)
+        return span, _current_span.set(span), time.time_ns()
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return await func(*args, **kwargs)
+            span, token, start_ns = start()
+            error = True
+            try:
+                result = await func(*args, **kwargs)
+                error = _is_error(result)
+                return result
+            finally:
+                _current_span.reset(token)
+                _finish(span, start_ns, error)
+
+    else:
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            span, token, start_ns = start()
+            error = True
+            try:
+                result = func(*args, **kwargs)
+                error = _is_error(result)
+                return result
+            finally:
+                _current_span.reset(token)
+                _finish(span, start_ns, error)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def instrument_module(module, names: List[str]):
+    """
+    Replaces the named functions of a module with traced wrappers, so that
+    every importer, and the module's own calls, go through the tracer.
+    """
+    for name in names:
+        func = getattr(module, name)
+        if not getattr(func, "__traced__", False):
+            setattr(module, name, traced(func))
+
+
+def get_stats_by_agent() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Returns summed counters of top-level tool calls, per agent and tool.
+
+    Returns:
+        Dict: agent -> tool -> calls, wall_ms and every counter.
+    """
+    with _totals_lock:
+        return {
+            agent: {tool: dict(counters) for tool, counters in tools.items()}
+            for agent, tools in _totals.items()
+        }
+
+
+def reset_stats():
+    """Clears the in-memory per-agent totals."""
+    with _totals_lock:
+        _totals.clear()
@@ -0,0 +1,298 @@
+"""
+A precomputed, versioned priority snapshot of the Work project.
+
+Ranking the backlog means fetching every open task and its comments. The
+snapshot does that once and stores the result in a local JSON file with a
+version stamp:
+- the top tasks by RIN score, with their due dates and score breakdowns;
+- counts of open, overdue, due-today and stale tasks.
+
+Briefing and prioritization requests then read it with get_priority_snapshot
+instead of ranking the backlog again.
+
+A snapshot is fresh until one of these happens:
+- a ToDoist write tool calls `invalidate()`, in this or any other process
+  sharing the snapshot file;
+- a sync of the ToDoist replica receives task or comment changes;
+- the day changes;
+- it is older than TODOIST_SNAPSHOT_MAX_AGE.
+
+`invalidate()` records the time of the write in a file next to the
+snapshot, so every process reading the snapshot sees it. A stale snapshot
+is recomputed on the next read. Once the first read has
+happened, a background thread also recomputes it shortly after every
+invalidation and at the start of each day.
+
+Configuration (environment variables):
+    TODOIST_SNAPSHOT_PATH: Snapshot file (default priority_snapshot.json).
+    TODOIST_SNAPSHOT_MAX_AGE: Seconds a snapshot stays fresh (default 3600).
+    TODOIST_SNAPSHOT_BACKGROUND: Recompute in a background thread (default true).
+    TODOIST_SNAPSHOT_DEBOUNCE: Seconds to wait after a write before
+        recomputing in the background, so a burst of writes triggers one
+        recompute (default 2).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import requests
+
+from tools import instrumentation, rin_scoring
+
+# Tasks kept in the snapshot; get_priority_snapshot returns the first top_k
+SNAPSHOT_SIZE = 25
+# How often the background thread checks whether the day has changed
+CHECK_INTERVAL = 300
+
+_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+# Wall-clock time of the last ToDoist write; older snapshots are stale
+_invalidated_at = 0.0
+_wake = threading.Event()
+_stop = threading.Event()
+_worker: Optional[threading.Thread] = None
+
+
+def get_snapshot_path() -> str:
+    """Get the path of the snapshot file."""
+    return os.getenv("TODOIST_SNAPSHOT_PATH", "priority_snapshot.json")
+
+
+def get_max_age() -> float:
+    """Get how many seconds a snapshot stays fresh."""
+    return float(os.getenv("TODOIST_SNAPSHOT_MAX_AGE", "3600"))
+
+
+def is_background_enabled() -> bool:
+    """Returns True if the snapshot should be recomputed in a background thread."""
+    return os.getenv("TODOIST_SNAPSHOT_BACKGROUND", "true").lower() in ("1", "true", "yes")
+
+
+def get_debounce() -> float:
+    """Get how long the background thread waits after a write before recomputing."""
+    return float(os.getenv("TODOIST_SNAPSHOT_DEBOUNCE", "2"))
+
+
+def load_snapshot() -> Optional[Dict]:
+    """Returns the stored snapshot, or None if there is none or it is unreadable."""
+    try:
+        with open(get_snapshot_path()) as snapshot_file:
+            return json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomically(path: str, content: str):
+    # A per-process temporary file, so concurrent writers do not clobber it
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as output:
+        output.write(content)
+    os.replace(tmp_path, path)
+
+
+def _save_snapshot(snapshot: Dict):
+    _write_atomically(get_snapshot_path(), json.dumps(snapshot))
+
+
+def get_invalidation_path() -> str:
+    """Get the path of the file holding the time of the last ToDoist write."""
+    return f"{get_snapshot_path()}.invalidated"
+
+
+def _load_invalidated_at() -> float:
+    """Returns the time of the last write recorded by any process, or 0."""
+    try:
+        with open(get_invalidation_path()) as invalidation_file:
+            return float(invalidation_file.read())
+    except (OSError, ValueError):
+        return 0.0
+
+
+def is_fresh(snapshot: Optional[Dict], now: Optional[float] = None) -> bool:
+    """
+    Returns True if the snapshot was computed after the last write, today,
+    and less than TODOIST_SNAPSHOT_MAX_AGE seconds ago.
+    """
+    if not snapshot:
+        return False
+    now = now or time.time()
+    computed_at = snapshot["computed_at_ts"]
+    with _lock:
+        invalidated_at = max(_invalidated_at, _load_invalidated_at())
+    today = datetime.fromtimestamp(now).date().isoformat()
+    return (
+        computed_at > invalidated_at
+        and snapshot.get("date") == today
+        and now - computed_at < get_max_age()
+    )
+
+
+def invalidate():
+    """
+    Marks the snapshot stale after a ToDoist write, for this and every other
+    process sharing the snapshot file, and wakes the background thread.
+    """
+    global _invalidated_at
+    with _lock:
+        _invalidated_at = time.time()
+        # Without a stored snapshot there is nothing for other processes to drop
+        if os.path.exists(get_snapshot_path()):
+            try:
+                _write_atomically(get_invalidation_path(), repr(_invalidated_at))
+            except OSError as e:
+                print(f"Could not record the priority snapshot invalidation: {e}")
+    _wake.set()
+
+
+def _due_date(task: Dict) -> Optional[str]:
+    due = task.get("due") or {}
+    value = due.get("date") or due.get("datetime")
+    return value[:10] if value else None
+
+
+def compute_snapshot(analysis: list, started_at: float, version: int) -> Dict:
+    """Builds a snapshot from analyze_open_tasks records."""
+    today = datetime.fromtimestamp(started_at).date().isoformat()
+    due_dates = [_due_date(task) for task in analysis]
+    return {
+        "version": version,
+        "computed_at_ts": started_at,
+        "computed_at": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+        "date": today,
+        "counts": {
+            "open": len(analysis),
+            "overdue": sum(1 for due in due_dates if due and due < today),
+            "due_today": sum(1 for due in due_dates if due == today),
+            "stale": sum(1 for task in analysis if task.get("is_stale")),
+        },
+        "tasks": rin_scoring.rank(analysis, SNAPSHOT_SIZE),
+    }
+
+
+def refresh(force: bool = False) -> Dict:
+    """
+    Recomputes and stores the snapshot, unless another caller just did.
+
+    Args:
+        force (bool): Recompute even if the stored snapshot is fresh.
+
+    Returns:
+        Dict: The new snapshot, or an error dict if the tasks could not be
+        fetched.
+    """
+    # Imported here because both invalidate the snapshot on writes and syncs
+    from tools import todoist_sync, todoist_tools
+
+    with _refresh_lock:
+        previous = load_snapshot()
+        if not force and is_fresh(previous):
+            return previous
+
+        # Pull changes into the replica first. A sync that brings back our
+        # own writes invalidates the snapshot, and must not do so after the
+        # snapshot below was stamped.
+        if todoist_sync.is_enabled():
+            try:
+                todoist_sync.ensure_synced()
+            except requests.RequestException as e:
+                print(f"Could not sync the replica before the priority snapshot: {e}")
+
+        # Stamp the snapshot with the time the fetch started, so a write
+        # that lands while it is being computed still invalidates it.
+        started_at = time.time()
+        analysis = todoist_tools.analyze_open_tasks(todoist_tools.DEFAULT_PROJECT)
+        if not isinstance(analysis, list):
+            return analysis if isinstance(analysis, dict) else {"error": "Could not fetch open tasks"}
+
+        version = (previous or {}).get("version", 0) + 1
+        snapshot = compute_snapshot(analysis, started_at, version)
+        _save_snapshot(snapshot)
+        print(f"Priority snapshot v{version} computed from {len(analysis)} open tasks.")
+        return snapshot
+
+
+def _refresh_in_background():
+    while not _stop.is_set():
+        _wake.wait(timeout=CHECK_INTERVAL)
+        if _wake.is_set():
+            _stop.wait(timeout=get_debounce())
+            _wake.clear()
+        if not _stop.is_set() and not is_fresh(load_snapshot()):
+            try:
+                refresh()
+            except Exception as e:
+                print(f"Background priority snapshot refresh failed: {e}")
+
+
+def start_background_refresh():
+    """Starts the background refresh thread, once per process, if enabled."""
+    global _worker
+    if not is_background_enabled():
+        return
+    with _lock:
+        if _worker is None:
+            _worker = threading.Thread(
+                target=_refresh_in_background, name="priority-snapshot", daemon=True
+            )
+            _worker.start()
+
+
+def stop_background_refresh():
+    """Stops the background refresh thread, if it is running."""
+    global _worker
+    with _lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        _stop.set()
+        _wake.set()
+        worker.join()
+        _stop.clear()
+        _wake.clear()
+
+
+def get_priority_snapshot(top_k: int = 5) -> Dict:
+    """
+    Returns the precomputed priority snapshot of the Work project in one
+    cheap lookup: the top tasks ranked by RIN score (recency, due-date
+    urgency, priority, labels and subtask structure) and counts of open,
+    overdue, due-today and stale tasks. The snapshot is recomputed after
+    every ToDoist write and every synced change, so use this instead of rank_tasks or
+    get_open_tasks for briefings and "what should I do today" questions.
+
+    Args:
+        top_k (int): How many of the top tasks to return (at most 25).
+
+    Returns:
+        Dict: The snapshot `version`, `computed_at`, `counts` and `tasks`, each
+        task with its id, content, priority, due, labels, next_action,
+        days_since_activity, is_stale, score and score breakdown. `stale` is
+        True if a fresh snapshot could not be computed and an older one was
+        returned instead.
+    """
+    start_background_refresh()
+    snapshot = load_snapshot()
+    stale = False
+    if not is_fresh(snapshot):
+        refreshed = refresh()
+        if "error" not in refreshed:
+            snapshot = refreshed
+        elif snapshot is None:
+            return refreshed
+        else:
+            stale = True
+
+    return {
+        "version": snapshot["version"],
+        "computed_at": snapshot["computed_at"],
+        "stale": stale,
+        "counts": snapshot["counts"],
+        "tasks": snapshot["tasks"][: max(top_k, 0)],
+    }
+
+
+instrumentation.instrument_module(sys.modules[__name__], ["get_priority_snapshot"])
@@ -0,0 +1,206 @@
+"""
+Compact, projected tool results to keep task payloads small in the model
+context.
+
+The read tools return full task dicts, with url, created, empty
+descriptions, whole due objects and raw comments. `with_projection` wraps
+a tool so that an agent receives only the fields its projection names:
+- due objects are reduced to their date or datetime;
+- descriptions are truncated, and get_task_description fetches the full
+  text on demand;
+- comments are summarised as a count plus the latest comment;
+- subtasks are reduced to id and content;
+- empty values are dropped.
+
+With `tabular=True`, task lists are encoded as a header row plus value rows
+instead of repeating every key per task. Each agent in agents/agents.py
+chooses its own projection when it registers its tools.
+"""
+
+import inspect
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+PROJECTIONS = {
+    "minimal": ["id", "content", "priority", "due", "parent_id"],
+    "compact": [
+        "id",
+        "content",
+        "priority",
+        "due",
+        "labels",
+        "parent_id",
+        "description",
+        "comments",
+        "subtasks",
+        "next_action",
+        "last_activity_ts",
+        "days_since_activity",
+        "is_stale",
+    ],
+}
+DESCRIPTION_LIMIT = 200
+COMMENT_LIMIT = 200
+
+
+def compact_due(due: Optional[Dict]) -> Optional[str]:
+    """Reduces a due object to its datetime or date string."""
+    if not due:
+        return None
+    return due.get("datetime") or due.get("date") or due.get("string")
+
+
+def truncate(text: str, limit: int) -> str:
+    """Shortens text to `limit` characters, marking the cut with an ellipsis."""
+    if not text or len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + "…"
+
+
+def summarize_comments(comments: List[Dict], limit: int = COMMENT_LIMIT) -> Dict:
+    """Summarises comments as their count and the latest comment."""
+    if not comments:
+        return {"comment_count": 0}
+    latest = max(comments, key=lambda comment: comment.get("created") or "")
+    return {
+        "comment_count": len(comments),
+        "latest_comment": {
+            "content": truncate(latest.get("content", ""), limit),
+            "created": latest.get("created", ""),
+        },
+    }
+
+
+def project_task(
+    task: Dict, fields: List[str], description_limit: int = DESCRIPTION_LIMIT
+) -> Dict:
+    """
+    Projects a task, task details or task analysis record onto `fields`.
+
+    Returns:
+        Dict: The projected record. "description_truncated" is set when the
+        description was cut, and comments become "comment_count" and
+        "latest_comment".
+    """
+    projected = {}
+    for field in fields:
+        if field not in task:
+            continue
+        value = task[field]
+        if field == "due":
+            value = compact_due(value)
+        elif field == "description" and value and len(value) > description_limit:
+            value = truncate(value, description_limit)
+            projected["description_truncated"] = True
+        elif field == "comments":
+            projected.update(summarize_comments(value or []))
+            continue
+        elif field == "subtasks":
+            value = [
+                {"id": str(subtask.get("id")), "content": subtask.get("content", "")}
+                for subtask in value or []
+            ]
+        # Explicit checks, so 0 (e.g. days_since_activity) is kept
+        if value is None or value is False or value in ("", [], {}):
+            continue
+        projected[field] = value
+    return projected
+
+
+def to_table(records: List[Dict]) -> Dict[str, List]:
+    """
+    Encodes records as {"columns": [...], "rows": [[...], ...]}, so each
+    key is sent once instead of once per record.
+    """
+    columns: Dict[str, None] = {}
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    return {
+        "columns": list(columns),
+        "rows": [[record.get(column) for column in columns] for record in records],
+    }
+
+
+def project_result(
+    result: Any,
+    projection: str = "compact",
+    tabular: bool = False,
+    description_limit: int = DESCRIPTION_LIMIT,
+) -> Any:
+    """
+    Applies a projection to a tool result: a task, a list of tasks, or a
+    mapping of names to task lists. Error dicts and other values are
+    returned unchanged.
+    """
+    fields = PROJECTIONS.get(projection)
+    if fields is None:
+        return result
+    if isinstance(result, dict) and "id" in result:
+        return project_task(result, fields, description_limit)
+    if isinstance(result, list) and all(isinstance(item, dict) for item in result):
+        records = [project_task(item, fields, description_limit) for item in result]
+        return to_table(records) if tabular else records
+    if isinstance(result, dict) and result and all(
+        isinstance(value, list) for value in result.values()
+    ):
+        return {
+            name: project_result(tasks, projection, tabular, description_limit)
+            for name, tasks in result.items()
+        }
+    return result
+
+
+def with_projection(
+    tool,
+    projection: str = "compact",
+    tabular: bool = False,
+    description_limit: int = DESCRIPTION_LIMIT,
+):
+    """
+    Wraps a read tool so its results are projected before they reach the
+    model. The wrapper keeps the tool's name, signature and docstring, so it
+    can be registered with an agent in place of the tool.
+
+    Args:
+        tool: A sync or async tool function returning a task or a task list.
+        projection (str): "minimal", "compact" or "full" (unchanged).
+        tabular (bool): Encode task lists as columns plus rows.
+        description_limit (int): Descriptions longer than this are truncated.
+    """
+    if projection not in PROJECTIONS and projection != "full":
+        raise ValueError(f"Unknown projection '{projection}'")
+
+    def project(result):
+        return project_result(result, projection, tabular, description_limit)
+
+    if inspect.iscoroutinefunction(tool):
+
+        @wraps(tool)
+        async def wrapper(*args, **kwargs):
+            return project(await tool(*args, **kwargs))
+
+    else:
+
+        @wraps(tool)
+        def wrapper(*args, **kwargs):
+            return project(tool(*args, **kwargs))
+
+    notes = []
+    if tabular:
+        notes.append(
+            'Task lists are returned as {"columns": [...], "rows": [[...], ...]}.'
+        )
+    if "description" in PROJECTIONS.get(projection, []):
+        notes.append(
+            "Long descriptions are truncated (description_truncated is true); "
+            "call get_task_description for the full text."
+        )
+    if "comments" in PROJECTIONS.get(projection, []):
+        notes.append(
+            "Comments, where included, are summarised as comment_count and "
+            "latest_comment; "
+            "call get_task_comments for all of them."
+        )
+    if notes and tool.__doc__:
+        wrapper.__doc__ = tool.__doc__.rstrip() + "\n\n    " + "\n    ".join(notes) + "\n"
+    return wrapper
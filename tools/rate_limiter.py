@@ -0,0 +1,109 @@
+"""
+Client-side rate limiting and retry policy for the ToDoist API.
+
+Every request to ToDoist first takes a token from a shared token bucket sized
+to the per-user quota, so concurrent fan-out is spread out instead of
+tripping HTTP 429. When the API does answer 429, the bucket is paused for the
+Retry-After period so every caller backs off together.
+
+Configuration (environment variables):
+    TODOIST_RATE_LIMIT: Requests allowed per period (default 1000).
+    TODOIST_RATE_PERIOD: Length of the quota period in seconds (default 900).
+    TODOIST_RATE_BURST: Requests that may be sent back to back (default 100).
+    TODOIST_MAX_RETRIES: Retries for retryable failures (default 3).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# HTTP statuses worth retrying; any other 4xx will never succeed on retry
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket shared by sync and async callers.
+
+    Callers reserve a token and are told how long to wait before using it,
+    so waiting callers are served in arrival order. Sync callers sleep;
+    async callers await, which does not block the event loop's thread.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self):
+        """Blocks the calling thread until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Waits without blocking the event loop until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stops handing out tokens for `seconds`, e.g. after an HTTP 429."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def get_max_retries() -> int:
+    """Get the number of retries for retryable failures."""
+    return int(os.getenv("TODOIST_MAX_RETRIES", "3"))
+
+
+def build_bucket() -> TokenBucket:
+    """Creates a token bucket from the configured quota."""
+    limit = float(os.getenv("TODOIST_RATE_LIMIT", "1000"))
+    period = float(os.getenv("TODOIST_RATE_PERIOD", "900"))
+    burst = float(os.getenv("TODOIST_RATE_BURST", "100"))
+    return TokenBucket(rate=limit / period, capacity=burst)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Returns a full-jitter exponential backoff delay for a retry attempt."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
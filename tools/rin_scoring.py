@@ -0,0 +1,190 @@
+"""
+Deterministic RIN scoring of ToDoist tasks.
+
+Scores every task of a backlog from the same deep-analysis records that
+analyze_open_tasks returns, so agents receive a pre-sorted shortlist with
+score breakdowns instead of ranking raw task JSON themselves. Each
+component is normalised to [0, 1] (labels to [-1, 1]) and combined with
+configurable weights:
+
+    recency:   days since the last activity, so stale work resurfaces
+    urgency:   how close (or past) the due date is
+    priority:  the Todoist priority flag (p1 = 4 in the API)
+    labels:    per-label weights, e.g. "blocker=1,someday=-1"
+    structure: next actions of parent tasks first, parent "folders" last
+
+Configuration (environment variables):
+    TODOIST_RIN_WEIGHTS: Component weights, e.g. "urgency=0.4,priority=0.3".
+    TODOIST_LABEL_WEIGHTS: Label weights, e.g. "blocker=1,someday=-1".
+"""
+
+import os
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+DEFAULT_WEIGHTS = {
+    "recency": 0.2,
+    "urgency": 0.3,
+    "priority": 0.3,
+    "labels": 0.1,
+    "structure": 0.1,
+}
+# Days after which recency and urgency saturate
+RECENCY_HORIZON_DAYS = 14
+URGENCY_HORIZON_DAYS = 14
+
+NEXT_ACTION = 1.0
+LEAF_TASK = 0.5
+PARENT_TASK = 0.0
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    """Parses "name=weight,name=weight" into a dict."""
+    weights = {}
+    for pair in value.split(","):
+        name, sep, weight = pair.partition("=")
+        if sep and name.strip():
+            weights[name.strip().lower()] = float(weight)
+    return weights
+
+
+def get_weights() -> Dict[str, float]:
+    """Get the component weights, overriding the defaults from the environment."""
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update(_parse_weights(os.getenv("TODOIST_RIN_WEIGHTS", "")))
+    return weights
+
+
+def get_label_weights() -> Dict[str, float]:
+    """Get the per-label weights from the environment."""
+    return _parse_weights(os.getenv("TODOIST_LABEL_WEIGHTS", ""))
+
+
+def _due_date(task: Dict) -> Optional[date]:
+    due = task.get("due") or {}
+    value = due.get("datetime") or due.get("date")
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def recency_scores(tasks: List[Dict]) -> List[float]:
+    """Scores 0 for activity today, rising to 1 after the recency horizon."""
+    return [
+        min(max(task.get("days_since_activity") or 0, 0) / RECENCY_HORIZON_DAYS, 1.0)
+        for task in tasks
+    ]
+
+
+def urgency_scores(tasks: List[Dict], today: date) -> List[float]:
+    """Scores 1 for due today or overdue, falling to 0 at the urgency horizon."""
+    scores = []
+    for task in tasks:
+        due = _due_date(task)
+        if due is None:
+            scores.append(0.0)
+        else:
+            days_left = (due - today).days
+            scores.append(min(max(1 - days_left / URGENCY_HORIZON_DAYS, 0.0), 1.0))
+    return scores
+
+
+def priority_scores(tasks: List[Dict]) -> List[float]:
+    """Maps Todoist priorities 1 (normal) to 4 (urgent) onto 0 to 1."""
+    return [(min(max(task.get("priority") or 1, 1), 4) - 1) / 3 for task in tasks]
+
+
+def label_scores(tasks: List[Dict], label_weights: Dict[str, float]) -> List[float]:
+    """Sums the weights of each task's labels, clipped to [-1, 1]."""
+    return [
+        min(max(sum(label_weights.get(label.lower(), 0.0) for label in task.get("labels") or []), -1.0), 1.0)
+        for task in tasks
+    ]
+
+
+def structure_scores(tasks: List[Dict]) -> List[float]:
+    """
+    Favors the next action (first open subtask) of each parent task, then
+    other leaf tasks. Parents are just folders for their subtasks.
+    """
+    next_actions = {
+        str(task["subtasks"][0].get("id")) for task in tasks if task.get("subtasks")
+    }
+    scores = []
+    for task in tasks:
+        if task.get("subtasks"):
+            scores.append(PARENT_TASK)
+        elif str(task.get("id")) in next_actions:
+            scores.append(NEXT_ACTION)
+        else:
+            scores.append(LEAF_TASK)
+    return scores
+
+
+def score_tasks(
+    tasks: List[Dict],
+    now: Optional[datetime] = None,
+    weights: Optional[Dict[str, float]] = None,
+    label_weights: Optional[Dict[str, float]] = None,
+) -> List[Dict]:
+    """
+    Computes the RIN score of every task, one component column at a time.
+
+    Args:
+        tasks (List[Dict]): Deep-analysis records as returned by analyze_open_tasks.
+        now (Optional[datetime]): The reference time. Defaults to now.
+        weights (Optional[Dict[str, float]]): Component weights. Defaults to get_weights().
+        label_weights (Optional[Dict[str, float]]): Label weights. Defaults to get_label_weights().
+
+    Returns:
+        List[Dict]: For each task, in input order, its "score" and a
+        "breakdown" of the weighted contribution of each component.
+    """
+    now = now or datetime.now(timezone.utc)
+    weights = weights if weights is not None else get_weights()
+    label_weights = label_weights if label_weights is not None else get_label_weights()
+
+    columns = {
+        "recency": recency_scores(tasks),
+        "urgency": urgency_scores(tasks, now.date()),
+        "priority": priority_scores(tasks),
+        "labels": label_scores(tasks, label_weights),
+        "structure": structure_scores(tasks),
+    }
+    results = []
+    for i in range(len(tasks)):
+        breakdown = {
+            name: round(weights.get(name, 0.0) * column[i], 4)
+            for name, column in columns.items()
+        }
+        results.append({"score": round(sum(breakdown.values()), 4), "breakdown": breakdown})
+    return results
+
+
+def rank(tasks: List[Dict], top_k: int, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Returns the top_k tasks by RIN score as compact records, highest first.
+    Ties are broken by task ID so the order is deterministic.
+    """
+    scored = score_tasks(tasks, now)
+    order = sorted(
+        range(len(tasks)), key=lambda i: (-scored[i]["score"], str(tasks[i].get("id")))
+    )
+    return [
+        {
+            "id": str(tasks[i].get("id")),
+            "content": tasks[i].get("content", ""),
+            "priority": tasks[i].get("priority", 1),
+            "due": tasks[i].get("due"),
+            "labels": tasks[i].get("labels", []),
+            "parent_id": tasks[i].get("parent_id"),
+            "next_action": tasks[i].get("next_action"),
+            "days_since_activity": tasks[i].get("days_since_activity"),
+            "is_stale": tasks[i].get("is_stale", False),
+            **scored[i],
+        }
+        for i in order[: max(top_k, 0)]
+    ]
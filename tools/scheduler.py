@@ -0,0 +1,269 @@
+"""
+Deterministic scheduling of open ToDoist tasks into free Google Calendar time.
+
+Busy time comes from a single freebusy query. It is merged into a sorted
+list of free slots within working hours, and tasks are placed greedily in
+priority order (priority, then due date, then shortest effort first) into
+the earliest slot that fits. The interval maths runs locally in
+milliseconds, so the agent makes one tool call instead of reasoning over
+events and tasks itself.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from googleapiclient.errors import HttpError
+
+from tools import google_calendar_tools, todoist_tools
+from tools.task_index import group_subtasks
+
+DEFAULT_TASK_MINUTES = 30
+# Free slots shorter than this are not worth scheduling into
+MIN_SLOT_MINUTES = 15
+
+Interval = Tuple[datetime, datetime]
+
+
+def _parse_dt(value: str) -> datetime:
+    """Parses an RFC 3339 timestamp into an aware datetime."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Sorts intervals and merges the ones that overlap or touch."""
+    merged: List[List[datetime]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def working_hours(
+    window_start: datetime, window_end: datetime, day_start: time, day_end: time
+) -> List[Interval]:
+    """Returns the working-hours interval of every day in the window."""
+    tz = window_start.tzinfo
+    hours = []
+    day = window_start.date()
+    while day <= window_end.date():
+        start = max(datetime.combine(day, day_start, tz), window_start)
+        end = min(datetime.combine(day, day_end, tz), window_end)
+        if start < end:
+            hours.append((start, end))
+        day += timedelta(days=1)
+    return hours
+
+
+def free_slots(
+    busy: List[Interval],
+    working: List[Interval],
+    min_minutes: int = MIN_SLOT_MINUTES,
+) -> List[Interval]:
+    """
+    Subtracts busy time from working hours.
+
+    Args:
+        busy (List[Interval]): Busy intervals, in any order and possibly overlapping.
+        working (List[Interval]): Sorted, non-overlapping working-hours intervals.
+        min_minutes (int): Gaps shorter than this are dropped.
+
+    Returns:
+        List[Interval]: Sorted free slots.
+    """
+    busy = merge_intervals(busy)
+    min_length = timedelta(minutes=min_minutes)
+    slots = []
+    i = 0
+    for start, end in working:
+        # Busy intervals are sorted, so skip the ones that end before this day
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        cursor = start
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] - cursor >= min_length:
+                slots.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if end - cursor >= min_length:
+            slots.append((cursor, end))
+    return slots
+
+
+def task_minutes(task: Dict, workday_minutes: int, default: int = DEFAULT_TASK_MINUTES) -> int:
+    """Returns a task's estimated effort from its Todoist duration, if set."""
+    duration = task.get("duration") or {}
+    amount = duration.get("amount")
+    if not amount:
+        return default
+    if duration.get("unit") == "day":
+        return int(amount) * workday_minutes
+    return int(amount)
+
+
+def task_due(task: Dict, tz) -> Optional[datetime]:
+    """Returns when a task is due, taking a due date as the end of that day."""
+    due = task.get("due") or {}
+    if due.get("datetime"):
+        parsed = _parse_dt(due["datetime"])
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=tz)
+    if due.get("date"):
+        return datetime.combine(date.fromisoformat(due["date"][:10]), time.max, tz)
+    return None
+
+
+def place_tasks(
+    tasks: List[Dict], slots: List[Interval], workday_minutes: int, tz
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Greedily places tasks into the earliest free slot that fits them.
+
+    Tasks are placed most important first: highest Todoist priority, then
+    earliest due date, then shortest effort. Each placement shrinks the slot
+    it used, so later tasks fill the remaining time.
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: The scheduled placements in time
+        order, and the tasks that did not fit.
+    """
+    far_future = datetime.max.replace(tzinfo=timezone.utc)
+    entries = []
+    for task in tasks:
+        minutes = task_minutes(task, workday_minutes)
+        due = task_due(task, tz)
+        entries.append((-task.get("priority", 1), due or far_future, minutes, task, due))
+    entries.sort(key=lambda entry: entry[:3])
+
+    remaining = [list(slot) for slot in slots]
+    scheduled, unscheduled = [], []
+    for _, _, minutes, task, due in entries:
+        length = timedelta(minutes=minutes)
+        for slot in remaining:
+            if slot[1] - slot[0] >= length:
+                start, end = slot[0], slot[0] + length
+                slot[0] = end
+                scheduled.append(
+                    {
+                        "task_id": str(task.get("id")),
+                        "content": task.get("content", ""),
+                        "priority": task.get("priority", 1),
+                        "start": start.isoformat(),
+                        "end": end.isoformat(),
+                        "minutes": minutes,
+                        "late": bool(due and end > due),
+                    }
+                )
+                break
+        else:
+            unscheduled.append(
+                {"task_id": str(task.get("id")), "content": task.get("content", ""), "minutes": minutes}
+            )
+
+    scheduled.sort(key=lambda placement: placement["start"])
+    return scheduled, unscheduled
+
+
+def _window_start(start_date: Optional[str], day_start: time, tz) -> datetime:
+    """Returns the start of the scheduling window, rounded up to 5 minutes."""
+    if start_date:
+        return datetime.combine(date.fromisoformat(start_date), day_start, tz)
+    now = datetime.now(tz).replace(second=0, microsecond=0)
+    return now + timedelta(minutes=-now.minute % 5)
+
+
+@todoist_tools.handle_request_exception
+def schedule_tasks_into_calendar(
+    project_name: Optional[str] = None,
+    calendar_id: str = "primary",
+    days: int = 5,
+    start_date: Optional[str] = None,
+    workday_start: str = "09:00",
+    workday_end: str = "17:00",
+    timezone_name: str = "UTC",
+    create_events: bool = False,
+) -> Dict:
+    """
+    Plans when to work on the open tasks of a project by packing them into
+    the free time of a calendar.
+
+    Args:
+        project_name (Optional[str]): The ToDoist project. If None, uses default 'Work'.
+        calendar_id (str): The calendar whose busy time is avoided, e.g. "primary".
+        days (int): How many days to schedule, starting at start_date.
+        start_date (Optional[str]): First day as YYYY-MM-DD. Defaults to now.
+        workday_start (str): Start of working hours as HH:MM.
+        workday_end (str): End of working hours as HH:MM.
+        timezone_name (str): IANA time zone of the working hours, e.g. "Europe/Berlin".
+        create_events (bool): If True, also creates a calendar event per scheduled task.
+
+    Returns:
+        Dict: "scheduled" placements (task_id, content, priority, start, end,
+        minutes, late) in time order, "unscheduled" tasks that did not fit,
+        and "free_minutes" in the window. With create_events, also "events"
+        with the apply_event_changes result. An error dict if an argument is
+        invalid or Todoist or the calendar could not be read.
+    """
+    try:
+        tz = ZoneInfo(timezone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return {"error": f"Unknown time zone '{timezone_name}'"}
+    try:
+        day_start = time.fromisoformat(workday_start)
+        day_end = time.fromisoformat(workday_end)
+    except ValueError:
+        return {"error": f"Working hours '{workday_start}'-'{workday_end}' must be HH:MM"}
+    if day_start >= day_end:
+        return {"error": "workday_start must be before workday_end"}
+    if days < 1:
+        return {"error": "days must be at least 1"}
+    try:
+        window_start = _window_start(start_date, day_start, tz)
+    except ValueError:
+        return {"error": f"start_date '{start_date}' must be YYYY-MM-DD"}
+    window_end = datetime.combine(window_start.date() + timedelta(days=days - 1), day_end, tz)
+
+    project = todoist_tools.get_project_by_name(project_name or todoist_tools.DEFAULT_PROJECT)
+    if not project or "error" in project:
+        return {"error": f"Project '{project_name or todoist_tools.DEFAULT_PROJECT}' not found"}
+    tasks = todoist_tools.list_project_tasks(project["id"])
+    # Parent tasks are done by doing their subtasks, so only leaves are scheduled
+    parents = group_subtasks(tasks)
+    tasks = [task for task in tasks if str(task.get("id")) not in parents]
+
+    try:
+        busy = google_calendar_tools.get_busy_intervals(
+            calendar_id, window_start.isoformat(), window_end.isoformat()
+        )
+    except (ValueError, HttpError) as e:
+        return {"error": f"Could not read the busy time of calendar '{calendar_id}': {e}"}
+    busy = [(_parse_dt(start), _parse_dt(end)) for start, end in busy]
+    working = working_hours(window_start, window_end, day_start, day_end)
+    slots = free_slots(busy, working)
+    workday_minutes = int(
+        (datetime.combine(date.min, day_end) - datetime.combine(date.min, day_start)).total_seconds() // 60
+    )
+    scheduled, unscheduled = place_tasks(tasks, slots, workday_minutes, tz)
+
+    result = {
+        "scheduled": scheduled,
+        "unscheduled": unscheduled,
+        "free_minutes": int(sum((end - start).total_seconds() for start, end in slots) // 60),
+    }
+    if create_events and scheduled:
+        result["events"] = google_calendar_tools.apply_event_changes(
+            calendar_id,
+            [
+                {
+                    "type": "create",
+                    "summary": placement["content"],
+                    "start": {"dateTime": placement["start"]},
+                    "end": {"dateTime": placement["end"]},
+                    "description": f"Todoist task {placement['task_id']}",
+                }
+                for placement in scheduled
+            ],
+        )
+    return result
@@ -0,0 +1,381 @@
+"""
+Local evaluation of Todoist filter expressions.
+
+query_tasks sends filters to the API's `filter` parameter. When the sync
+replica is enabled, the same expressions are compiled here and run over the
+replicated tasks, so no request is needed. The supported subset of the
+Todoist filter language is:
+
+    p1 .. p4                  priority (p1 is the highest)
+    today, tomorrow, overdue  due dates; overdue includes times earlier today
+    no date, no due date      tasks without a due date
+    7 days, next 7 days       due today or in the following N - 1 days
+    due before: YYYY-MM-DD    also `due after:`; today/tomorrow are accepted
+    recurring                 recurring due dates
+    @label, no labels         labels
+    #Project, ##Project       project by name; ## includes its sub-projects
+    subtask                   tasks with a parent (`!subtask` for top level)
+    search: text              text in the task content
+    &, |, !, ( )              and, or, not, grouping
+
+A backslash escapes an operator character inside a name, as in the API, e.g.
+`#R\\&D`; use `escape()` to build such terms. Anything else raises
+ValueError, and query_tasks then falls back to the API. That includes
+comma-separated filters ("today, overdue"), which the REST API rejects too.
+
+`select` runs a query over a FilterIndex of the replicated tasks. Priority,
+due date, label, project and subtask terms are looked up in the index, so
+only the tasks they select are evaluated.
+"""
+
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+Predicate = Callable[[Dict], bool]
+# Returns the IDs of the tasks in a FilterIndex a term may match
+Lookup = Callable[["FilterIndex"], Set[str]]
+
+_TOKEN_RE = re.compile(r"\s*(?<!\\)([&|!(),])\s*")
+_SPECIAL_RE = re.compile(r"([&|!(),\\])")
+_ESCAPED_RE = re.compile(r"\\(.)")
+
+
+def escape(name: str) -> str:
+    """Escapes the operator characters in a project or label name."""
+    return _SPECIAL_RE.sub(r"\\\1", name)
+
+
+def _unescape(name: str) -> str:
+    return _ESCAPED_RE.sub(r"\1", name)
+
+
+def _tokenize(query: str) -> List[str]:
+    tokens = []
+    for part in _TOKEN_RE.split(query):
+        part = part.strip()
+        if part:
+            tokens.append(part)
+    return tokens
+
+
+def _due_date(task: Dict) -> Optional[date]:
+    due = task.get("due") or {}
+    value = due.get("date") or due.get("datetime")
+    return date.fromisoformat(value[:10]) if value else None
+
+
+def _parse_day(value: str, today: date) -> date:
+    value = value.strip().lower()
+    if value == "today":
+        return today
+    if value == "tomorrow":
+        return today + timedelta(days=1)
+    if value == "yesterday":
+        return today - timedelta(days=1)
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Unsupported date '{value}'") from None
+
+
+def _is_overdue(task: Dict, today: date, now: datetime) -> bool:
+    """Returns True if a task's due date, or due time today, has passed."""
+    due = task.get("due") or {}
+    day = _due_date(task)
+    if day is None:
+        return False
+    if day != today or not due.get("datetime"):
+        return day < today
+    due_at = datetime.fromisoformat(due["datetime"].replace("Z", "+00:00"))
+    if due_at.tzinfo is None:
+        return due_at < now.replace(tzinfo=None)
+    return due_at < now.astimezone()
+
+
+def _descendants(project_id: str, project_parents: Dict[str, Optional[str]]) -> set:
+    """Returns a project's ID and the IDs of all its sub-projects."""
+    project_ids = {project_id}
+    added = True
+    while added:
+        children = {pid for pid, parent in project_parents.items() if parent in project_ids}
+        added = bool(children - project_ids)
+        project_ids |= children
+    return project_ids
+
+
+def _due_between(start: date, end: date) -> Predicate:
+    def predicate(task):
+        due = _due_date(task)
+        return due is not None and start <= due <= end
+
+    return predicate
+
+
+class FilterIndex:
+    """
+    Open tasks indexed by the fields filter terms select on, so `select`
+    only evaluates a query on the tasks its terms can match.
+    """
+
+    def __init__(self, tasks: List[Dict]):
+        self.tasks: Dict[str, Dict] = {}
+        self.positions: Dict[str, int] = {}
+        self.by_project: Dict[str, Set[str]] = defaultdict(set)
+        self.by_priority: Dict[int, Set[str]] = defaultdict(set)
+        self.by_label: Dict[str, Set[str]] = defaultdict(set)
+        self.subtasks: Set[str] = set()
+        self.no_due: Set[str] = set()
+        # (due date, task ID) pairs sorted by date, for due ranges
+        self._due: List[tuple] = []
+        for position, task in enumerate(tasks):
+            task_id = str(task["id"])
+            self.tasks[task_id] = task
+            self.positions[task_id] = position
+            self.by_project[str(task.get("project_id"))].add(task_id)
+            self.by_priority[task.get("priority", 1)].add(task_id)
+            for label in task.get("labels") or []:
+                self.by_label[label.lower()].add(task_id)
+            if task.get("parent_id"):
+                self.subtasks.add(task_id)
+            due = _due_date(task)
+            if due is None:
+                self.no_due.add(task_id)
+            else:
+                self._due.append((due, task_id))
+        self._due.sort()
+
+    def due_between(self, start: date, end: date) -> Set[str]:
+        """Returns the IDs of tasks due from `start` to `end`, inclusive."""
+        first = bisect_left(self._due, (start, ""))
+        last = bisect_left(self._due, (end + timedelta(days=1), "")) if end < date.max else len(self._due)
+        return {task_id for _, task_id in self._due[first:last]}
+
+
+def _term(
+    term: str,
+    today: date,
+    now: datetime,
+    project_ids: Dict[str, str],
+    project_parents: Optional[Dict[str, Optional[str]]],
+) -> Tuple[Predicate, Optional[Lookup]]:
+    """
+    Compiles a single filter term into a predicate and, when a FilterIndex
+    can narrow it down, a lookup of the task IDs it may match.
+    """
+    lowered = term.lower()
+
+    match = re.fullmatch(r"p([1-4])", lowered)
+    if match:
+        priority = 5 - int(match.group(1))
+        return (lambda task: task.get("priority", 1) == priority), (lambda index: index.by_priority.get(priority, set()))
+
+    if lowered in ("today", "tomorrow"):
+        day = today + timedelta(days=int(lowered == "tomorrow"))
+        return _due_between(day, day), (lambda index: index.due_between(day, day))
+    if lowered == "overdue":
+        # Tasks due today may be overdue by their time; the predicate decides
+        return (lambda task: _is_overdue(task, today, now)), (lambda index: index.due_between(date.min, today))
+    if lowered in ("no date", "no due date"):
+        return (lambda task: not task.get("due")), (lambda index: index.no_due)
+    if lowered == "recurring":
+        return (lambda task: bool((task.get("due") or {}).get("is_recurring"))), None
+
+    match = re.fullmatch(r"(?:next )?(\d+) days", lowered)
+    if match:
+        end = today + timedelta(days=int(match.group(1)) - 1)
+        return _due_between(today, end), (lambda index: index.due_between(today, end))
+
+    match = re.fullmatch(r"due (before|after):\s*(.+)", lowered)
+    if match:
+        day = _parse_day(match.group(2), today)
+        if match.group(1) == "before":
+            return (
+                (lambda task: (_due_date(task) or date.max) < day),
+                (lambda index: index.due_between(date.min, day - timedelta(days=1))),
+            )
+        return (
+            (lambda task: (_due_date(task) or date.min) > day),
+            (lambda index: index.due_between(day + timedelta(days=1), date.max)),
+        )
+
+    if lowered == "no labels":
+        return (lambda task: not task.get("labels")), None
+    if term.startswith("@"):
+        label = _unescape(lowered[1:])
+        return (
+            (lambda task: label in (name.lower() for name in task.get("labels") or [])),
+            (lambda index: index.by_label.get(label, set())),
+        )
+
+    if term.startswith("#"):
+        name = _unescape(term.lstrip("#").strip())
+        if name.lower() not in project_ids:
+            raise ValueError(f"Project '{name}' not found")
+        project_id = project_ids[name.lower()]
+        if not term.startswith("##"):
+            tree = {project_id}
+        elif project_parents is None:
+            raise ValueError(f"Sub-projects of '{name}' are not known")
+        else:
+            tree = _descendants(project_id, project_parents)
+        return (
+            (lambda task: str(task.get("project_id")) in tree),
+            (lambda index: set().union(*(index.by_project.get(pid, set()) for pid in tree))),
+        )
+
+    if lowered == "subtask":
+        return (lambda task: bool(task.get("parent_id"))), (lambda index: index.subtasks)
+
+    match = re.fullmatch(r"search:\s*(.+)", term, flags=re.IGNORECASE)
+    if match:
+        text = _unescape(match.group(1)).lower()
+        return (lambda task: text in (task.get("content") or "").lower()), None
+
+    raise ValueError(f"Unsupported filter term '{term}'")
+
+
+def _all_of(lookups: List[Optional[Lookup]]) -> Optional[Lookup]:
+    """Candidates of an `&`: the intersection of the terms that have a lookup."""
+    known = [lookup for lookup in lookups if lookup is not None]
+    if not known:
+        return None
+
+    def intersection(index):
+        candidates = sorted((lookup(index) for lookup in known), key=len)
+        return candidates[0].intersection(*candidates[1:])
+
+    return intersection
+
+
+def _any_of(lookups: List[Optional[Lookup]]) -> Optional[Lookup]:
+    """Candidates of an `|`: the union, unless a term could match any task."""
+    if any(lookup is None for lookup in lookups):
+        return None
+    return lambda index: set().union(*(lookup(index) for lookup in lookups))
+
+
+def _compile(
+    query: str,
+    project_ids: Optional[Dict[str, str]],
+    today: Optional[date],
+    project_parents: Optional[Dict[str, Optional[str]]],
+    now: Optional[datetime],
+) -> Tuple[Predicate, Optional[Lookup]]:
+    """Parses a filter expression into its predicate and candidate lookup."""
+    tokens = _tokenize(query)
+    now = now or datetime.now()
+    today = today or now.date()
+    project_ids = project_ids or {}
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        alternatives = [parse_and()]
+        while peek() == "|":
+            take()
+            alternatives.append(parse_and())
+        predicates = [predicate for predicate, _ in alternatives]
+        return (lambda task: any(p(task) for p in predicates)), _any_of([lookup for _, lookup in alternatives])
+
+    def parse_and():
+        conditions = [parse_not()]
+        while peek() == "&":
+            take()
+            conditions.append(parse_not())
+        predicates = [predicate for predicate, _ in conditions]
+        return (lambda task: all(p(task) for p in predicates)), _all_of([lookup for _, lookup in conditions])
+
+    def parse_not():
+        token = peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of filter '{query}'")
+        if token == "!":
+            take()
+            inner, _ = parse_not()
+            return (lambda task: not inner(task)), None
+        if token == "(":
+            take()
+            inner = parse_or()
+            if peek() != ")":
+                raise ValueError(f"Missing ')' in filter '{query}'")
+            take()
+            return inner
+        if token == ",":
+            raise ValueError(f"Comma-separated filters are not supported by the API; use '|' in '{query}'")
+        if token in ("&", "|", ")"):
+            raise ValueError(f"Unexpected '{token}' in filter '{query}'")
+        return _term(take(), today, now, project_ids, project_parents)
+
+    compiled = parse_or()
+    if position != len(tokens):
+        token = tokens[position]
+        if token == ",":
+            raise ValueError(f"Comma-separated filters are not supported by the API; use '|' in '{query}'")
+        raise ValueError(f"Unexpected '{token}' in filter '{query}'")
+    return compiled
+
+
+def compile_filter(
+    query: str,
+    project_ids: Optional[Dict[str, str]] = None,
+    today: Optional[date] = None,
+    project_parents: Optional[Dict[str, Optional[str]]] = None,
+    now: Optional[datetime] = None,
+) -> Predicate:
+    """
+    Compiles a Todoist filter expression into a predicate over REST-shaped tasks.
+
+    Args:
+        query (str): The filter expression, e.g. "(today | overdue) & p1".
+        project_ids (Optional[Dict[str, str]]): Lower-cased project name -> ID,
+            for `#Project` terms.
+        today (Optional[date]): The reference date. Defaults to today.
+        project_parents (Optional[Dict[str, Optional[str]]]): Project ID ->
+            parent project ID, for `##Project` terms. Without it they raise
+            ValueError.
+        now (Optional[datetime]): The reference time for due times today.
+            Defaults to now.
+
+    Raises:
+        ValueError: If the expression is malformed or uses an unsupported term.
+    """
+    predicate, _ = _compile(query, project_ids, today, project_parents, now)
+    return predicate
+
+
+def select(
+    query: str,
+    index: FilterIndex,
+    project_ids: Optional[Dict[str, str]] = None,
+    today: Optional[date] = None,
+    project_parents: Optional[Dict[str, Optional[str]]] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict]:
+    """
+    Returns the indexed tasks matching a filter expression, in index order.
+
+    The expression is only evaluated on the tasks its priority, due date,
+    label, project and subtask terms select from the index, so the cost
+    grows with the result rather than the backlog. Queries whose terms
+    cannot be narrowed down, such as a lone `!p1` or `search:`, scan every
+    task. Arguments are those of `compile_filter`.
+
+    Raises:
+        ValueError: If the expression is malformed or uses an unsupported term.
+    """
+    predicate, lookup = _compile(query, project_ids, today, project_parents, now)
+    if lookup is None:
+        candidates = index.tasks.values()
+    else:
+        candidates = [index.tasks[task_id] for task_id in sorted(lookup(index), key=index.positions.__getitem__)]
+    return [task for task in candidates if predicate(task)]
@@ -0,0 +1,110 @@
+"""
+In-memory index of open ToDoist tasks.
+
+Every task listing of a project is indexed into a task_id -> task map and a
+parent_id -> children map, so subtask and task lookups can be answered
+locally without another request. The write tools call `invalidate_index()`
+so the index never serves data older than our own changes. Changes made
+elsewhere are picked up once a listing is older than TODOIST_TASK_INDEX_TTL
+seconds, after which its project is listed again.
+
+Configuration (environment variables):
+    TODOIST_TASK_INDEX_TTL: Seconds a listing stays indexed (default: the
+        value of TODOIST_METADATA_CACHE_TTL, or 300).
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# project_id -> {"tasks": {task_id: task}, "children": {parent_id: [task]},
+#                "indexed_at": monotonic time of the listing}
+_indexes: Dict[str, Dict] = {}
+# task_id -> project_id, for finding the index that holds a task
+_task_projects: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def get_max_age() -> float:
+    """Get how many seconds a project listing stays indexed."""
+    return float(os.getenv("TODOIST_TASK_INDEX_TTL", os.getenv("TODOIST_METADATA_CACHE_TTL", "300")))
+
+
+def group_subtasks(tasks: List[Dict]) -> Dict[str, List[Dict]]:
+    """Groups open tasks by parent ID, keeping each group in Todoist order."""
+    children: Dict[str, List[Dict]] = {}
+    for task in tasks:
+        parent_id = task.get("parent_id")
+        if parent_id and not task.get("is_completed", False):
+            children.setdefault(str(parent_id), []).append(task)
+    for siblings in children.values():
+        siblings.sort(key=lambda t: t.get("order", 0))
+    return children
+
+
+def index_project_tasks(project_id: str, tasks: List[Dict]):
+    """
+    Indexes a full task listing of a project, replacing any earlier listing
+    of the same project.
+
+    Args:
+        project_id (str): The ID of the project the tasks were listed from.
+        tasks (List[Dict]): Raw task objects as returned by the API.
+    """
+    project_id = str(project_id)
+    tasks_by_id = {str(task.get("id")): task for task in tasks}
+    children = group_subtasks(tasks)
+
+    with _lock:
+        previous = _indexes.get(project_id)
+        if previous:
+            for task_id in previous["tasks"]:
+                _task_projects.pop(task_id, None)
+        _indexes[project_id] = {"tasks": tasks_by_id, "children": children, "indexed_at": time.monotonic()}
+        for task_id in tasks_by_id:
+            _task_projects[task_id] = project_id
+
+
+def _project_index(task_id: str) -> Optional[Dict]:
+    """Returns the index holding a task, dropping it if it expired. Call with `_lock` held."""
+    project_id = _task_projects.get(task_id)
+    if project_id is None:
+        return None
+    index = _indexes[project_id]
+    if time.monotonic() - index["indexed_at"] > get_max_age():
+        del _indexes[project_id]
+        for indexed_id in index["tasks"]:
+            _task_projects.pop(indexed_id, None)
+        return None
+    return index
+
+
+def get_indexed_task(task_id: str) -> Optional[Dict]:
+    """Returns the raw task from the index, or None if it is not indexed."""
+    task_id = str(task_id)
+    with _lock:
+        index = _project_index(task_id)
+        return index["tasks"].get(task_id) if index else None
+
+
+def get_indexed_subtasks(task_id: str) -> Optional[List[Dict]]:
+    """
+    Returns the open subtasks of a task from the index.
+
+    Returns:
+        Optional[List[Dict]]: The subtasks in Todoist order, or None if the
+        parent task is not indexed or its listing expired (callers should
+        then fetch and index its project).
+    """
+    task_id = str(task_id)
+    with _lock:
+        index = _project_index(task_id)
+        return list(index["children"].get(task_id, [])) if index else None
+
+
+def invalidate_index():
+    """Drops every indexed project. Called after any task write."""
+    with _lock:
+        _indexes.clear()
+        _task_projects.clear()
@@ -0,0 +1,355 @@
+"""
+Async (asyncio) variants of the read-only ToDoist tools.
+
+These functions have the same names, arguments and return values as their
+counterparts in todoist_tools.py, so an agent can register them in place of
+the sync versions. Google ADK awaits async tools on its own event loop, which
+lets many per-task lookups run concurrently. Concurrency is bounded by the
+TODOIST_MAX_CONCURRENCY semaphore in todoist_client. With TODOIST_USE_SYNC
+enabled, they read from the sync replica like the sync tools, syncing and
+querying it in worker threads so the event loop is never blocked.
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, List, Optional, Union
+
+import httpx
+import requests
+
+from tools import (
+    fetch_cache,
+    instrumentation,
+    rin_scoring,
+    task_index,
+    todoist_client,
+    todoist_sync,
+    tool_memo,
+)
+from tools.task_index import group_subtasks
+from tools.todoist_tools import (
+    DEFAULT_PROJECT,
+    build_task_analysis,
+    build_task_details,
+    format_task,
+    latest_activity_ts,
+    metadata_cache,
+    request_error,
+)
+from tools.ttl_cache import ttl_cached
+
+
+def async_handle_request_exception(func):
+    """The async counterpart of todoist_tools.handle_request_exception."""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except (httpx.HTTPError, requests.exceptions.RequestException) as e:
+            return request_error(e)
+
+    return wrapper
+
+
+async def _get_json(path: str):
+    """Fetches a path from the ToDoist API and returns the decoded JSON."""
+    response = await todoist_client.get_async(path)
+    response.raise_for_status()
+    return response.json()
+
+
+async def _use_replica() -> bool:
+    """Returns True if reads should come from the sync replica, syncing it first."""
+    if not todoist_sync.is_enabled():
+        return False
+    await asyncio.to_thread(todoist_sync.ensure_synced)
+    return True
+
+
+async def _list_project_tasks(project_id: str) -> List[Dict]:
+    """Lists every open task of a project and indexes the result."""
+    if await _use_replica():
+        tasks = await asyncio.to_thread(todoist_sync.get_project_tasks, project_id)
+    else:
+        tasks = await _get_json(f"/tasks?project_id={project_id}")
+    task_index.index_project_tasks(project_id, tasks)
+    return tasks
+
+
+async def _fetch_task(task_id: str) -> Dict:
+    """Fetches a single raw task, at most once per session."""
+    if await _use_replica():
+        task = await asyncio.to_thread(todoist_sync.get_task, task_id)
+        if task is not None:
+            return task
+
+    task = fetch_cache.get_task_body(task_id)
+    if task is None:
+        task = await _get_json(f"/tasks/{task_id}")
+        fetch_cache.set_task_body(task_id, task)
+    return task
+
+
+async def _get_task(task_id: str) -> Dict:
+    """Returns a raw task from the task index, or fetches it."""
+    task = task_index.get_indexed_task(task_id)
+    if task is None:
+        task = await _fetch_task(task_id)
+    return task
+
+
+async def _fetch_comments(task_id: str) -> List[Dict]:
+    """Fetches the comments of a task, at most once per session."""
+    if await _use_replica():
+        return await asyncio.to_thread(todoist_sync.get_task_comments, task_id)
+
+    comments = fetch_cache.get_comments(task_id)
+    if comments is None:
+        comments = await _get_json(f"/comments?task_id={task_id}")
+        fetch_cache.set_comments(task_id, comments)
+    return comments
+
+
+async def _resolve_last_activity_ts(task_id: str) -> str:
+    """Computes the last activity timestamp from the task and its comments."""
+    task, comments = await asyncio.gather(_get_task(task_id), _fetch_comments(task_id))
+    return latest_activity_ts(task, comments)
+
+
+@ttl_cached(metadata_cache)
+@async_handle_request_exception
+async def get_projects() -> Union[List[Dict], Dict]:
+    """
+    Get all projects, or an error dict if the API request failed. Shares the
+    metadata cache with the sync tools.
+    """
+    if await _use_replica():
+        return await asyncio.to_thread(todoist_sync.get_projects)
+    return await _get_json("/projects")
+
+
+async def get_project_by_name(project_name: str) -> Optional[Dict]:
+    """Get a project by its name."""
+    projects = await get_projects()
+    if isinstance(projects, dict):
+        return projects
+
+    for project in projects:
+        if project.get("name", "").lower() == project_name.lower():
+            return project
+
+    return None
+
+
+@async_handle_request_exception
+@tool_memo.memoized("projects", "tasks")
+async def get_open_tasks(project_name: Optional[str] = None) -> Union[List[Dict], Dict]:
+    """
+    Fetches all open tasks from the Work project in ToDoist.
+
+    Args:
+        project_name (Optional[str]): The name of the project to fetch tasks from. If None, uses default 'Work'.
+
+    Returns:
+        Union[List[Dict], Dict]: A list of task objects with their details.
+        An error dict is returned instead if the API request failed.
+    """
+    project_to_use = project_name if project_name else DEFAULT_PROJECT
+    project = await get_project_by_name(project_to_use)
+    if not project or "error" in project:
+        print(
+            f"Project '{project_to_use}' not found. Please create a project named '{project_to_use}' in ToDoist."
+        )
+        return []
+
+    tasks = await _list_project_tasks(project["id"])
+    return [format_task(task) for task in tasks]
+
+
+@async_handle_request_exception
+@tool_memo.memoized("task:{task_id}")
+async def get_task_comments(task_id: str) -> Union[List[Dict], Dict]:
+    """
+    Fetches all comments for a specific task.
+
+    Args:
+        task_id (str): The ID of the task to get comments for.
+
+    Returns:
+        Union[List[Dict], Dict]: A list of comment objects.
+        An error dict is returned instead if the API request failed.
+    """
+    return await _fetch_comments(task_id)
+
+
+@async_handle_request_exception
+@tool_memo.memoized("tasks")
+async def get_task_subtasks(task_id: str) -> Union[List[Dict], Dict]:
+    """
+    Fetches all subtasks for a specific task.
+
+    Subtasks are answered from the task index when possible. If the task has
+    not been indexed yet, its project is listed once and indexed.
+
+    Args:
+        task_id (str): The ID of the task to get subtasks for.
+
+    Returns:
+        Union[List[Dict], Dict]: A list of subtask objects.
+        An error dict is returned instead if the API request failed.
+    """
+    subtasks = task_index.get_indexed_subtasks(task_id)
+    if subtasks is not None:
+        return subtasks
+
+    task = await _fetch_task(task_id)
+    await _list_project_tasks(task["project_id"])
+    return task_index.get_indexed_subtasks(task_id) or []
+
+
+@async_handle_request_exception
+@tool_memo.memoized("tasks", "task:{task_id}")
+async def get_task_details(task_id: str) -> Dict:
+    """
+    Gets comprehensive details for a specific task including comments and subtasks.
+
+    The task and its subtasks come from the task index when possible, and
+    the comments are fetched concurrently with any index refresh.
+
+    Args:
+        task_id (str): The ID of the task to get details for.
+
+    Returns:
+        Dict: Comprehensive task details including comments and subtasks.
+    """
+    task = task_index.get_indexed_task(task_id)
+    if task is None:
+        task, comments = await asyncio.gather(
+            _fetch_task(task_id), _fetch_comments(task_id)
+        )
+        await _list_project_tasks(task["project_id"])
+    else:
+        comments = await _fetch_comments(task_id)
+
+    subtasks = task_index.get_indexed_subtasks(task_id) or []
+    return build_task_details(task, comments, subtasks)
+
+
+@async_handle_request_exception
+@tool_memo.memoized("task:{task_id}")
+async def get_last_activity_ts(task_id: str) -> Union[str, Dict]:
+    """
+    Gets the ISO 8601 timestamp of the last activity on a task.
+    Activity is defined as the task's creation date or the date of the most recent comment.
+    This helps determine how "stale" a task is.
+    Returns an error dict if the API request failed.
+    """
+    return await _resolve_last_activity_ts(task_id)
+
+
+@async_handle_request_exception
+@tool_memo.memoized("tasks", "comments")
+async def get_last_activity_ts_many(task_ids: List[str]) -> Dict[str, str]:
+    """
+    Gets the ISO 8601 timestamp of the last activity for many tasks at once.
+
+    Tasks already known from get_open_tasks or this session are not
+    re-fetched, and at most one comment request is issued per task. All
+    requests run concurrently.
+
+    Args:
+        task_ids (List[str]): The IDs of the tasks to check.
+
+    Returns:
+        Dict[str, str]: A mapping of task ID to last activity timestamp.
+        An error dict is returned instead if the API request failed.
+    """
+    task_ids = [str(task_id) for task_id in dict.fromkeys(task_ids)]
+    timestamps = await asyncio.gather(
+        *(_resolve_last_activity_ts(task_id) for task_id in task_ids)
+    )
+    return dict(zip(task_ids, timestamps))
+
+
+@async_handle_request_exception
+@tool_memo.memoized("projects", "tasks", "comments")
+async def analyze_open_tasks(project_name: Optional[str] = None) -> Union[List[Dict], Dict]:
+    """
+    Performs a deep analysis of every open task in a project in one call.
+
+    Fetches all tasks of the project in a single request and the comments of
+    every task concurrently, then joins them locally. Use this instead of
+    calling get_task_details and get_last_activity_ts for each task.
+
+    Args:
+        project_name (Optional[str]): The name of the project to analyze. If None, uses default 'Work'.
+
+    Returns:
+        Union[List[Dict], Dict]: One record per open task with its details, subtasks,
+        next_action (first open subtask), comments, comment_count,
+        last_activity_ts, days_since_activity and is_stale.
+        An error dict is returned instead if the API request failed.
+    """
+    project_to_use = project_name if project_name else DEFAULT_PROJECT
+    project = await get_project_by_name(project_to_use)
+    if not project or "error" in project:
+        print(
+            f"Project '{project_to_use}' not found. Please create a project named '{project_to_use}' in ToDoist."
+        )
+        return []
+
+    tasks = await _list_project_tasks(project["id"])
+    all_comments = await asyncio.gather(
+        *(_fetch_comments(task["id"]) for task in tasks)
+    )
+
+    children = group_subtasks(tasks)
+    now = datetime.now(timezone.utc)
+    return [
+        build_task_analysis(task, comments, children.get(str(task.get("id")), []), now)
+        for task, comments in zip(tasks, all_comments)
+    ]
+
+
+async def rank_tasks(project_name: Optional[str] = None, top_k: int = 10) -> Union[List[Dict], Dict]:
+    """
+    Ranks the open tasks of a project with the deterministic RIN score
+    (recency, due-date urgency, priority, labels and subtask structure) and
+    returns only the top_k. Use this instead of reading the whole backlog to
+    decide what matters most.
+
+    Args:
+        project_name (Optional[str]): The name of the project to rank. If None, uses default 'Work'.
+        top_k (int): How many tasks to return.
+
+    Returns:
+        Union[List[Dict], Dict]: The top_k tasks, highest score first, each with its id,
+        content, priority, due, labels, parent_id, next_action,
+        days_since_activity, is_stale, score and a per-component breakdown.
+        An error dict is returned instead if the API request failed.
+    """
+    analysis = await analyze_open_tasks(project_name)
+    if isinstance(analysis, dict):
+        return analysis
+    return rin_scoring.rank(analysis, top_k)
+
+
+# Trace every tool call when TOOL_TRACE is set (see tools/instrumentation.py)
+instrumentation.instrument_module(
+    sys.modules[__name__],
+    [
+        "get_projects",
+        "get_project_by_name",
+        "get_open_tasks",
+        "get_task_comments",
+        "get_task_subtasks",
+        "get_task_details",
+        "get_last_activity_ts",
+        "get_last_activity_ts_many",
+        "analyze_open_tasks",
+        "rank_tasks",
+    ],
+)
@@ -0,0 +1,378 @@
+"""
+Shared HTTP client for the ToDoist REST API.
+
+All ToDoist tools go through a single pooled, keep-alive `requests.Session`
+so that repeated tool calls reuse TCP/TLS connections instead of opening a
+new one per request.
+
+Configuration (environment variables):
+    TODOIST_API_BASE_URL: Base URL of the REST API.
+    TODOIST_SYNC_API_URL: URL of the Sync API endpoint.
+    TODOIST_POOL_SIZE: Max connections kept alive per host (default 10).
+    TODOIST_CONNECT_TIMEOUT: Connect timeout in seconds (default 5).
+    TODOIST_READ_TIMEOUT: Read timeout in seconds (default 30).
+    TODOIST_MAX_CONCURRENCY: Max in-flight async requests (default 8).
+
+Async tools use an `httpx.AsyncClient` with the same settings. Because an
+async client and its semaphore are bound to the event loop they were created
+on, one of each is kept per running loop.
+
+Sync and async requests share one token bucket from rate_limiter, and
+retryable failures (connection errors, 429 and 5xx) are retried here with
+jittered backoff, honouring Retry-After. Other 4xx responses are returned
+at once. Writes carry an X-Request-Id so a retried POST is applied once.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from tools import instrumentation, rate_limiter
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_BASE_URL = "https://api.todoist.com/rest/v2"
+DEFAULT_SYNC_URL = "https://api.todoist.com/sync/v9/sync"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_request_count = 0
+_count_lock = threading.Lock()
+_async_request_count = 0
+_retry_count = 0
+_rate_limited_count = 0
+_bucket = rate_limiter.build_bucket()
+# Maps each running event loop to its (AsyncClient, Semaphore) pair
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_todoist_headers():
+    """Get headers for ToDoist API requests."""
+    api_token = os.getenv("TODOIST_API_TOKEN")
+    if not api_token:
+        raise ValueError("TODOIST_API_TOKEN not found in environment variables")
+
+    return {"Authorization": f"Bearer {api_token}", "Content-Type": "application/json"}
+
+
+def get_base_url() -> str:
+    """Get the base URL for the ToDoist REST API."""
+    return os.getenv("TODOIST_API_BASE_URL", DEFAULT_BASE_URL)
+
+
+def get_sync_url() -> str:
+    """Get the URL of the ToDoist Sync API endpoint."""
+    return os.getenv("TODOIST_SYNC_API_URL", DEFAULT_SYNC_URL)
+
+
+def get_timeout():
+    """Get the (connect, read) timeout tuple used for every request."""
+    connect_timeout = float(os.getenv("TODOIST_CONNECT_TIMEOUT", "5"))
+    read_timeout = float(os.getenv("TODOIST_READ_TIMEOUT", "30"))
+    return (connect_timeout, read_timeout)
+
+
+def get_pool_size() -> int:
+    """Get the maximum number of pooled keep-alive connections."""
+    return int(os.getenv("TODOIST_POOL_SIZE", "10"))
+
+
+def get_max_concurrency() -> int:
+    """Get the maximum number of concurrent async requests."""
+    return int(os.getenv("TODOIST_MAX_CONCURRENCY", "8"))
+
+
+def _build_session() -> requests.Session:
+    """Create a session with a keep-alive connection pool."""
+    pool_size = get_pool_size()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session():
+    """Close the pooled session and reset the connection counters."""
+    global _session, _request_count, _async_request_count
+    global _retry_count, _rate_limited_count, _bucket
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+    with _count_lock:
+        _request_count = 0
+        _async_request_count = 0
+        _retry_count = 0
+        _rate_limited_count = 0
+    _bucket = rate_limiter.build_bucket()
+
+
+def _build_headers(method: str, extra_headers: Optional[Dict]) -> Dict:
+    """Builds request headers, with a stable X-Request-Id for writes."""
+    headers = get_todoist_headers()
+    if method != "GET":
+        headers["X-Request-Id"] = str(uuid.uuid4())
+    headers.update(extra_headers or {})
+    return headers
+
+
+def _retry_delay(
+    status_code: int, retry_after: Optional[str], attempt: int
+) -> Tuple[float, float]:
+    """
+    Returns how long to sleep before retrying a retryable status, and how
+    long the retry waits in total. For a 429 the shared bucket is paused
+    instead of sleeping, so every caller backs off together.
+    """
+    global _rate_limited_count
+    if status_code != 429:
+        delay = rate_limiter.backoff_delay(attempt)
+        return delay, delay
+
+    with _count_lock:
+        _rate_limited_count += 1
+    instrumentation.record(rate_limited=1)
+    delay = rate_limiter.parse_retry_after(retry_after)
+    if delay is None:
+        delay = rate_limiter.backoff_delay(attempt)
+    _bucket.pause(delay)
+    return 0.0, delay
+
+
+def _count_retry(reason: str, delay: float):
+    global _retry_count
+    with _count_lock:
+        _retry_count += 1
+    instrumentation.record(retries=1)
+    print(f"Request failed: {reason}. Retrying in {delay:.1f} seconds...")
+
+
+def _send(method: str, url: str, **kwargs) -> requests.Response:
+    """Sends an authenticated, rate-limited request, retrying transient failures."""
+    global _request_count
+    headers = _build_headers(method, kwargs.pop("headers", None))
+    kwargs.setdefault("timeout", get_timeout())
+    max_retries = rate_limiter.get_max_retries()
+
+    for attempt in range(max_retries + 1):
+        _bucket.acquire()
+        try:
+            response = get_session().request(method, url, headers=headers, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = rate_limiter.backoff_delay(attempt)
+            _count_retry(str(e), delay)
+        else:
+            with _count_lock:
+                _request_count += 1
+            instrumentation.record_http(
+                bytes_out=len(response.request.body or b""),
+                bytes_in=len(response.content),
+            )
+            if (
+                response.status_code not in rate_limiter.RETRYABLE_STATUSES
+                or attempt == max_retries
+            ):
+                return response
+            delay, wait = _retry_delay(
+                response.status_code, response.headers.get("Retry-After"), attempt
+            )
+            _count_retry(f"HTTP {response.status_code}", wait)
+        time.sleep(delay)
+
+
+def request(method: str, path: str, **kwargs) -> requests.Response:
+    """
+    Sends a request to the ToDoist REST API through the pooled session.
+
+    Args:
+        method (str): The HTTP method (e.g. "GET", "POST").
+        path (str): The API path relative to the base URL (e.g. "/tasks").
+        **kwargs: Extra arguments passed to `requests.Session.request`.
+
+    Returns:
+        requests.Response: The raw response. Callers are expected to call
+        `raise_for_status()` themselves.
+    """
+    return _send(method, f"{get_base_url()}{path}", **kwargs)
+
+
+def get(path: str, **kwargs) -> requests.Response:
+    """Sends a GET request to the ToDoist REST API."""
+    return request("GET", path, **kwargs)
+
+
+def post(path: str, **kwargs) -> requests.Response:
+    """Sends a POST request to the ToDoist REST API."""
+    return request("POST", path, **kwargs)
+
+
+def delete(path: str, **kwargs) -> requests.Response:
+    """Sends a DELETE request to the ToDoist REST API."""
+    return request("DELETE", path, **kwargs)
+
+
+def sync(data: Dict) -> requests.Response:
+    """
+    Sends a request to the ToDoist Sync API through the pooled session.
+
+    Args:
+        data (Dict): Form fields of the request, e.g. `sync_token` and
+            `resource_types` for reads or `commands` for writes. List and
+            dict values must already be JSON-encoded strings.
+
+    Returns:
+        requests.Response: The raw response. Callers are expected to call
+        `raise_for_status()` themselves.
+    """
+    return _send(
+        "POST",
+        get_sync_url(),
+        data=data,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+
+def _get_async_state() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """Return the async client and semaphore bound to the running loop."""
+    loop = asyncio.get_running_loop()
+    state = _async_clients.get(loop)
+    if state is None:
+        connect_timeout, read_timeout = get_timeout()
+        pool_size = get_pool_size()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+        state = (client, asyncio.Semaphore(get_max_concurrency()))
+        _async_clients[loop] = state
+    return state
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop."""
+    return _get_async_state()[0]
+
+
+async def request_async(method: str, path: str, **kwargs) -> httpx.Response:
+    """
+    Sends a request to the ToDoist REST API through the pooled async client.
+
+    At most TODOIST_MAX_CONCURRENCY requests are in flight at once per event
+    loop; extra callers wait on the semaphore. Waiting for the rate limiter
+    or a retry never blocks the event loop's thread.
+
+    Args:
+        method (str): The HTTP method (e.g. "GET", "POST").
+        path (str): The API path relative to the base URL (e.g. "/tasks").
+        **kwargs: Extra arguments passed to `httpx.AsyncClient.request`.
+
+    Returns:
+        httpx.Response: The raw response. Callers are expected to call
+        `raise_for_status()` themselves.
+    """
+    global _async_request_count
+    client, semaphore = _get_async_state()
+    headers = _build_headers(method, kwargs.pop("headers", None))
+    url = f"{get_base_url()}{path}"
+    max_retries = rate_limiter.get_max_retries()
+
+    for attempt in range(max_retries + 1):
+        await _bucket.acquire_async()
+        try:
+            async with semaphore:
+                response = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == max_retries:
+                raise
+            delay = rate_limiter.backoff_delay(attempt)
+            _count_retry(str(e), delay)
+        else:
+            with _count_lock:
+                _async_request_count += 1
+            instrumentation.record_http(
+                bytes_out=len(response.request.content), bytes_in=len(response.content)
+            )
+            if (
+                response.status_code not in rate_limiter.RETRYABLE_STATUSES
+                or attempt == max_retries
+            ):
+                return response
+            delay, wait = _retry_delay(
+                response.status_code, response.headers.get("Retry-After"), attempt
+            )
+            _count_retry(f"HTTP {response.status_code}", wait)
+        await asyncio.sleep(delay)
+
+
+async def get_async(path: str, **kwargs) -> httpx.Response:
+    """Sends an async GET request to the ToDoist REST API."""
+    return await request_async("GET", path, **kwargs)
+
+
+async def close_async_client():
+    """Close the async client bound to the running event loop, if any."""
+    state = _async_clients.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state[0].aclose()
+
+
+def get_connection_stats() -> Dict[str, int]:
+    """
+    Returns connection reuse counters for the pooled session.
+
+    Returns:
+        Dict[str, int]: `requests` sent, `connections_opened` (new TCP/TLS
+        handshakes) and `connections_reused` (requests served on an already
+        open connection) for the sync session, plus `async_requests` sent
+        through the async clients, `retries` and `rate_limited` (HTTP 429)
+        responses.
+    """
+    connections_opened = 0
+    if _session is not None:
+        # The same adapter is mounted for both schemes; count it once.
+        adapters = {id(a): a for a in _session.adapters.values()}
+        for adapter in adapters.values():
+            for pool in list(adapter.poolmanager.pools._container.values()):
+                connections_opened += pool.num_connections
+
+    with _count_lock:
+        request_count = _request_count
+        async_request_count = _async_request_count
+        retry_count = _retry_count
+        rate_limited_count = _rate_limited_count
+
+    return {
+        "requests": request_count,
+        "connections_opened": connections_opened,
+        "connections_reused": max(request_count - connections_opened, 0),
+        "async_requests": async_request_count,
+        "retries": retry_count,
+        "rate_limited": rate_limited_count,
+    }
@@ -0,0 +1,314 @@
+"""
+Incremental sync of ToDoist data into a persistent local SQLite replica.
+
+The first sync downloads all projects, tasks and comments through the Sync
+API. Every later sync sends the stored `sync_token` and only receives what
+changed since, so keeping the replica current costs a few KB instead of a
+full task listing. When enabled, the read tools in todoist_tools.py serve
+projects, tasks and comments from the replica.
+
+Configuration (environment variables):
+    TODOIST_USE_SYNC: Serve reads from the replica (true/false, default false).
+    TODOIST_REPLICA_PATH: SQLite file of the replica (default todoist_replica.db).
+    TODOIST_SYNC_MIN_INTERVAL: Seconds between incremental syncs (default 10).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from tools import priority_snapshot, task_filter, todoist_client, tool_memo
+
+RESOURCE_TYPES = ["projects", "items", "notes"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS projects (id TEXT PRIMARY KEY, name TEXT, data TEXT);
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    parent_id TEXT,
+    checked INTEGER,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS notes (id TEXT PRIMARY KEY, item_id TEXT, data TEXT);
+CREATE INDEX IF NOT EXISTS items_project ON items (project_id, checked);
+CREATE INDEX IF NOT EXISTS notes_item ON notes (item_id);
+"""
+
+# Guards the replica file and _last_sync_at; held only for local reads and writes
+_lock = threading.RLock()
+# Serializes syncs, so responses are applied in the order of their tokens.
+# Held during the HTTP request, which readers must not wait for.
+_sync_lock = threading.RLock()
+_last_sync_at: Optional[float] = None
+# Replica files whose schema was already created by this process
+_initialized_paths = set()
+# The sync token and FilterIndex of the open tasks at that token
+_filter_index: Optional[tuple] = None
+
+
+def is_enabled() -> bool:
+    """Returns True if reads should be served from the local replica."""
+    return os.getenv("TODOIST_USE_SYNC", "").lower() in ("1", "true", "yes")
+
+
+def get_replica_path() -> str:
+    """Get the path of the SQLite replica file."""
+    return os.getenv("TODOIST_REPLICA_PATH", "todoist_replica.db")
+
+
+def get_min_sync_interval() -> float:
+    """Get the minimum number of seconds between two incremental syncs."""
+    return float(os.getenv("TODOIST_SYNC_MIN_INTERVAL", "10"))
+
+
+@contextmanager
+def _connect():
+    """Opens the replica, commits on success and always closes it."""
+    path = get_replica_path()
+    conn = sqlite3.connect(path)
+    try:
+        if path not in _initialized_paths:
+            conn.executescript(SCHEMA)
+            _initialized_paths.add(path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _item_to_task(item: Dict) -> Dict:
+    """Converts a Sync API item into the REST API task shape."""
+    return {
+        "id": str(item.get("id")),
+        "content": item.get("content", ""),
+        "description": item.get("description", ""),
+        "project_id": item.get("project_id"),
+        "section_id": item.get("section_id"),
+        "parent_id": item.get("parent_id"),
+        "order": item.get("child_order", 0),
+        "priority": item.get("priority", 1),
+        "due": item.get("due"),
+        "labels": item.get("labels", []),
+        "created": item.get("added_at", ""),
+        "is_completed": bool(item.get("checked", False)),
+        "url": f"https://app.todoist.com/app/task/{item.get('id')}",
+    }
+
+
+def _note_to_comment(note: Dict) -> Dict:
+    """Converts a Sync API note into the REST API comment shape."""
+    return {
+        "id": str(note.get("id")),
+        "task_id": note.get("item_id"),
+        "content": note.get("content", ""),
+        "posted_at": note.get("posted_at", ""),
+        "created": note.get("posted_at", ""),
+        "attachment": note.get("file_attachment"),
+    }
+
+
+def _apply(conn: sqlite3.Connection, payload: Dict):
+    """Applies a full or incremental sync response to the replica."""
+    if payload.get("full_sync"):
+        conn.execute("DELETE FROM projects")
+        conn.execute("DELETE FROM items")
+        conn.execute("DELETE FROM notes")
+
+    for project in payload.get("projects", []):
+        if project.get("is_deleted") or project.get("is_archived"):
+            conn.execute("DELETE FROM projects WHERE id = ?", (str(project["id"]),))
+        else:
+            conn.execute(
+                "INSERT OR REPLACE INTO projects (id, name, data) VALUES (?, ?, ?)",
+                (str(project["id"]), project.get("name", ""), json.dumps(project)),
+            )
+
+    for item in payload.get("items", []):
+        if item.get("is_deleted"):
+            conn.execute("DELETE FROM items WHERE id = ?", (str(item["id"]),))
+        else:
+            task = _item_to_task(item)
+            conn.execute(
+                "INSERT OR REPLACE INTO items (id, project_id, parent_id, checked, data)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    task["id"],
+                    task["project_id"],
+                    task["parent_id"],
+                    int(task["is_completed"]),
+                    json.dumps(task),
+                ),
+            )
+
+    for note in payload.get("notes", []):
+        if note.get("is_deleted"):
+            conn.execute("DELETE FROM notes WHERE id = ?", (str(note["id"]),))
+        else:
+            comment = _note_to_comment(note)
+            conn.execute(
+                "INSERT OR REPLACE INTO notes (id, item_id, data) VALUES (?, ?, ?)",
+                (comment["id"], comment["task_id"], json.dumps(comment)),
+            )
+
+    conn.execute(
+        "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('sync_token', ?)",
+        (payload["sync_token"],),
+    )
+
+
+def _changed_scopes(payload: Dict) -> List[str]:
+    """Returns the tool_memo scopes a sync response changes."""
+    if payload.get("full_sync"):
+        return [tool_memo.ALL_SCOPES]
+    scopes = set()
+    if payload.get("projects"):
+        scopes.add("projects")
+    for item in payload.get("items", []):
+        scopes.update(("tasks", f"task:{item['id']}"))
+    for note in payload.get("notes", []):
+        scopes.update(("comments", f"task:{note.get('item_id')}"))
+    return sorted(scopes)
+
+
+def get_sync_token() -> str:
+    """Returns the stored sync token, or "*" if the replica is empty."""
+    with _lock, _connect() as conn:
+        row = conn.execute(
+            "SELECT value FROM sync_state WHERE key = 'sync_token'"
+        ).fetchone()
+    return row[0] if row else "*"
+
+
+def sync() -> Dict:
+    """
+    Pulls changes since the last sync from the Sync API into the replica.
+
+    Returns:
+        Dict: Whether this was a `full_sync` and how many projects, items and
+        notes were received.
+    """
+    global _last_sync_at
+    with _sync_lock:
+        response = todoist_client.sync(
+            {
+                "sync_token": get_sync_token(),
+                "resource_types": json.dumps(RESOURCE_TYPES),
+            }
+        )
+        response.raise_for_status()
+        payload = response.json()
+
+        with _lock:
+            with _connect() as conn:
+                _apply(conn, payload)
+            _last_sync_at = time.monotonic()
+        scopes = _changed_scopes(payload)
+        if scopes:
+            tool_memo.bump(*scopes)
+        if payload.get("full_sync") or payload.get("items") or payload.get("notes"):
+            priority_snapshot.invalidate()
+
+    return {
+        "full_sync": bool(payload.get("full_sync")),
+        "projects": len(payload.get("projects", [])),
+        "items": len(payload.get("items", [])),
+        "notes": len(payload.get("notes", [])),
+    }
+
+
+def _needs_sync() -> bool:
+    with _lock:
+        return (
+            _last_sync_at is None
+            or time.monotonic() - _last_sync_at >= get_min_sync_interval()
+        )
+
+
+def ensure_synced():
+    """
+    Syncs if the replica was never synced in this process, was marked stale,
+    or was last synced more than TODOIST_SYNC_MIN_INTERVAL seconds ago.
+    """
+    with _sync_lock:
+        # Checked with the sync lock held, so callers that waited for a
+        # sync in progress do not repeat it
+        if _needs_sync():
+            sync()
+
+
+def mark_stale():
+    """Forces the next read to pull changes first. Called after writes."""
+    global _last_sync_at
+    with _lock:
+        _last_sync_at = None
+
+
+def reset_replica():
+    """Deletes all replicated data and the sync token."""
+    global _last_sync_at, _filter_index
+    with _sync_lock, _lock, _connect() as conn:
+        for table in ("sync_state", "projects", "items", "notes"):
+            conn.execute(f"DELETE FROM {table}")
+        _last_sync_at = None
+        _filter_index = None
+
+
+def get_projects() -> List[Dict]:
+    """Returns every active project in the replica."""
+    with _lock, _connect() as conn:
+        rows = conn.execute("SELECT data FROM projects").fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def get_project_tasks(project_id: str) -> List[Dict]:
+    """Returns every open task of a project, in REST API task shape."""
+    with _lock, _connect() as conn:
+        rows = conn.execute(
+            "SELECT data FROM items WHERE project_id = ? AND checked = 0",
+            (str(project_id),),
+        ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def get_open_tasks() -> List[Dict]:
+    """Returns every open task of every project, in REST API task shape."""
+    with _lock, _connect() as conn:
+        rows = conn.execute("SELECT data FROM items WHERE checked = 0").fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def get_filter_index() -> task_filter.FilterIndex:
+    """
+    Returns a FilterIndex of every open task in the replica, for query_tasks.
+    It is rebuilt only after a sync changed the sync token.
+    """
+    global _filter_index
+    with _lock:
+        token = get_sync_token()
+        if _filter_index is None or _filter_index[0] != token:
+            _filter_index = (token, task_filter.FilterIndex(get_open_tasks()))
+        return _filter_index[1]
+
+
+def get_task(task_id: str) -> Optional[Dict]:
+    """Returns a task in REST API task shape, or None if not replicated."""
+    with _lock, _connect() as conn:
+        row = conn.execute(
+            "SELECT data FROM items WHERE id = ?", (str(task_id),)
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def get_task_comments(task_id: str) -> List[Dict]:
+    """Returns the comments of a task, in REST API comment shape."""
+    with _lock, _connect() as conn:
+        rows = conn.execute(
+            "SELECT data FROM notes WHERE item_id = ?", (str(task_id),)
+        ).fetchall()
+    return [json.loads(row[0]) for row in rows]
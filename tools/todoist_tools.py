@@ -3,13 +3,32 @@ ToDoist API tools for task management.
 These are the core functions that the ToDoistToolAgent will use.
 """
 
+import json
 import os
-import time
-from typing import List, Dict, Optional
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Union
 from datetime import datetime, timezone
 import requests
 from dotenv import load_dotenv
-from functools import lru_cache, wraps
+from functools import wraps
+
+from tools import (
+    fetch_cache,
+    instrumentation,
+    priority_snapshot,
+    rin_scoring,
+    task_filter,
+    task_index,
+    todoist_client,
+    todoist_sync,
+    tool_memo,
+)
+from tools.task_index import group_subtasks
+# Re-exported: scripts such as test_api.py import it from here, where it used to live
+from tools.todoist_client import get_todoist_headers
+from tools.ttl_cache import TTLCache, ttl_cached
 
 # Load environment variables
 load_dotenv()
@@ -17,46 +36,295 @@ load_dotenv()
 # Default project name
 DEFAULT_PROJECT = "Work"
 
+# Tasks with no activity for longer than this are considered stale
+STALE_AFTER_DAYS = 7
 
-def retry_on_request_exception(func):
-    """A decorator to retry a function on RequestException."""
+# Maximum number of commands the Sync API accepts in one request
+MAX_SYNC_COMMANDS = 100
+
+# Project metadata cache, cleared by create_project and delete_project. Its
+# hits and misses are recorded in the span of the tool call that used it.
+metadata_cache = TTLCache(
+    maxsize=int(os.getenv("TODOIST_METADATA_CACHE_SIZE", "64")),
+    ttl=float(os.getenv("TODOIST_METADATA_CACHE_TTL", "300")),
+)
+
+
+def handle_request_exception(func):
+    """
+    A decorator that reports a failed API request to the agent as an error
+    dict. Transient failures have already been retried by todoist_client, so
+    the error includes the final HTTP status code when there is one.
+    Tools that return a list, string or bool are therefore annotated as
+    Union[..., Dict].
+    """
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        retries = 3
-        delay = 1
-        for i in range(retries):
-            try:
-                return func(*args, **kwargs)
-            except requests.exceptions.RequestException as e:
-                print(f"Request failed: {e}. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                delay *= 2
-        return {"error": "API request failed after multiple retries."}
+        try:
+            return func(*args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            return request_error(e)
 
     return wrapper
 
 
-def get_todoist_headers():
-    """Get headers for ToDoist API requests."""
-    api_token = os.getenv("TODOIST_API_TOKEN")
-    if not api_token:
-        raise ValueError("TODOIST_API_TOKEN not found in environment variables")
+def request_error(e: Exception) -> Dict:
+    """Logs a failed API request and builds the error dict returned to the agent."""
+    response = getattr(e, "response", None)
+    status_code = response.status_code if response is not None else None
+    print(f"Request failed: {e}")
+    return {"error": f"API request failed: {e}", "status_code": status_code}
+
+
+def format_task(task: Dict) -> Dict:
+    """Formats a raw API task into the structure returned by the tools."""
+    return {
+        "id": str(task.get("id")),
+        "content": task.get("content", ""),
+        "project_id": task.get("project_id"),
+        "priority": task.get("priority", 1),
+        "description": task.get("description", ""),
+        "due": task.get("due", {}),
+        "url": task.get("url", ""),
+        "created": task.get("created", ""),
+        "labels": task.get("labels", []),
+    }
+
+
+def build_task_details(task: Dict, comments: List[Dict], subtasks: List[Dict]) -> Dict:
+    """Combines a raw API task with its comments and subtasks."""
+    task_details = format_task(task)
+    task_details.update(
+        {
+            "comments": comments,
+            "subtasks": subtasks,
+            "comment_count": len(comments),
+            "subtask_count": len(subtasks),
+        }
+    )
+    return task_details
+
 
-    return {"Authorization": f"Bearer {api_token}", "Content-Type": "application/json"}
+def latest_activity_ts(task: Dict, comments: List[Dict]) -> str:
+    """
+    Returns the most recent of a task's creation timestamp and its latest
+    comment timestamp, as an ISO 8601 string.
+    """
+    # Get task creation timestamp
+    task_created_ts = task.get("created", "")
 
+    # Find the most recent comment timestamp in a single pass
+    latest_comment_ts = max(
+        (comment.get("created", "") for comment in comments), default=""
+    )
 
-@lru_cache(maxsize=1)
-@retry_on_request_exception
-def get_project_by_name(project_name: str) -> Optional[Dict]:
-    """Get a project by its name."""
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
+    # Return the most recent of the two as an ISO 8601 string
+    if latest_comment_ts and task_created_ts:
+        # Compare timestamps and return the most recent
+        if latest_comment_ts > task_created_ts:
+            return latest_comment_ts
+        else:
+            return task_created_ts
+    elif latest_comment_ts:
+        return latest_comment_ts
+    elif task_created_ts:
+        return task_created_ts
+    else:
+        # Fallback to current timestamp if no timestamps found
+        return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_ts(ts: str) -> Optional[datetime]:
+    """Parses an ISO 8601 timestamp into an aware datetime, if possible."""
+    try:
+        parsed = datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def build_task_analysis(
+    task: Dict, comments: List[Dict], subtasks: List[Dict], now: datetime
+) -> Dict:
+    """
+    Builds the deep-analysis record for a task: its details, subtasks,
+    comments, last activity and staleness.
+    """
+    analysis = build_task_details(task, comments, subtasks)
+    analysis["parent_id"] = task.get("parent_id")
+    analysis["next_action"] = subtasks[0].get("content", "") if subtasks else None
+
+    last_activity = latest_activity_ts(task, comments)
+    analysis["last_activity_ts"] = last_activity
+    last_activity_dt = _parse_ts(last_activity)
+    if last_activity_dt:
+        days_since_activity = (now - last_activity_dt).days
+        analysis["days_since_activity"] = days_since_activity
+        analysis["is_stale"] = days_since_activity > STALE_AFTER_DAYS
+    else:
+        analysis["days_since_activity"] = None
+        analysis["is_stale"] = False
+
+    return analysis
+
+
+def _use_replica() -> bool:
+    """Returns True if reads should come from the sync replica, syncing it first."""
+    if not todoist_sync.is_enabled():
+        return False
+    todoist_sync.ensure_synced()
+    return True
 
-    # Get all projects
-    response = requests.get(f"{base_url}/projects", headers=headers)
+
+def _list_project_tasks(project_id: str) -> List[Dict]:
+    """Lists every open task of a project and indexes the result."""
+    if _use_replica():
+        tasks = todoist_sync.get_project_tasks(project_id)
+    else:
+        response = todoist_client.get(f"/tasks?project_id={project_id}")
+        response.raise_for_status()
+        tasks = response.json()
+
+    task_index.index_project_tasks(project_id, tasks)
+    return tasks
+
+
+def list_project_tasks(project_id: str) -> List[Dict]:
+    """
+    Lists the open tasks of a project as raw API tasks, with fields such as
+    duration that format_task leaves out. Reads the sync replica when it is
+    enabled and indexes the result, like the read tools.
+
+    Raises:
+        requests.exceptions.RequestException: If the tasks could not be fetched.
+    """
+    return _list_project_tasks(project_id)
+
+
+def _list_all_tasks(projects: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Lists every open task of the account in one request, groups the tasks
+    by project_id and indexes each project.
+
+    Args:
+        projects (List[Dict]): The projects to group by. Tasks of other
+            projects are dropped.
+    """
+    if _use_replica():
+        tasks = todoist_sync.get_open_tasks()
+    else:
+        response = todoist_client.get("/tasks")
+        response.raise_for_status()
+        tasks = response.json()
+
+    grouped: Dict[str, List[Dict]] = {str(project["id"]): [] for project in projects}
+    for task in tasks:
+        project_tasks = grouped.get(str(task.get("project_id")))
+        if project_tasks is not None:
+            project_tasks.append(task)
+    for project_id, project_tasks in grouped.items():
+        task_index.index_project_tasks(project_id, project_tasks)
+    return grouped
+
+
+def _select_projects(project_names: Optional[List[str]]) -> List[Dict]:
+    """
+    Returns the projects with the given names, or every project if None.
+
+    Raises:
+        ValueError: If a named project does not exist.
+    """
+    projects = get_projects()
+    if isinstance(projects, dict):
+        raise ValueError(projects["error"])
+    if not project_names:
+        return projects
+    by_name = {project.get("name", "").lower(): project for project in projects}
+    missing = [name for name in project_names if name.lower() not in by_name]
+    if missing:
+        raise ValueError(f"Projects not found: {', '.join(missing)}")
+    return [by_name[name.lower()] for name in project_names]
+
+
+def _fetch_task(task_id: str) -> Dict:
+    """Fetches a single raw task, at most once per session."""
+    if _use_replica():
+        task = todoist_sync.get_task(task_id)
+        if task is not None:
+            return task
+
+    task = fetch_cache.get_task_body(task_id)
+    if task is None:
+        response = todoist_client.get(f"/tasks/{task_id}")
+        response.raise_for_status()
+        task = response.json()
+        fetch_cache.set_task_body(task_id, task)
+    return task
+
+
+def _get_task(task_id: str) -> Dict:
+    """Returns a raw task from the task index, or fetches it."""
+    task = task_index.get_indexed_task(task_id)
+    if task is None:
+        task = _fetch_task(task_id)
+    return task
+
+
+def _fetch_comments(task_id: str) -> List[Dict]:
+    """Fetches the comments of a task, at most once per session."""
+    if _use_replica():
+        return todoist_sync.get_task_comments(task_id)
+
+    comments = fetch_cache.get_comments(task_id)
+    if comments is None:
+        response = todoist_client.get(f"/comments?task_id={task_id}")
+        response.raise_for_status()
+        comments = response.json()
+        fetch_cache.set_comments(task_id, comments)
+    return comments
+
+
+@ttl_cached(metadata_cache)
+@handle_request_exception
+def get_projects() -> Union[List[Dict], Dict]:
+    """Get all projects, or an error dict if the API request failed."""
+    if _use_replica():
+        return todoist_sync.get_projects()
+
+    response = todoist_client.get("/projects")
+    response.raise_for_status()
+    return response.json()
+
+
+@handle_request_exception
+def _send_sync_commands(commands: List[Dict]) -> Dict:
+    """
+    Sends one batch of Sync API commands. Retrying a batch is safe because
+    Todoist applies each command uuid at most once.
+    """
+    response = todoist_client.sync({"commands": json.dumps(commands)})
     response.raise_for_status()
-    projects = response.json()
+    return response.json()
+
+
+def _command_error(status) -> Optional[str]:
+    """Returns the error message of a sync_status entry, or None if it is ok."""
+    if status == "ok":
+        return None
+    if isinstance(status, dict):
+        return status.get("error", json.dumps(status))
+    return str(status) if status else "No status returned for command"
+
+
+def get_project_by_name(project_name: str) -> Optional[Dict]:
+    """Get a project by its name."""
+    # Get all projects, served from the metadata cache when fresh
+    projects = get_projects()
+    if isinstance(projects, dict):
+        return projects
 
     # Find the project
     for project in projects:
@@ -67,61 +335,64 @@ def get_project_by_name(project_name: str) -> Optional[Dict]:
     return None
 
 
-@lru_cache(maxsize=1)
 def get_work_project_id():
     """Get the project ID for the 'Work' project."""
     work_project = get_project_by_name(DEFAULT_PROJECT)
-    if work_project:
+    if work_project and "error" not in work_project:
         return work_project["id"]
     return None
 
 
-@retry_on_request_exception
+@handle_request_exception
 def create_project(project_name: str) -> Dict:
     """Creates a new project."""
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
     project_data = {"name": project_name}
 
-    response = requests.post(f"{base_url}/projects", headers=headers, json=project_data)
+    response = todoist_client.post("/projects", json=project_data)
     response.raise_for_status()
 
     created_project = response.json()
+    metadata_cache.clear()
+    todoist_sync.mark_stale()
+    priority_snapshot.invalidate()
+    tool_memo.bump("projects")
     return created_project
 
 
-@retry_on_request_exception
-def delete_project(project_id: str) -> bool:
-    """Deletes a project."""
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
-    response = requests.delete(f"{base_url}/projects/{project_id}", headers=headers)
+@handle_request_exception
+def delete_project(project_id: str) -> Union[bool, Dict]:
+    """Deletes a project, or an error dict if the API request failed."""
+    response = todoist_client.delete(f"/projects/{project_id}")
     response.raise_for_status()
+    metadata_cache.clear()
+    task_index.invalidate_index()
+    todoist_sync.mark_stale()
+    priority_snapshot.invalidate()
+    tool_memo.bump("projects", "tasks")
 
     return True
 
 
-@retry_on_request_exception
+@handle_request_exception
 def move_task_to_project(task_id: str, project_id: str) -> Dict:
     """Moves a task to a different project."""
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
     task_data = {"project_id": project_id}
 
-    response = requests.post(
-        f"{base_url}/tasks/{task_id}", headers=headers, json=task_data
-    )
+    response = todoist_client.post(f"/tasks/{task_id}", json=task_data)
     response.raise_for_status()
+    task_index.invalidate_index()
+    todoist_sync.mark_stale()
+    priority_snapshot.invalidate()
+    tool_memo.bump_task(task_id, "tasks")
+    fetch_cache.invalidate_task(task_id)
 
     updated_task = response.json()
     return updated_task
 
 
-@retry_on_request_exception
-def get_open_tasks(project_name: Optional[str] = None) -> List[Dict]:
+@handle_request_exception
+@tool_memo.memoized("projects", "tasks")
+def get_open_tasks(project_name: Optional[str] = None) -> Union[List[Dict], Dict]:
     """
     Fetches all open tasks from the Work project in ToDoist.
 
@@ -129,48 +400,75 @@ def get_open_tasks(project_name: Optional[str] = None) -> List[Dict]:
         project_name (Optional[str]): The name of the project to fetch tasks from. If None, uses default 'Work'.
 
     Returns:
-        List[Dict]: A list of task objects with their details.
+        Union[List[Dict], Dict]: A list of task objects with their details.
+        An error dict is returned instead if the API request failed.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
     project_to_use = project_name if project_name else DEFAULT_PROJECT
     project = get_project_by_name(project_to_use)
-    if not project:
+    if not project or "error" in project:
         print(
             f"Project '{project_to_use}' not found. Please create a project named '{project_to_use}' in ToDoist."
         )
         return []
 
-    # Get all tasks from the specified project
-    response = requests.get(
-        f"{base_url}/tasks?project_id={project['id']}", headers=headers
-    )
-    response.raise_for_status()
-
-    tasks = response.json()
+    # Get all tasks from the specified project and index them for subtask lookups
+    tasks = _list_project_tasks(project["id"])
 
     # Format the response to match our expected structure
-    formatted_tasks = []
-    for task in tasks:
-        formatted_task = {
-            "id": str(task.get("id")),
-            "content": task.get("content", ""),
-            "project_id": task.get("project_id"),
-            "priority": task.get("priority", 1),
-            "description": task.get("description", ""),
-            "due": task.get("due", {}),
-            "url": task.get("url", ""),
-            "created": task.get("created", ""),
-            "labels": task.get("labels", []),
+    return [format_task(task) for task in tasks]
+
+
+@handle_request_exception
+@tool_memo.memoized("projects", "tasks")
+def query_tasks(query: str, project_name: Optional[str] = None) -> Union[List[Dict], Dict]:
+    """
+    Fetches only the open tasks that match a Todoist filter expression,
+    instead of every task of a project.
+
+    Supported terms include p1-p4, today, tomorrow, overdue, "no date",
+    "7 days", "due before: 2025-01-31", "due after: today", recurring,
+    @label, "no labels", #Project, subtask (use !subtask for top-level
+    tasks) and "search: text", combined with &, |, ! and parentheses.
+    Comma-separated filters such as "today, overdue" are not supported by
+    the API; use | instead.
+
+    Args:
+        query (str): The filter expression, e.g. "(today | overdue) & p1".
+        project_name (Optional[str]): Only return tasks of this project.
+
+    Returns:
+        Union[List[Dict], Dict]: The matching tasks.
+        An error dict is returned instead if the API request failed.
+    """
+    if project_name:
+        query = f"#{task_filter.escape(project_name)} & ({query})"
+
+    if _use_replica():
+        projects = todoist_sync.get_projects()
+        project_ids = {project.get("name", "").lower(): str(project["id"]) for project in projects}
+        project_parents = {
+            str(project["id"]): str(project["parent_id"]) if project.get("parent_id") else None
+            for project in projects
         }
-        formatted_tasks.append(formatted_task)
+        try:
+            tasks = task_filter.select(
+                query, todoist_sync.get_filter_index(), project_ids, project_parents=project_parents
+            )
+        except ValueError as e:
+            print(f"Evaluating '{query}' through the API: {e}")
+        else:
+            return [format_task(task) for task in tasks]
 
-    return formatted_tasks
+    response = todoist_client.get("/tasks", params={"filter": query})
+    if response.status_code == 400:
+        return {"error": f"Invalid filter '{query}': {response.text}"}
+    response.raise_for_status()
+    return [format_task(task) for task in response.json()]
 
 
-@retry_on_request_exception
-def get_task_comments(task_id: str) -> List[Dict]:
+@handle_request_exception
+@tool_memo.memoized("task:{task_id}")
+def get_task_comments(task_id: str) -> Union[List[Dict], Dict]:
     """
     Fetches all comments for a specific task.
 
@@ -178,48 +476,41 @@ def get_task_comments(task_id: str) -> List[Dict]:
         task_id (str): The ID of the task to get comments for.
 
     Returns:
-        List[Dict]: A list of comment objects.
+        Union[List[Dict], Dict]: A list of comment objects.
+        An error dict is returned instead if the API request failed.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
-    response = requests.get(f"{base_url}/comments?task_id={task_id}", headers=headers)
-    response.raise_for_status()
-
-    comments = response.json()
-    return comments
+    return _fetch_comments(task_id)
 
 
-@retry_on_request_exception
-def get_task_subtasks(task_id: str) -> List[Dict]:
+@handle_request_exception
+@tool_memo.memoized("tasks")
+def get_task_subtasks(task_id: str) -> Union[List[Dict], Dict]:
     """
     Fetches all subtasks for a specific task.
 
+    Subtasks are answered from the task index built by get_open_tasks. If the
+    task has not been indexed yet, its project is listed once and indexed.
+
     Args:
         task_id (str): The ID of the task to get subtasks for.
 
     Returns:
-        List[Dict]: A list of subtask objects.
+        Union[List[Dict], Dict]: A list of subtask objects.
+        An error dict is returned instead if the API request failed.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
+    # Answer from the local parent -> children index when possible
+    subtasks = task_index.get_indexed_subtasks(task_id)
+    if subtasks is not None:
+        return subtasks
 
-    # Get all tasks and filter for subtasks of the given task
-    response = requests.get(f"{base_url}/tasks?task_id={task_id}", headers=headers)
-    response.raise_for_status()
+    # Otherwise index the parent's project with a single listing
+    task = _fetch_task(task_id)
+    _list_project_tasks(task["project_id"])
+    return task_index.get_indexed_subtasks(task_id) or []
 
-    all_tasks = response.json()
-    subtasks = [
-        task
-        for task in all_tasks
-        if task.get("parent_id") == task_id
-        and not task.get("is_completed", False)
-    ]
 
-    return subtasks
-
-
-@retry_on_request_exception
+@handle_request_exception
+@tool_memo.memoized("tasks", "task:{task_id}")
 def get_task_details(task_id: str) -> Dict:
     """
     Gets comprehensive details for a specific task including comments and subtasks.
@@ -230,40 +521,42 @@ def get_task_details(task_id: str) -> Dict:
     Returns:
         Dict: Comprehensive task details including comments and subtasks.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
-    # Get the main task
-    response = requests.get(f"{base_url}/tasks/{task_id}", headers=headers)
-    response.raise_for_status()
-
-    task = response.json()
+    # Get the main task, from the task index when possible
+    task = task_index.get_indexed_task(task_id)
+    if task is None:
+        task = _fetch_task(task_id)
+        _list_project_tasks(task["project_id"])
 
     # Get comments and subtasks
-    comments = get_task_comments(task_id)
-    subtasks = get_task_subtasks(task_id)
+    comments = _fetch_comments(task_id)
+    subtasks = task_index.get_indexed_subtasks(task_id) or []
 
     # Combine all information
-    task_details = {
+    return build_task_details(task, comments, subtasks)
+
+
+@handle_request_exception
+@tool_memo.memoized("task:{task_id}")
+def get_task_description(task_id: str) -> Dict:
+    """
+    Gets the full description of a task, for when a compact tool result
+    only showed a truncated one.
+
+    Args:
+        task_id (str): The ID of the task.
+
+    Returns:
+        Dict: The task's id, content and full description.
+    """
+    task = _get_task(task_id)
+    return {
         "id": str(task.get("id")),
         "content": task.get("content", ""),
-        "project_id": task.get("project_id"),
-        "priority": task.get("priority", 1),
         "description": task.get("description", ""),
-        "due": task.get("due", {}),
-        "url": task.get("url", ""),
-        "created": task.get("created", ""),
-        "labels": task.get("labels", []),
-        "comments": comments,
-        "subtasks": subtasks,
-        "comment_count": len(comments),
-        "subtask_count": len(subtasks),
     }
 
-    return task_details
-
 
-@retry_on_request_exception
+@handle_request_exception
 def add_task_comment(task_id: str, content: str) -> Dict:
     """
     Adds a comment to a specific task.
@@ -275,21 +568,20 @@ def add_task_comment(task_id: str, content: str) -> Dict:
     Returns:
         Dict: The created comment object.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
     comment_data = {"task_id": task_id, "content": content}
 
-    response = requests.post(
-        f"{base_url}/comments", headers=headers, json=comment_data
-    )
+    response = todoist_client.post("/comments", json=comment_data)
     response.raise_for_status()
 
     created_comment = response.json()
+    fetch_cache.add_comment(task_id, created_comment)
+    todoist_sync.mark_stale()
+    priority_snapshot.invalidate()
+    tool_memo.bump_task(task_id, "comments")
     return created_comment
 
 
-@retry_on_request_exception
+@handle_request_exception
 def update_task(
     task_id: str,
     content: Optional[str] = None,
@@ -310,9 +602,6 @@ def update_task(
     Returns:
         Dict: The updated task object.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
     # Build updates dictionary with only provided parameters
     updates = {}
     if content is not None:
@@ -328,16 +617,19 @@ def update_task(
     if not updates:
         return {"error": "No updates provided"}
 
-    response = requests.post(
-        f"{base_url}/tasks/{task_id}", headers=headers, json=updates
-    )
+    response = todoist_client.post(f"/tasks/{task_id}", json=updates)
     response.raise_for_status()
+    task_index.invalidate_index()
+    todoist_sync.mark_stale()
+    priority_snapshot.invalidate()
+    tool_memo.bump_task(task_id, "tasks")
+    fetch_cache.invalidate_task(task_id)
 
     updated_task = response.json()
     return updated_task
 
 
-@retry_on_request_exception
+@handle_request_exception
 def create_task(
     content: str,
     project_name: Optional[str] = None,  # Make project_name optional
@@ -360,9 +652,6 @@ def create_task(
     Returns:
         Dict: A dictionary representing the newly created task.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
-
     # Prepare task data
     task_data = {"content": content}
 
@@ -383,8 +672,12 @@ def create_task(
         task_data["project_id"] = work_project_id
 
     # Create the task
-    response = requests.post(f"{base_url}/tasks", headers=headers, json=task_data)
+    response = todoist_client.post("/tasks", json=task_data)
     response.raise_for_status()
+    task_index.invalidate_index()
+    todoist_sync.mark_stale()
+    priority_snapshot.invalidate()
+    tool_memo.bump("tasks")
 
     created_task = response.json()
 
@@ -400,52 +693,436 @@ def create_task(
     }
 
 
-@retry_on_request_exception
-def get_last_activity_ts(task_id: str) -> str:
+def create_tasks_bulk(
+    tasks: List[Dict],
+    project_name: Optional[str] = None,
+    parent_id: Optional[str] = None,
+) -> Dict:
+    """
+    Creates a whole tree of tasks and subtasks in ToDoist with batched Sync
+    API commands, instead of one create_task call per task.
+
+    Args:
+        tasks (List[Dict]): The tasks to create. Each task is a dict with
+            "content" (required) and optional "description", "due_string",
+            "priority" (1-4) and "subtasks" (a list of tasks in the same format).
+        project_name (Optional[str]): The name of the project. If None, uses default 'Work'.
+        parent_id (Optional[str]): The ID of an existing task to create the tree under.
+
+    Returns:
+        Dict: "created" and "failed" counts and one entry per task, in tree
+        order, with its content, new id, parent_id and status ("created",
+        "error" or "skipped" when its parent could not be created).
+    """
+    project_id = None
+    if not parent_id:
+        project = get_project_by_name(project_name or DEFAULT_PROJECT)
+        if not project or "error" in project:
+            return {"error": f"Project '{project_name or DEFAULT_PROJECT}' not found"}
+        project_id = project["id"]
+
+    # 1. Flatten the tree depth-first so every parent precedes its children
+    entries = []
+
+    def flatten(nodes: List[Dict], parent_ref: Optional[str]):
+        for node in nodes:
+            temp_id = str(uuid.uuid4())
+            args = {"content": node.get("content", "")}
+            if node.get("description"):
+                args["description"] = node["description"]
+            if node.get("priority"):
+                args["priority"] = node["priority"]
+            if node.get("due_string"):
+                args["due"] = {"string": node["due_string"]}
+            if parent_ref is None and project_id:
+                args["project_id"] = project_id
+            entries.append(
+                {"temp_id": temp_id, "uuid": str(uuid.uuid4()), "parent_ref": parent_ref, "args": args}
+            )
+            flatten(node.get("subtasks") or [], temp_id)
+
+    flatten(tasks, parent_id)
+
+    # 2. Submit in batches, resolving parents created by earlier batches
+    temp_id_mapping: Dict[str, str] = {}
+    results = {}
+    failed_temp_ids = set()
+    for start in range(0, len(entries), MAX_SYNC_COMMANDS):
+        batch = entries[start : start + MAX_SYNC_COMMANDS]
+        commands = []
+        for entry in batch:
+            parent_ref = entry["parent_ref"]
+            if parent_ref in failed_temp_ids:
+                failed_temp_ids.add(entry["temp_id"])
+                results[entry["temp_id"]] = {"status": "skipped", "error": "Parent task was not created"}
+                continue
+            args = dict(entry["args"])
+            if parent_ref:
+                args["parent_id"] = temp_id_mapping.get(parent_ref, parent_ref)
+            commands.append(
+                {"type": "item_add", "temp_id": entry["temp_id"], "uuid": entry["uuid"], "args": args}
+            )
+
+        if not commands:
+            continue
+
+        response = _send_sync_commands(commands)
+        sync_status = response.get("sync_status", {}) if "error" not in response else {}
+        temp_id_mapping.update(response.get("temp_id_mapping", {}))
+
+        for command in commands:
+            error = response.get("error") or _command_error(sync_status.get(command["uuid"]))
+            if error:
+                failed_temp_ids.add(command["temp_id"])
+                results[command["temp_id"]] = {"status": "error", "error": error}
+            else:
+                results[command["temp_id"]] = {"status": "created"}
+
+    task_index.invalidate_index()
+    todoist_sync.mark_stale()
+    priority_snapshot.invalidate()
+    tool_memo.bump("tasks")
+
+    # 3. Report per-task results in tree order
+    temp_ids = {entry["temp_id"] for entry in entries}
+    created_tasks = []
+    for entry in entries:
+        parent_ref = entry["parent_ref"]
+        if parent_ref in temp_ids:
+            parent_ref = temp_id_mapping.get(parent_ref)
+        result = {
+            "content": entry["args"]["content"],
+            "id": temp_id_mapping.get(entry["temp_id"]),
+            "parent_id": parent_ref,
+        }
+        result.update(results[entry["temp_id"]])
+        created_tasks.append(result)
+
+    created_count = sum(1 for task in created_tasks if task["status"] == "created")
+    return {
+        "created": created_count,
+        "failed": len(created_tasks) - created_count,
+        "tasks": created_tasks,
+    }
+
+
+def _change_to_command(change: Dict) -> Dict:
+    """
+    Converts one apply_changes entry into a Sync API command.
+
+    Raises:
+        ValueError: If the change is missing required fields or has an unknown type.
+    """
+    change_type = change.get("type")
+    task_id = change.get("task_id")
+    if not task_id:
+        raise ValueError("task_id is required")
+
+    command = {"uuid": str(uuid.uuid4())}
+    if change_type == "update":
+        args = {"id": task_id}
+        for field in ("content", "priority", "description"):
+            if change.get(field) is not None:
+                args[field] = change[field]
+        if change.get("due_string") is not None:
+            args["due"] = {"string": change["due_string"]}
+        if len(args) == 1:
+            raise ValueError("No updates provided")
+        command.update({"type": "item_update", "args": args})
+    elif change_type == "comment":
+        if not change.get("content"):
+            raise ValueError("content is required for a comment")
+        command.update(
+            {
+                "type": "note_add",
+                "temp_id": str(uuid.uuid4()),
+                "args": {"item_id": task_id, "content": change["content"]},
+            }
+        )
+    elif change_type == "move":
+        project_id = change.get("project_id")
+        if not project_id and change.get("project_name"):
+            project = get_project_by_name(change["project_name"])
+            if not project or "error" in project:
+                raise ValueError(f"Project '{change['project_name']}' not found")
+            project_id = project["id"]
+        if not project_id:
+            raise ValueError("project_id or project_name is required for a move")
+        command.update({"type": "item_move", "args": {"id": task_id, "project_id": project_id}})
+    else:
+        raise ValueError(f"Unknown change type '{change_type}'")
+    return command
+
+
+def apply_changes(changes: List[Dict]) -> Dict:
+    """
+    Applies many approved task updates, comments and moves with batched Sync
+    API commands, instead of one update_task, add_task_comment or
+    move_task_to_project call per change.
+
+    Args:
+        changes (List[Dict]): The changes to apply. Each change is a dict with
+            a "type" and a "task_id":
+            - "update": optional "content", "priority", "description", "due_string".
+            - "comment": "content" of the comment to add.
+            - "move": "project_id" or "project_name" of the destination project.
+
+    Returns:
+        Dict: "applied" and "failed" counts and one result per change, in
+        input order, with its index, type, task_id, status ("ok" or "error")
+        and error message if it failed.
+    """
+    results = [None] * len(changes)
+    pending = []
+    for index, change in enumerate(changes):
+        result = {"index": index, "type": change.get("type"), "task_id": change.get("task_id")}
+        results[index] = result
+        try:
+            pending.append((result, _change_to_command(change)))
+        except ValueError as e:
+            result.update({"status": "error", "error": str(e)})
+
+    for start in range(0, len(pending), MAX_SYNC_COMMANDS):
+        batch = pending[start : start + MAX_SYNC_COMMANDS]
+        response = _send_sync_commands([command for _, command in batch])
+        sync_status = response.get("sync_status", {}) if "error" not in response else {}
+
+        for result, command in batch:
+            error = response.get("error") or _command_error(sync_status.get(command["uuid"]))
+            if error:
+                result.update({"status": "error", "error": error})
+            else:
+                result["status"] = "ok"
+                if command["type"] == "note_add":
+                    fetch_cache.invalidate_comments(result["task_id"])
+                    tool_memo.bump_task(result["task_id"], "comments")
+                else:
+                    fetch_cache.invalidate_task(result["task_id"])
+                    tool_memo.bump_task(result["task_id"], "tasks")
+
+    if pending:
+        task_index.invalidate_index()
+        todoist_sync.mark_stale()
+        priority_snapshot.invalidate()
+
+    applied_count = sum(1 for result in results if result["status"] == "ok")
+    return {
+        "applied": applied_count,
+        "failed": len(results) - applied_count,
+        "results": results,
+    }
+
+
+@handle_request_exception
+@tool_memo.memoized("task:{task_id}")
+def get_last_activity_ts(task_id: str) -> Union[str, Dict]:
     """
     Gets the ISO 8601 timestamp of the last activity on a task.
     Activity is defined as the task's creation date or the date of the most recent comment.
     This helps determine how "stale" a task is.
+    Returns an error dict if the API request failed.
     """
-    headers = get_todoist_headers()
-    base_url = os.getenv("TODOIST_API_BASE_URL", "https://api.todoist.com/rest/v2")
+    # 1. Get the task, including created_at, from the index or session cache
+    task = _get_task(task_id)
 
-    # 1. Call Todoist API to get task details, including created_at
-    task_response = requests.get(f"{base_url}/tasks/{task_id}", headers=headers)
-    task_response.raise_for_status()
-    task = task_response.json()
+    # 2. Get the task comments, fetched at most once per session
+    comments = _fetch_comments(task_id)
 
-    # Get task creation timestamp
-    task_created_ts = task.get("created", "")
+    # 3. Return the most recent of task creation and latest comment
+    return latest_activity_ts(task, comments)
 
-    # 2. Call Todoist API to get task comments
-    comments_response = requests.get(
-        f"{base_url}/comments?task_id={task_id}", headers=headers
-    )
-    comments_response.raise_for_status()
-    comments = comments_response.json()
-
-    # 3. Find the most recent comment timestamp
-    latest_comment_ts = ""
-    if comments:
-        # Sort comments by created timestamp (newest first)
-        sorted_comments = sorted(
-            comments, key=lambda x: x.get("created", ""), reverse=True
+
+@handle_request_exception
+@tool_memo.memoized("tasks", "comments")
+def get_last_activity_ts_many(task_ids: List[str]) -> Dict[str, str]:
+    """
+    Gets the ISO 8601 timestamp of the last activity for many tasks at once.
+
+    Tasks already known from get_open_tasks or this session are not
+    re-fetched, and at most one comment request is issued per task. All
+    requests run concurrently.
+
+    Args:
+        task_ids (List[str]): The IDs of the tasks to check.
+
+    Returns:
+        Dict[str, str]: A mapping of task ID to last activity timestamp.
+        An error dict is returned instead if the API request failed.
+    """
+
+    def resolve(task_id: str) -> str:
+        return latest_activity_ts(_get_task(task_id), _fetch_comments(task_id))
+
+    task_ids = [str(task_id) for task_id in dict.fromkeys(task_ids)]
+    with ThreadPoolExecutor(max_workers=todoist_client.get_max_concurrency()) as pool:
+        timestamps = list(pool.map(instrumentation.bind(resolve), task_ids))
+
+    return dict(zip(task_ids, timestamps))
+
+
+@handle_request_exception
+@tool_memo.memoized("projects", "tasks", "comments")
+def analyze_open_tasks(project_name: Optional[str] = None) -> Union[List[Dict], Dict]:
+    """
+    Performs a deep analysis of every open task in a project in one call.
+
+    Fetches all tasks of the project in a single request, fetches comments for
+    every task concurrently over the pooled session, and joins them locally.
+    Use this instead of calling get_task_details and get_last_activity_ts for
+    each task.
+
+    Args:
+        project_name (Optional[str]): The name of the project to analyze. If None, uses default 'Work'.
+
+    Returns:
+        Union[List[Dict], Dict]: One record per open task with its details, subtasks,
+        next_action (first open subtask), comments, comment_count,
+        last_activity_ts, days_since_activity and is_stale.
+        An error dict is returned instead if the API request failed.
+    """
+    project_to_use = project_name if project_name else DEFAULT_PROJECT
+    project = get_project_by_name(project_to_use)
+    if not project or "error" in project:
+        print(
+            f"Project '{project_to_use}' not found. Please create a project named '{project_to_use}' in ToDoist."
         )
-        latest_comment_ts = sorted_comments[0].get("created", "")
+        return []
 
-    # 4. Compare task.created_at with the latest comment timestamp
-    # 5. Return the most recent of the two as an ISO 8601 string
-    if latest_comment_ts and task_created_ts:
-        # Compare timestamps and return the most recent
-        if latest_comment_ts > task_created_ts:
-            return latest_comment_ts
-        else:
-            return task_created_ts
-    elif latest_comment_ts:
-        return latest_comment_ts
-    elif task_created_ts:
-        return task_created_ts
-    else:
-        # Fallback to current timestamp if no timestamps found
-        return datetime.now(timezone.utc).isoformat()
+    # 1. One request for every task in the project, including subtasks
+    tasks = _list_project_tasks(project["id"])
+    return _analyze_tasks(tasks)
+
+
+def _analyze_tasks(tasks: List[Dict]) -> List[Dict]:
+    """
+    Fetches the comments of every task concurrently and joins tasks,
+    subtasks and comments into deep-analysis records.
+    """
+    with ThreadPoolExecutor(max_workers=todoist_client.get_max_concurrency()) as pool:
+        all_comments = list(
+            pool.map(instrumentation.bind(_fetch_comments), [task["id"] for task in tasks])
+        )
+
+    children = group_subtasks(tasks)
+    now = datetime.now(timezone.utc)
+    return [
+        build_task_analysis(task, comments, children.get(str(task.get("id")), []), now)
+        for task, comments in zip(tasks, all_comments)
+    ]
+
+
+def rank_tasks(project_name: Optional[str] = None, top_k: int = 10) -> Union[List[Dict], Dict]:
+    """
+    Ranks the open tasks of a project with the deterministic RIN score
+    (recency, due-date urgency, priority, labels and subtask structure) and
+    returns only the top_k. Use this instead of reading the whole backlog to
+    decide what matters most.
+
+    Args:
+        project_name (Optional[str]): The name of the project to rank. If None, uses default 'Work'.
+        top_k (int): How many tasks to return.
+
+    Returns:
+        Union[List[Dict], Dict]: The top_k tasks, highest score first, each with its id,
+        content, priority, due, labels, parent_id, next_action,
+        days_since_activity, is_stale, score and a per-component breakdown.
+        An error dict is returned instead if the API request failed.
+    """
+    analysis = analyze_open_tasks(project_name)
+    if isinstance(analysis, dict):
+        return analysis
+    return rin_scoring.rank(analysis, top_k)
+
+
+@handle_request_exception
+@tool_memo.memoized("projects", "tasks")
+def get_open_tasks_by_project(project_names: Optional[List[str]] = None) -> Dict:
+    """
+    Fetches the open tasks of several projects, or of the whole account, in
+    two requests: one for the project list and one for all open tasks. Use
+    this instead of calling get_open_tasks once per project.
+
+    Args:
+        project_names (Optional[List[str]]): The projects to include. If None,
+            includes every project.
+
+    Returns:
+        Dict: A mapping of project name to its list of open tasks.
+    """
+    try:
+        projects = _select_projects(project_names)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    grouped = _list_all_tasks(projects)
+    return {
+        project.get("name", ""): [format_task(task) for task in grouped[str(project["id"])]]
+        for project in projects
+    }
+
+
+@handle_request_exception
+@tool_memo.memoized("projects", "tasks", "comments")
+def rank_tasks_across_projects(
+    project_names: Optional[List[str]] = None, top_k: int = 10
+) -> Union[List[Dict], Dict]:
+    """
+    Ranks the open tasks of several projects, or of the whole account,
+    together with the deterministic RIN score and returns only the top_k.
+    All tasks are listed with a single request.
+
+    Args:
+        project_names (Optional[List[str]]): The projects to include. If None,
+            includes every project.
+        top_k (int): How many tasks to return.
+
+    Returns:
+        Union[List[Dict], Dict]: The top_k tasks, highest score first, with the same fields
+        as rank_tasks plus the name of their project.
+        An error dict is returned instead if the API request failed.
+    """
+    try:
+        projects = _select_projects(project_names)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    grouped = _list_all_tasks(projects)
+    tasks = [task for project_tasks in grouped.values() for task in project_tasks]
+    ranked = rin_scoring.rank(_analyze_tasks(tasks), top_k)
+
+    names = {str(project["id"]): project.get("name", "") for project in projects}
+    project_of = {str(task.get("id")): str(task.get("project_id")) for task in tasks}
+    for record in ranked:
+        record["project"] = names.get(project_of.get(record["id"]), "")
+    return ranked
+
+
+# Trace every tool call when TOOL_TRACE is set (see tools/instrumentation.py)
+instrumentation.instrument_module(
+    sys.modules[__name__],
+    [
+        "get_projects",
+        "get_project_by_name",
+        "get_work_project_id",
+        "create_project",
+        "delete_project",
+        "move_task_to_project",
+        "get_open_tasks",
+        "query_tasks",
+        "get_task_comments",
+        "get_task_subtasks",
+        "get_task_details",
+        "get_task_description",
+        "add_task_comment",
+        "update_task",
+        "create_task",
+        "create_tasks_bulk",
+        "apply_changes",
+        "get_last_activity_ts",
+        "get_last_activity_ts_many",
+        "analyze_open_tasks",
+        "rank_tasks",
+        "get_open_tasks_by_project",
+        "rank_tasks_across_projects",
+    ],
+)
@@ -0,0 +1,273 @@
+"""
+Memoization of read-only ToDoist tool results, keyed on the data they read.
+
+Models often call get_open_tasks or get_task_details with the same arguments
+several times in a session. `memoized` stores each result under the tool
+name, its arguments and the current version of every data scope the tool
+reads:
+- "projects": the project list;
+- "tasks": open tasks, their fields and their subtasks;
+- "comments": comments of any task;
+- "task:<id>": one task and its comments.
+
+Write tools call `bump()` with the scopes they change. For example,
+add_task_comment bumps "comments" and "task:<id>", so get_task_details of
+other tasks and get_open_tasks keep their entries. Changed scopes give new
+keys, so a later read never matches a result stored before the write. Every
+lookup first pulls changes from the Sync API into the replica, and changes
+made elsewhere, e.g. in the Todoist app, bump their scopes too.
+
+Memoization is therefore on by default only when the sync replica is
+(TODOIST_USE_SYNC). Without the replica nothing sees changes made outside
+this process, so setting TODOIST_MEMO=true then accepts results up to
+TODOIST_MEMO_TTL seconds old.
+
+Results are stored JSON-encoded, so every caller gets its own copy and may
+change it freely.
+
+Results are kept in an in-process LRU. With TODOIST_MEMO_DISK_PATH set,
+they are also stored in a SQLite file together with the scope versions, so
+they survive a restart and are shared by processes using the same file.
+
+Configuration (environment variables):
+    TODOIST_MEMO: Memoize read-only tool results (true/false, default: the
+        value of TODOIST_USE_SYNC).
+    TODOIST_MEMO_SIZE: Results kept in memory (default 256).
+    TODOIST_MEMO_TTL: Seconds a result stays valid (default 300).
+    TODOIST_MEMO_DISK_PATH: SQLite file of the disk tier (default unset, off).
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterable, Optional
+
+from tools import instrumentation
+from tools.ttl_cache import TTLCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, stored_at REAL, value TEXT);
+CREATE TABLE IF NOT EXISTS versions (scope TEXT PRIMARY KEY, version INTEGER);
+"""
+
+# Included in every key, so bumping it invalidates every result
+ALL_SCOPES = "*"
+
+_MISSING = object()
+_lock = threading.RLock()
+_versions: Dict[str, int] = {}
+
+
+def is_enabled() -> bool:
+    """Returns True if read-only tool results should be memoized."""
+    # Imported here because todoist_sync bumps scopes when it applies changes
+    from tools import todoist_sync
+
+    default = "true" if todoist_sync.is_enabled() else "false"
+    return os.getenv("TODOIST_MEMO", default).lower() in ("1", "true", "yes")
+
+
+def get_ttl() -> float:
+    """Get how many seconds a memoized result stays valid."""
+    return float(os.getenv("TODOIST_MEMO_TTL", "300"))
+
+
+def get_size() -> int:
+    """Get how many results are kept in memory."""
+    return int(os.getenv("TODOIST_MEMO_SIZE", "256"))
+
+
+def get_disk_path() -> Optional[str]:
+    """Get the SQLite file of the disk tier, or None if it is off."""
+    return os.getenv("TODOIST_MEMO_DISK_PATH") or None
+
+
+# Holds JSON-encoded results; its limits are read again on every use
+memo_cache = TTLCache(maxsize=get_size(), ttl=get_ttl())
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(get_disk_path())
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def get_versions(scopes: Iterable[str]) -> Dict[str, int]:
+    """Returns the current version of each scope; unchanged scopes are at 0."""
+    scopes = sorted(set(scopes) | {ALL_SCOPES})
+    with _lock:
+        if not get_disk_path():
+            return {scope: _versions.get(scope, 0) for scope in scopes}
+        with _connect() as conn:
+            rows = conn.execute(
+                f"SELECT scope, version FROM versions WHERE scope IN ({','.join('?' * len(scopes))})",
+                scopes,
+            ).fetchall()
+    stored = dict(rows)
+    return {scope: stored.get(scope, 0) for scope in scopes}
+
+
+def bump(*scopes: str):
+    """
+    Marks data scopes as changed, so results that read them are recomputed.
+
+    Args:
+        *scopes (str): "projects", "tasks", "comments", "task:<id>", or "*"
+            for everything.
+    """
+    with _lock:
+        for scope in scopes:
+            _versions[scope] = _versions.get(scope, 0) + 1
+        if get_disk_path():
+            with _connect() as conn:
+                conn.executemany(
+                    "INSERT INTO versions (scope, version) VALUES (?, 1) "
+                    "ON CONFLICT (scope) DO UPDATE SET version = version + 1",
+                    [(scope,) for scope in scopes],
+                )
+
+
+def bump_task(task_id: str, *scopes: str):
+    """Bumps the scope of one task together with `scopes`."""
+    bump(f"task:{task_id}", *scopes)
+
+
+def clear_memo():
+    """Drops every memoized result, in memory and on disk."""
+    with _lock:
+        memo_cache.clear()
+        _versions.clear()
+        if get_disk_path():
+            with _connect() as conn:
+                conn.execute("DELETE FROM results")
+                conn.execute("DELETE FROM versions")
+
+
+def _load(key: str):
+    with _lock, _connect() as conn:
+        row = conn.execute("SELECT stored_at, value FROM results WHERE key = ?", (key,)).fetchone()
+    if row is None or time.time() - row[0] > get_ttl():
+        return _MISSING
+    return row[1]
+
+
+def _store(key: str, encoded: str):
+    with _lock, _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, stored_at, value) VALUES (?, ?, ?)",
+            (key, time.time(), encoded),
+        )
+
+
+def _configure_memory_tier():
+    memo_cache.ttl = get_ttl()
+    memo_cache.maxsize = get_size()
+
+
+def _sync_replica():
+    # Imported here because todoist_sync bumps scopes when it applies changes
+    from tools import todoist_sync
+
+    if todoist_sync.is_enabled():
+        todoist_sync.ensure_synced()
+
+
+def lookup(key: str):
+    """Returns a copy of the memoized result for `key` from memory or disk, or a miss."""
+    _configure_memory_tier()
+    encoded = memo_cache.get(key, _MISSING)
+    if encoded is _MISSING and get_disk_path():
+        encoded = _load(key)
+        instrumentation.record_cache(hit=encoded is not _MISSING)
+        if encoded is not _MISSING:
+            memo_cache.set(key, encoded)
+    return encoded if encoded is _MISSING else json.loads(encoded)
+
+
+def remember(key: str, value):
+    """Stores a result in memory and, if enabled, on disk."""
+    _configure_memory_tier()
+    encoded = json.dumps(value)
+    memo_cache.set(key, encoded)
+    if get_disk_path():
+        _store(key, encoded)
+
+
+def _is_cacheable(result) -> bool:
+    """Errors are never memoized so they can be retried."""
+    return result is not None and not (isinstance(result, dict) and "error" in result)
+
+
+def memoized(*scopes: str):
+    """
+    A decorator that memoizes a read-only tool on its arguments and the
+    versions of the data scopes it reads.
+
+    Args:
+        *scopes (str): The scopes the tool reads. They may name arguments,
+            e.g. "task:{task_id}".
+
+    Works for both plain and coroutine functions. Equivalent calls, such as
+    get_open_tasks() and get_open_tasks(project_name=None), share an entry,
+    and a sync and an async tool with the same name share entries.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            versions = get_versions(scope.format(**arguments) for scope in scopes)
+            return json.dumps([func.__name__, arguments, versions], sort_keys=True, default=str)
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not is_enabled():
+                    return await func(*args, **kwargs)
+                await asyncio.to_thread(_sync_replica)
+                key = make_key(args, kwargs)
+                result = lookup(key)
+                if result is _MISSING:
+                    result = await func(*args, **kwargs)
+                    if _is_cacheable(result):
+                        remember(key, result)
+                return result
+
+        else:
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not is_enabled():
+                    return func(*args, **kwargs)
+                _sync_replica()
+                key = make_key(args, kwargs)
+                result = lookup(key)
+                if result is _MISSING:
+                    result = func(*args, **kwargs)
+                    if _is_cacheable(result):
+                        remember(key, result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def get_memo_stats() -> Dict:
+    """Returns hit/miss counters and the size of the in-memory tier."""
+    return {**memo_cache.stats(), "disk": get_disk_path() is not None}
@@ -0,0 +1,121 @@
+"""
+A small thread-safe LRU cache with per-entry expiry, used for ToDoist
+metadata (projects and labels) that changes rarely but is read on almost
+every tool call.
+"""
+
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Hashable, Tuple
+
+from tools import instrumentation
+
+_MISSING = object()
+
+
+class TTLCache:
+    """An LRU cache whose entries expire `ttl` seconds after being stored."""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for `key`, or `default` on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                instrumentation.record_cache(hit=True)
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            instrumentation.record_cache(hit=False)
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        """Stores `value`, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drops every entry. Hit and miss counters are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+def _is_cacheable(result: Any) -> bool:
+    """Errors and empty lookups are never cached so they can be retried."""
+    if result is None:
+        return False
+    if isinstance(result, dict) and "error" in result:
+        return False
+    return True
+
+
+def ttl_cached(cache: TTLCache):
+    """
+    A decorator that caches a function's results in `cache`.
+
+    Results are keyed on the function name and arguments, so a sync and an
+    async function with the same name share entries. None and
+    `{"error": ...}` results are not cached. Works for both plain and
+    coroutine functions.
+    """
+
+    def decorator(func):
+        def make_key(args, kwargs):
+            return (func.__name__, args, tuple(sorted(kwargs.items())))
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                result = cache.get(key, _MISSING)
+                if result is _MISSING:
+                    result = await func(*args, **kwargs)
+                    if _is_cacheable(result):
+                        cache.set(key, result)
+                return result
+
+        else:
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                result = cache.get(key, _MISSING)
+                if result is _MISSING:
+                    result = func(*args, **kwargs)
+                    if _is_cacheable(result):
+                        cache.set(key, result)
+                return result
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator